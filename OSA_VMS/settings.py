@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -41,6 +42,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'tracker.middleware.QueryTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -67,6 +69,26 @@ TEMPLATES = [
     },
 ]
 
+# Templates parsed once per process and kept, without the debug bookkeeping
+# (which also means no template error pages). Enabled with
+# TRACKER_TEMPLATE_PROFILE=production; template edits then need a restart.
+TEMPLATES_PRODUCTION = {
+    'APP_DIRS': False,
+    'OPTIONS': {
+        'debug': False,
+        'loaders': [
+            ('django.template.loaders.cached.Loader', [
+                'django.template.loaders.filesystem.Loader',
+                'django.template.loaders.app_directories.Loader',
+            ]),
+        ],
+    },
+}
+
+if os.environ.get('TRACKER_TEMPLATE_PROFILE') == 'production':
+    TEMPLATES[0]['APP_DIRS'] = TEMPLATES_PRODUCTION['APP_DIRS']
+    TEMPLATES[0]['OPTIONS'].update(TEMPLATES_PRODUCTION['OPTIONS'])
+
 WSGI_APPLICATION = 'OSA_VMS.wsgi.application'
 
 
@@ -80,6 +102,69 @@ DATABASES = {
     }
 }
 
+# SQLite tuned for many concurrent requests: WAL lets readers run alongside the
+# writer, IMMEDIATE transactions take the write lock up front so waiting happens
+# in the busy timeout instead of failing mid-transaction, and connections are
+# kept open between requests. Enabled with TRACKER_DB_PROFILE=production.
+SQLITE_PRODUCTION = {
+    'CONN_MAX_AGE': int(os.environ.get('TRACKER_CONN_MAX_AGE', 600)),
+    'CONN_HEALTH_CHECKS': True,
+    'OPTIONS': {
+        'timeout': 20,
+        'transaction_mode': 'IMMEDIATE',
+        'init_command': ';'.join([
+            'PRAGMA journal_mode=WAL',
+            'PRAGMA synchronous=NORMAL',
+            'PRAGMA mmap_size=%d' % int(os.environ.get('TRACKER_SQLITE_MMAP_SIZE', 128 * 1024 * 1024)),
+            # negative: in KiB rather than pages
+            'PRAGMA cache_size=-%d' % int(os.environ.get('TRACKER_SQLITE_CACHE_KB', 64 * 1024)),
+        ]),
+    },
+}
+
+if os.environ.get('TRACKER_DB_PROFILE') == 'production':
+    DATABASES['default'].update(SQLITE_PRODUCTION)
+
+# Writes failing with "database is locked" are retried this many times, backing
+# off exponentially from TRACKER_WRITE_RETRY_DELAY seconds.
+TRACKER_WRITE_RETRIES = 5
+TRACKER_WRITE_RETRY_DELAY = 0.05
+
+# Student login throttling: each client IP may try TRACKER_LOGIN_BURST school
+# IDs at once, then TRACKER_LOGIN_RATE per second. Behind a reverse proxy, set
+# TRACKER_CLIENT_IP_HEADER to the header it puts the client address in
+# (e.g. 'HTTP_X_FORWARDED_FOR'); REMOTE_ADDR is used otherwise. Each proxy
+# appends the address it received the request from, so the client address is
+# the TRACKER_TRUSTED_PROXY_COUNT-th from the right; anything left of it was
+# sent by the client and may be forged.
+TRACKER_LOGIN_BURST = 10
+TRACKER_LOGIN_RATE = 10 / 60
+TRACKER_LOGIN_TRACKED_CLIENTS = 10000
+TRACKER_CLIENT_IP_HEADER = os.environ.get('TRACKER_CLIENT_IP_HEADER', '')
+TRACKER_TRUSTED_PROXY_COUNT = int(os.environ.get('TRACKER_TRUSTED_PROXY_COUNT', 1))
+# Bearer tokens accepted by the read-only JSON API (tracker.api), besides a
+# staff session; comma-separated in the environment.
+TRACKER_API_TOKENS = [token for token in os.environ.get('TRACKER_API_TOKENS', '').split(',') if token]
+# Violations older than this are moved to the archive table by the
+# archive_violations command (tracker.archive).
+TRACKER_ARCHIVE_AFTER_DAYS = int(os.environ.get('TRACKER_ARCHIVE_AFTER_DAYS', 2 * 365))
+# Violation history snapshots kept by the snapshot_history command and job
+# (tracker.history); events before the oldest one kept are dropped with them.
+TRACKER_HISTORY_SNAPSHOTS_KEPT = int(os.environ.get('TRACKER_HISTORY_SNAPSHOTS_KEPT', 30))
+# School ID -> pk lookups cached by each process for the login page.
+TRACKER_STUDENT_ID_CACHE_SIZE = 50000
+TRACKER_STUDENT_ID_CACHE_TTL = 60
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'osa-vms',
+    }
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -124,5 +209,32 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# File storage
+# https://docs.djangoproject.com/en/5.2/ref/settings/#storages
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+    # Uploaded rosters and finished exports of background jobs (tracker.jobs).
+    # The web server and every runworker host must see the same files, so use
+    # a shared directory or a remote storage backend when they run apart.
+    'tracker_jobs': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+        'OPTIONS': {
+            'location': os.environ.get('TRACKER_JOB_FILES_ROOT', BASE_DIR / 'job_files'),
+        },
+    },
+}
+
 LOGIN_URL = 'tracker:log'
 LOGIN_REDIRECT_URL = 'tracker:student_list'
+
+# Per-request query and timing instrumentation (tracker.middleware.QueryTimingMiddleware).
+# Off unless TRACKER_PROFILING=1 is set in the environment; when off the
+# middleware removes itself at startup.
+TRACKER_PROFILING = os.environ.get('TRACKER_PROFILING') == '1'
+TRACKER_SLOW_REQUEST_MS = 500
@@ -1,5 +1,17 @@
 from django.contrib import admin
-from .models import Student, Violation
+from . import search
+from .models import ArchivedViolation, Job, Student, Violation
+
+
+class FullTextSearchMixin:
+	"""Answer changelist searches from the FTS5 index instead of LIKE scans."""
+
+	search_kind = None
+
+	def get_search_results(self, request, queryset, search_term):
+		if not search.is_available() or not search.match_expression(search_term):
+			return super().get_search_results(request, queryset, search_term)
+		return queryset.filter(pk__in=search.matching_ids(search_term, self.search_kind)), False
 
 
 class ViolationInline(admin.TabularInline):
@@ -9,18 +21,45 @@ class ViolationInline(admin.TabularInline):
 
 
 @admin.register(Student)
-class StudentAdmin(admin.ModelAdmin):
+class StudentAdmin(FullTextSearchMixin, admin.ModelAdmin):
+	# violation_count is the stored counter, so sorting by it needs no COUNT per row
 	list_display = ("student_id", "first_name", "last_name", "noted", "violation_count")
 	list_filter = ("noted",)
+	# skip the second COUNT over the whole table when filtering
+	show_full_result_count = False
 	search_fields = ("student_id", "first_name", "last_name")
+	search_kind = search.STUDENT
 	inlines = (ViolationInline,)
 
-	def violation_count(self, obj):
-		return obj.violations.count()
-
 
 @admin.register(Violation)
-class ViolationAdmin(admin.ModelAdmin):
+class ViolationAdmin(FullTextSearchMixin, admin.ModelAdmin):
 	list_display = ("student", "offense", "level", "occurred_at")
 	list_filter = ("level",)
+	list_select_related = ("student",)
+	date_hierarchy = "occurred_at"
+	show_full_result_count = False
 	search_fields = ("offense", "student__student_id", "student__first_name", "student__last_name")
+	search_kind = search.VIOLATION
+
+
+@admin.register(ArchivedViolation)
+class ArchivedViolationAdmin(admin.ModelAdmin):
+	list_display = ("student", "offense", "level", "occurred_at", "archived_at")
+	list_filter = ("level",)
+	list_select_related = ("student",)
+	show_full_result_count = False
+	raw_id_fields = ("student",)
+	readonly_fields = ("id", "archived_at")
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+	list_display = ("name", "status", "attempts", "created_by", "created_at", "finished_at")
+	list_filter = ("status", "name")
+	list_select_related = ("created_by",)
+	exclude = ("input_file", "output_file")
+	readonly_fields = (
+		"status", "progress", "total", "message", "result", "error",
+		"attempts", "started_at", "finished_at", "heartbeat_at", "worker",
+	)
@@ -0,0 +1,286 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from . import versions
+from .models import ArchivedViolation, Student, Violation, ViolationRollup
+
+
+COLLEGE_CHART_CACHE_KEY = "tracker:analytics:college_chart"
+ANALYTICS_VERSION = "analytics"
+COLLEGE_CHART_CACHE_TIMEOUT = 60 * 60
+TREND_GRANULARITIES = [period for period, _ in ViolationRollup.PERIODS]
+
+COLLEGE_COLORS = {
+    "CAS": "rgba(0, 128, 0, 0.6)",
+    "CIT": "rgba(255, 0, 0, 0.6)",
+    "COE": "rgba(255, 165, 0, 0.6)",
+    "CBMA": "rgba(255, 255, 0, 0.6)",
+    "CCS": "rgba(128, 128, 128, 0.6)",
+    "COED": "rgba(0, 0, 255, 0.6)",
+}
+
+
+def bucket_start(day, granularity):
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+
+def next_bucket(bucket, granularity):
+    if granularity == "week":
+        return bucket + timedelta(days=7)
+    if granularity == "month":
+        return (bucket.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return bucket + timedelta(days=1)
+
+
+def rollup_key(college, level, occurred_at):
+    return (college or "", level, timezone.localdate(occurred_at))
+
+
+def invalidate_analytics_cache():
+    versions.bump([ANALYTICS_VERSION])
+
+
+def analytics_version():
+    """(version, changed_at) of the analytics data, the same in every process."""
+    return versions.current(ANALYTICS_VERSION)
+
+
+def _period_deltas(deltas):
+    """Spread {(college, level, day): delta} over the day, week and month rows."""
+    spread = Counter()
+    for (college, level, day), delta in deltas.items():
+        for period in TREND_GRANULARITIES:
+            spread[(period, college, level, bucket_start(day, period))] += delta
+    return spread
+
+
+def apply_rollup_deltas(deltas):
+    """Add a Counter of {(college, level, day): delta} onto ViolationRollup."""
+    with transaction.atomic():
+        for (period, college, level, day), delta in _period_deltas(deltas).items():
+            if not delta:
+                continue
+            rows = ViolationRollup.objects.filter(period=period, college=college, level=level, day=day)
+            if rows.update(count=F("count") + delta) or delta < 0:
+                continue
+            try:
+                with transaction.atomic():
+                    ViolationRollup.objects.create(period=period, college=college, level=level, day=day, count=delta)
+            except IntegrityError:
+                # created concurrently by another writer
+                rows.update(count=F("count") + delta)
+    invalidate_analytics_cache()
+
+
+def previous_college(violation):
+    """College of the student a saved violation belonged to before the save."""
+    previous_student_id = violation.loaded_value("student_id", violation.student_id)
+    if previous_student_id == violation.student_id:
+        return violation.student.college
+    return Student.objects.filter(pk=previous_student_id).values_list("college", flat=True).first()
+
+
+def record_violation_saved(violation, created):
+    deltas = Counter()
+    if not created:
+        previous_key = rollup_key(
+            previous_college(violation),
+            violation.loaded_value("level", violation.level),
+            violation.loaded_value("occurred_at", violation.occurred_at),
+        )
+        deltas[previous_key] -= 1
+    deltas[rollup_key(violation.student.college, violation.level, violation.occurred_at)] += 1
+    apply_rollup_deltas(deltas)
+
+
+def record_violation_deleted(violation):
+    record_violations_deleted([violation], violation.student.college)
+
+
+def record_violations_deleted(violations, college):
+    """Take deleted violations of one student, who was in `college`, off the rollups."""
+    deltas = Counter()
+    for violation in violations:
+        deltas[rollup_key(college, violation.level, violation.occurred_at)] -= 1
+    apply_rollup_deltas(deltas)
+
+
+def _rollup_counts(violations, college_field):
+    rows = (
+        violations.order_by()
+        .annotate(day=TruncDate("occurred_at"))
+        .values(college_field, "level", "day")
+        .annotate(count=Count("pk"))
+    )
+    counts = Counter()
+    for row in rows:
+        counts[(row[college_field] or "", row["level"], row["day"])] += row["count"]
+    return counts
+
+
+def archived_rollup_counts(archived=None):
+    """{(college, level, day): count} of archived violations, which stay in the rollups."""
+    return _rollup_counts(ArchivedViolation.objects.all() if archived is None else archived, "student__college")
+
+
+def move_student_rollups(student_id, old_college, new_college):
+    """Move the rollup contribution of a student's violations to their new college."""
+    deltas = Counter()
+    counts = _rollup_counts(Violation.objects.filter(student_id=student_id), "student__college")
+    counts.update(archived_rollup_counts(ArchivedViolation.objects.filter(student_id=student_id)))
+    for (_, level, day), count in counts.items():
+        deltas[(old_college or "", level, day)] -= count
+        deltas[(new_college or "", level, day)] += count
+    apply_rollup_deltas(deltas)
+
+
+def rebuild_rollups(counts=None):
+    """Recompute ViolationRollup from scratch, or from {(college, level, day): count}
+    daily counts if given; returns the number of rollup rows."""
+    if counts is None:
+        counts = _rollup_counts(Violation.objects.all(), "student__college") + archived_rollup_counts()
+    counts = {key: count for key, count in _period_deltas(counts).items() if count}
+    with transaction.atomic():
+        ViolationRollup.objects.all().delete()
+        ViolationRollup.objects.bulk_create(
+            (
+                ViolationRollup(period=period, college=college, level=level, day=day, count=count)
+                for (period, college, level, day), count in counts.items()
+            ),
+            batch_size=1000,
+        )
+    invalidate_analytics_cache()
+    return len(counts)
+
+
+def college_chart_data(version=None):
+    """Chart data for college_analytics, served from the cache when possible;
+    `version` is the analytics_version() already read, if any."""
+    key = f"{COLLEGE_CHART_CACHE_KEY}:{(version or analytics_version())[0]}"
+    data = cache.get(key)
+    if data is not None:
+        return data
+
+    totals = dict(
+        ViolationRollup.objects.filter(period="month")
+        .order_by()
+        .values("college")
+        .annotate(total=Sum("count"))
+        .values_list("college", "total")
+    )
+    choices = Student.college.field.choices
+    background_colors = [COLLEGE_COLORS.get(abbr, "rgba(0,0,0,0.6)") for abbr, _ in choices]
+    data = {
+        "college_labels": [name for _, name in choices],
+        "violation_data": [totals.get(abbr, 0) for abbr, _ in choices],
+        "background_colors": background_colors,
+        "border_colors": [color.replace("0.6", "1") for color in background_colors],
+    }
+    cache.set(key, data, COLLEGE_CHART_CACHE_TIMEOUT)
+    return data
+
+
+def bucket_range(start, end, granularity):
+    """Widen start..end (inclusive) to whole buckets."""
+    return bucket_start(start, granularity), next_bucket(bucket_start(end, granularity), granularity) - timedelta(days=1)
+
+
+def limit_buckets(start, end, granularity, limit):
+    """Move start forward so start..end (whole buckets) spans at most `limit` buckets."""
+    earliest = bucket_start(end, granularity)
+    try:
+        if granularity == "month":
+            months = earliest.year * 12 + earliest.month - 1 - (limit - 1)
+            earliest = earliest.replace(year=months // 12, month=months % 12 + 1)
+        else:
+            earliest -= timedelta(days=(limit - 1) * (7 if granularity == "week" else 1))
+    except (OverflowError, ValueError):
+        return start, end  # the limit reaches back before the first representable date
+    return max(start, earliest), end
+
+
+def trend_buckets(start, end, granularity):
+    """Every bucket from start to end, as (bucket, first day, last day)."""
+    buckets = []
+    bucket = bucket_start(start, granularity)
+    while bucket <= end:
+        following = next_bucket(bucket, granularity)
+        buckets.append((bucket, bucket, following - timedelta(days=1)))
+        bucket = following
+    return buckets
+
+
+def violation_trends(granularity, start, end, college=None, level=None):
+    """Violation counts per bucket, college and level between two dates (inclusive,
+    widened to whole buckets), as [(bucket, college, level, count)].
+
+    The rows come straight from the rollup of the requested period, so five years
+    by month read about as many rows as a week by day.
+    """
+    start, end = bucket_range(start, end, granularity)
+    rollups = ViolationRollup.objects.filter(period=granularity, day__range=(start, end))
+    if college:
+        rollups = rollups.filter(college=college)
+    if level:
+        rollups = rollups.filter(level=level)
+    return list(rollups.order_by("day", "college", "level").values_list("day", "college", "level", "count"))
+
+
+def trend_chart_data(granularity, start, end, college=None, level=None, version=None):
+    """Per-college and per-level series over every bucket in the range, cached
+    until the analytics data changes."""
+    version = version or analytics_version()
+    key = ":".join(
+        map(str, ["tracker:analytics:trends", version[0], granularity, start, end, college, level])
+    )
+    data = cache.get(key)
+    if data is not None:
+        return data
+
+    buckets = trend_buckets(start, end, granularity)
+    index = {bucket: position for position, (bucket, _, _) in enumerate(buckets)}
+    colleges = [(abbr, name) for abbr, name in Student.college.field.choices if not college or abbr == college]
+    by_college = {abbr: [0] * len(buckets) for abbr, _ in colleges}
+    by_level = {value: [0] * len(buckets) for value, _ in Violation.OFFENSE_LEVELS if not level or value == level}
+    totals = [0] * len(buckets)
+    for bucket, row_college, row_level, count in violation_trends(granularity, start, end, college, level):
+        position = index[bucket]
+        if row_college in by_college:
+            by_college[row_college][position] += count
+        by_level[row_level][position] += count
+        totals[position] += count
+
+    data = {
+        "labels": [bucket.isoformat() for bucket, _, _ in buckets],
+        "college_series": [
+            {"label": name, "data": by_college[abbr], "color": COLLEGE_COLORS.get(abbr, "rgba(0,0,0,0.6)")}
+            for abbr, name in colleges
+        ],
+        "level_series": [
+            {"label": label, "data": by_level[value]}
+            for value, label in Violation.OFFENSE_LEVELS
+            if value in by_level
+        ],
+        "rows": [
+            {
+                "bucket": bucket,
+                "first_day": first_day,
+                "last_day": last_day,
+                "cells": [{"college": abbr, "count": by_college[abbr][position]} for abbr, _ in colleges],
+                "total": totals[position],
+            }
+            for position, (bucket, first_day, last_day) in enumerate(buckets)
+        ],
+    }
+    cache.set(key, data, COLLEGE_CHART_CACHE_TIMEOUT)
+    return data
@@ -0,0 +1,174 @@
+"""Read-only JSON API over students and violations for other campus systems.
+
+The students and violations endpoints take:
+
+- ``fields``: comma-separated subset of the fields to return (all by default);
+- ``ids``: up to MAX_IDS comma-separated school IDs, looked up in one query;
+- ``updated_since``: an ISO 8601 timestamp; only students changed (including
+  their violations) or violations saved at or after it are returned;
+- ``cursor`` and ``limit``: keyset pagination, following ``next``.
+
+Edited violations thus show up again. Deleted violations are listed by
+``deleted/`` with the time of their deletion, from the violation history; that
+history only goes back to the oldest snapshot kept (see tracker.history.prune),
+so a client that has not synced since then needs a full resync. Archived
+violations are not deletions: they leave the feed without a tombstone.
+
+Rows are serialized straight from ``.values()``. Requests authenticate with a
+staff session or an ``Authorization: Bearer`` token from TRACKER_API_TOKENS.
+"""
+import hmac
+from functools import wraps
+
+from django.conf import settings
+from django.http import JsonResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.http import require_GET
+
+from . import history
+from .exports import STUDENT_COLUMNS, VIOLATION_COLUMNS
+from .models import Student, Violation, ViolationEvent
+from .pagination import InvalidCursor, keyset_page
+
+
+API_PAGE_SIZE = 100
+API_MAX_PAGE_SIZE = 1000
+MAX_IDS = 1000
+
+# (output field, queryset field)
+STUDENT_FIELDS = dict(STUDENT_COLUMNS + [("last_changed", "last_changed")])
+VIOLATION_FIELDS = dict([("id", "pk")] + VIOLATION_COLUMNS + [("updated_at", "updated_at")])
+DELETED_VIOLATION_FIELDS = {"id": "violation_id", "deleted_at": "recorded_at"}
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def _has_valid_token(request):
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    return any(hmac.compare_digest(token, valid) for valid in settings.TRACKER_API_TOKENS)
+
+
+def api_view(view):
+    """Authenticate the request and turn BadRequest into a 400 response."""
+
+    @require_GET
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        # tokens first: they need no session lookup
+        if not _has_valid_token(request):
+            if not request.user.is_authenticated:
+                return JsonResponse({"error": "Authentication required."}, status=401)
+            if not request.user.is_staff:
+                return JsonResponse({"error": "Staff access required."}, status=403)
+        try:
+            return view(request, *args, **kwargs)
+        except (BadRequest, InvalidCursor) as exc:
+            return JsonResponse({"error": str(exc)}, status=400)
+
+    return wrapper
+
+
+def _fields(request, available):
+    names = [name for name in request.GET.get("fields", "").split(",") if name]
+    unknown = set(names) - set(available)
+    if unknown:
+        raise BadRequest(f"Unknown fields: {', '.join(sorted(unknown))}.")
+    return {name: available[name] for name in names or available}
+
+
+def _ids(request):
+    ids = {value.strip() for value in request.GET.get("ids", "").split(",") if value.strip()}
+    if len(ids) > MAX_IDS:
+        raise BadRequest(f"At most {MAX_IDS} ids per request.")
+    return ids
+
+
+def _updated_since(request):
+    value = request.GET.get("updated_since")
+    if not value:
+        return None
+    try:
+        since = parse_datetime(value)
+    except ValueError:
+        since = None
+    if since is None:
+        raise BadRequest("updated_since must be an ISO 8601 date and time.")
+    return since if timezone.is_aware(since) else timezone.make_aware(since)
+
+
+def _limit(request):
+    try:
+        limit = int(request.GET.get("limit", API_PAGE_SIZE))
+    except ValueError:
+        raise BadRequest("limit must be a number.") from None
+    return min(max(limit, 1), API_MAX_PAGE_SIZE)
+
+
+def _page(request, queryset, fields, ordering, page_size=None):
+    """One page of `queryset` as {"results": [...], "next": cursor}."""
+    # the cursor is taken from the ordering fields, so they are always selected
+    extra = [field for field in ordering if field not in fields.values()]
+    rows, next_cursor = keyset_page(
+        queryset.values(*fields.values(), *extra), ordering, request.GET.get("cursor"), page_size or _limit(request)
+    )
+    renamed = {field: name for name, field in fields.items() if name != field}
+    if extra or renamed:
+        rows = [
+            {renamed.get(field, field): value for field, value in row.items() if field not in extra}
+            for row in rows
+        ]
+    return JsonResponse({"results": rows, "next": next_cursor})
+
+
+@api_view
+def students(request):
+    fields = _fields(request, STUDENT_FIELDS)
+    queryset = Student.objects.all()
+    ids = _ids(request)
+    if ids:
+        queryset = queryset.filter(student_id__in=ids)
+    # a batch of ids comes back whole, in one query
+    page_size = len(ids) or None
+    since = _updated_since(request)
+    if since:
+        # last_changed is bumped by violation changes too
+        queryset = queryset.filter(last_changed__gte=since)
+        ordering = ("last_changed", "pk")
+    else:
+        # the unique index on student_id serves both the lookup and the order
+        ordering = ("student_id",) if ids else ("pk",)
+    return _page(request, queryset, fields, ordering, page_size)
+
+
+@api_view
+def violations(request):
+    fields = _fields(request, VIOLATION_FIELDS)
+    queryset = Violation.objects.all()
+    ids = _ids(request)
+    if ids:
+        queryset = queryset.filter(student__student_id__in=ids)
+    since = _updated_since(request)
+    if since:
+        queryset = queryset.filter(updated_at__gte=since)
+        return _page(request, queryset, fields, ("updated_at", "pk"))
+    return _page(request, queryset, fields, ("occurred_at", "pk"))
+
+
+@api_view
+def deleted_violations(request):
+    """Tombstones of the violations deleted at or after updated_since."""
+    since = _updated_since(request)
+    if not since:
+        raise BadRequest("updated_since is required.")
+    # the events are complete from the snapshot before `since` on; pruning drops older ones
+    try:
+        history.latest_snapshot(since)
+    except history.HistoryUnavailable as exc:
+        raise BadRequest(f"{exc} Resync in full.") from None
+    queryset = ViolationEvent.objects.filter(kind=ViolationEvent.DELETED, recorded_at__gte=since)
+    return _page(request, queryset, DELETED_VIOLATION_FIELDS, ("recorded_at", "pk"))
@@ -0,0 +1,73 @@
+"""Moving old violations out of the Violation table.
+
+``archive_violations()`` moves violations older than a cutoff into
+ArchivedViolation, keeping their ids, in batches of ARCHIVE_BATCH_SIZE: each
+batch is its own short transaction, and the archiver pauses between batches
+so other writers get the database lock. The move skips the Violation signals
+on purpose: an archived violation still counts towards its student's
+counters (see tracker.rules) and stays in the analytics rollups, so there is
+nothing to recompute.
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import search
+from .models import ArchivedViolation, Student, Violation
+from .retry import retry_on_locked
+
+
+ARCHIVE_BATCH_SIZE = 500
+ARCHIVE_PAUSE = 0.05
+
+
+def archive_cutoff(days=None):
+    days = settings.TRACKER_ARCHIVE_AFTER_DAYS if days is None else days
+    return timezone.now() - timedelta(days=days)
+
+
+@retry_on_locked
+def archive_batch(cutoff, batch_size=ARCHIVE_BATCH_SIZE):
+    """Move the oldest violations recorded before `cutoff`, at most `batch_size`
+    of them; returns how many were moved."""
+    with transaction.atomic():
+        rows = list(
+            Violation.objects.filter(occurred_at__lt=cutoff)
+            .order_by("occurred_at", "pk")
+            .values_list("pk", "student_id")[:batch_size]
+        )
+        if not rows:
+            return 0
+        pks = [pk for pk, _ in rows]
+        now = timezone.now()
+        placeholders = ", ".join(["%s"] * len(pks))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {ArchivedViolation._meta.db_table} "
+                f"(id, student_id, offense, level, occurred_at, archived_at) "
+                f"SELECT id, student_id, offense, level, occurred_at, %s FROM {Violation._meta.db_table} "
+                f"WHERE id IN ({placeholders})",
+                [connection.ops.adapt_datetimefield_value(now), *pks],
+            )
+            cursor.execute(f"DELETE FROM {Violation._meta.db_table} WHERE id IN ({placeholders})", pks)
+        # the counters stay the same, but the student pages list these violations elsewhere now
+        Student.objects.filter(pk__in={student_id for _, student_id in rows}).update(last_changed=now)
+        search.remove_many(search.VIOLATION, pks)
+    return len(pks)
+
+
+def archive_violations(cutoff, batch_size=ARCHIVE_BATCH_SIZE, pause=ARCHIVE_PAUSE, progress=None):
+    """Archive every violation recorded before `cutoff`; returns how many were moved.
+    `progress`, if given, is called with the running total after every batch."""
+    total = 0
+    while True:
+        moved = archive_batch(cutoff, batch_size)
+        if not moved:
+            return total
+        total += moved
+        if progress:
+            progress(total)
+        time.sleep(pause)
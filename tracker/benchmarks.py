@@ -0,0 +1,399 @@
+"""Synthetic datasets and a view benchmark harness for the tracker.
+
+``generate_dataset`` fills the database with students and violations the way
+the bulk import paths would, and ``run_benchmarks`` drives the main views
+through the Django test client, collecting latency percentiles and query
+counts that ``compare_to_baselines`` checks against BASELINES_PATH.
+``run_load_test`` replays the student clearance flow concurrently through the
+WSGI and the ASGI handler to compare their throughput, and
+``benchmark_templates`` times the rendering of every tracker template on its own.
+"""
+import asyncio
+import json
+import random
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import AsyncClient, Client
+from django.template.loader import get_template
+from django.test.signals import template_rendered
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import history, logins, search
+from .analytics import rebuild_rollups
+from .middleware import percentile
+from .models import HistorySnapshot, Job, Student, Violation, ViolationEvent, ViolationRollup
+from .rules import NOTED_THRESHOLD, recompute
+from .views import student_rows_context
+
+
+BASELINES_PATH = Path(__file__).resolve().parent / "benchmark_baselines.json"
+
+DATASET_SIZES = {
+    # name: (students per college, average violations per student)
+    "small": (50, 1),
+    "medium": (500, 2),
+    "large": (2500, 2),
+}
+
+FIRST_NAMES = ["Juan", "Maria", "Jose", "Ana", "Mark", "Kristine", "John", "Angel", "Paul", "Grace", "Carlo", "Joy"]
+LAST_NAMES = ["Santos", "Reyes", "Cruz", "Bautista", "Garcia", "Mendoza", "Torres", "Flores", "Villanueva", "Ramos"]
+OFFENSES = [
+    "Not wearing ID",
+    "Improper uniform",
+    "Late for flag ceremony",
+    "Smoking on campus",
+    "Vandalism",
+    "Cheating during examination",
+]
+BATCH_SIZE = 2000
+TEMPLATES_DIR = Path(__file__).resolve().parent / "templates" / "tracker"
+STUDENT_ROWS_RENDERED = 5000
+
+
+def clear_dataset():
+    with transaction.atomic():
+        Violation.objects.all().delete()
+        Student.objects.all().delete()
+        ViolationRollup.objects.all().delete()
+        ViolationEvent.objects.all().delete()
+        HistorySnapshot.objects.all().delete()
+    search.rebuild()
+    cache.clear()
+    logins.student_ids.clear()
+
+
+def generate_dataset(students_per_college, violations_per_student, seed=0, days=365):
+    """Create students for every college plus violations with escalating levels
+    spread over the past `days`; returns (students, violations) created."""
+    rng = random.Random(seed)
+    colleges = [code for code, _ in Student.college.field.choices]
+    first_id = int(Student.objects.order_by("-pk").values_list("pk", flat=True).first() or 0) + 1
+    now = timezone.now()
+    total_students = total_violations = 0
+    # occurred_at is auto_now_add, so dates are spread afterwards, one UPDATE per day
+    pks_by_day = defaultdict(list)
+
+    students = []
+    for offset in range(students_per_college * len(colleges)):
+        students.append(Student(
+            student_id=f"{first_id + offset:08d}",
+            first_name=rng.choice(FIRST_NAMES),
+            last_name=rng.choice(LAST_NAMES),
+            course_year_section=f"BS {rng.randint(1, 4)}{rng.choice('ABC')}",
+            college=colleges[offset % len(colleges)],
+        ))
+    for start in range(0, len(students), BATCH_SIZE):
+        batch = Student.objects.bulk_create(students[start:start + BATCH_SIZE])
+        violations = []
+        for student in batch:
+            count = min(rng.randint(0, violations_per_student * 2), 10)
+            for number in range(count):
+                level = min(number + 1, 3)
+                violations.append(Violation(student=student, offense=rng.choice(OFFENSES), level=level))
+        Violation.objects.bulk_create(violations, batch_size=BATCH_SIZE)
+        for violation in violations:
+            pks_by_day[rng.randrange(days)].append(violation.pk)
+        total_students += len(batch)
+        total_violations += len(violations)
+
+    with transaction.atomic():
+        for day, pks in pks_by_day.items():
+            for start in range(0, len(pks), BATCH_SIZE):
+                Violation.objects.filter(pk__in=pks[start:start + BATCH_SIZE]).update(
+                    occurred_at=now - timedelta(days=day), updated_at=now - timedelta(days=day)
+                )
+
+    recompute()
+    rebuild_rollups()
+    search.rebuild()
+    # the inserts above skip the event log; start its history here
+    history.take_snapshot()
+    return total_students, total_violations
+
+
+def _benchmark_requests(student_pk):
+    """(name, method, url, data) for each benchmarked view."""
+    return [
+        ("student_list", "get", reverse("tracker:student_list"), None),
+        ("student_detail", "get", reverse("tracker:student_detail", args=[student_pk]), None),
+        ("student_violation_view", "get", reverse("tracker:student_violation", args=[student_pk]), None),
+        (
+            "add_violation",
+            "post",
+            reverse("tracker:add_violation"),
+            {"student": student_pk, "offense": "Not wearing ID", "level": 1},
+        ),
+        ("college_analytics", "get", reverse("tracker:college_analytics"), None),
+    ]
+
+
+def benchmark_views(repeat=20):
+    """Time each view `repeat` times; the query count is taken from the last (warm) request."""
+    user = User.objects.filter(username="benchmark").first() or User.objects.create_superuser(
+        "benchmark", "benchmark@example.com", "benchmark"
+    )
+    client = Client()
+    client.force_login(user)
+    student_pk = Student.objects.order_by("pk").values_list("pk", flat=True).first()
+    results = {}
+    for name, method, url, data in _benchmark_requests(student_pk):
+        timings = []
+        for _ in range(repeat):
+            connection.queries_log.clear()
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                response = getattr(client, method)(url, data)
+                timings.append((time.perf_counter() - start) * 1000)
+            if response.status_code >= 400:
+                raise RuntimeError(f"{name} returned HTTP {response.status_code}")
+        timings.sort()
+        results[name] = {
+            "p50_ms": round(percentile(timings, 50), 2),
+            "p95_ms": round(percentile(timings, 95), 2),
+            "queries": len(queries),
+        }
+    return results
+
+
+def run_benchmarks(sizes, repeat=20, seed=0):
+    """Benchmark the views against each named dataset size; returns {size: {view: stats}}."""
+    results = {}
+    for size in sizes:
+        students_per_college, violations_per_student = DATASET_SIZES[size]
+        clear_dataset()
+        generate_dataset(students_per_college, violations_per_student, seed=seed)
+        results[size] = benchmark_views(repeat)
+    return results
+
+
+def load_baselines(path=BASELINES_PATH):
+    try:
+        return json.loads(Path(path).read_text())
+    except FileNotFoundError:
+        return {}
+
+
+def save_baselines(results, path=BASELINES_PATH):
+    baselines = load_baselines(path)
+    baselines.update(results)
+    Path(path).write_text(json.dumps(baselines, indent=2, sort_keys=True) + "\n")
+
+
+def compare_to_baselines(results, baselines, tolerance=2.0):
+    """Return a message for every view whose query count exceeds its baseline or
+    whose p95 latency exceeds the baseline by more than `tolerance` times."""
+    regressions = []
+    for size, views in results.items():
+        for name, stats in views.items():
+            baseline = baselines.get(size, {}).get(name)
+            if baseline is None:
+                continue
+            if stats["queries"] > baseline["queries"]:
+                regressions.append(f"{size}/{name}: {stats['queries']} queries, baseline {baseline['queries']}")
+            if stats["p95_ms"] > baseline["p95_ms"] * tolerance:
+                regressions.append(f"{size}/{name}: p95 {stats['p95_ms']} ms, baseline {baseline['p95_ms']} ms")
+    return regressions
+
+
+def _student_visits(count, seed=0):
+    """(school ID, pk, client IP) of `count` randomly picked students, each one a
+    login and a look at their violations. Every visit comes from its own address,
+    so the login rate limit does not throttle the test; the test client plays the
+    single trusted proxy, which passes that address in X-Forwarded-For."""
+    students = list(Student.objects.values_list("student_id", "pk"))
+    rng = random.Random(seed)
+    return [(*rng.choice(students), f"10.{n >> 16 & 255}.{n >> 8 & 255}.{n & 255}") for n in range(count)]
+
+
+def _check(response, expected):
+    if response.status_code != expected:
+        path = response.request.get("PATH_INFO") or response.request.get("path")
+        raise RuntimeError(f"{path} returned HTTP {response.status_code}")
+
+
+def _throughput(latencies, elapsed):
+    latencies = sorted(latencies)
+    return {
+        "visits": len(latencies),
+        "visits_per_s": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+    }
+
+
+def load_test_wsgi(visits, concurrency):
+    """Replay the visits on `concurrency` threads, like a threaded WSGI server."""
+    local = threading.local()
+    login_url = reverse("tracker:student_login")
+
+    def visit(student):
+        if not hasattr(local, "client"):
+            local.client = Client()
+        start = time.perf_counter()
+        _check(local.client.post(login_url, {"student_id": student[0]}, headers={"X-Forwarded-For": student[2]}), 302)
+        _check(local.client.get(reverse("tracker:student_violation", args=[student[1]])), 200)
+        return (time.perf_counter() - start) * 1000
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        start = time.perf_counter()
+        latencies = list(pool.map(visit, visits))
+        elapsed = time.perf_counter() - start
+    return _throughput(latencies, elapsed)
+
+
+async def load_test_asgi(visits, concurrency):
+    """Replay the visits as `concurrency` concurrent tasks on one event loop."""
+    client = AsyncClient()
+    slots = asyncio.Semaphore(concurrency)
+    login_url = reverse("tracker:student_login")
+
+    async def visit(student):
+        async with slots:
+            start = time.perf_counter()
+            _check(await client.post(login_url, {"student_id": student[0]}, headers={"X-Forwarded-For": student[2]}), 302)
+            _check(await client.get(reverse("tracker:student_violation", args=[student[1]])), 200)
+            return (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(visit(student) for student in visits))
+    return _throughput(latencies, time.perf_counter() - start)
+
+
+def run_load_test(size, visits=500, concurrency=50, seed=0):
+    """Compare WSGI and ASGI throughput of the student flow on the same dataset."""
+    students_per_college, violations_per_student = DATASET_SIZES[size]
+    clear_dataset()
+    generate_dataset(students_per_college, violations_per_student, seed=seed)
+    student_visits = _student_visits(visits, seed)
+    with override_settings(TRACKER_CLIENT_IP_HEADER="HTTP_X_FORWARDED_FOR", TRACKER_TRUSTED_PROXY_COUNT=1):
+        wsgi = load_test_wsgi(student_visits, concurrency)
+        logins.student_ids.clear()
+        asgi = asyncio.run(load_test_asgi(student_visits, concurrency))
+    return {"wsgi": wsgi, "asgi": asgi}
+
+
+def _template_pages(student, job):
+    """(client, method, url, data) of the pages that between them render the tracker
+    templates; client is "staff" or "student"."""
+    today = timezone.localdate()
+    return [
+        ("staff", "get", reverse("tracker:student_list"), None),
+        ("staff", "get", reverse("tracker:student_detail", args=[student.pk]), None),
+        ("staff", "get", reverse("tracker:student_history", args=[student.pk]), None),
+        ("staff", "get", reverse("tracker:at_risk_students"), None),
+        ("staff", "get", reverse("tracker:add_student"), None),
+        ("staff", "get", reverse("tracker:import_roster"), None),
+        ("staff", "get", reverse("tracker:college_analytics"), None),
+        ("staff", "get", reverse("tracker:violation_trends"), None),
+        (
+            "staff",
+            "get",
+            reverse("tracker:trend_violations"),
+            {"start": today - timedelta(days=30), "end": today},
+        ),
+        ("staff", "get", reverse("tracker:job_list"), None),
+        ("staff", "get", reverse("tracker:job_detail", args=[job.pk]), None),
+        ("staff", "get", reverse("tracker:profiling"), None),
+        ("staff", "get", reverse("tracker:about"), None),
+        ("student", "get", reverse("tracker:log"), None),
+        ("student", "get", reverse("tracker:login"), None),
+        ("student", "get", reverse("tracker:signup"), None),
+        (
+            "student",
+            "post",
+            reverse("tracker:signup"),
+            {"username": "benchmark-signup", "password1": "Tq7-lantern-orbit", "password2": "Tq7-lantern-orbit"},
+        ),
+        ("student", "get", reverse("tracker:student_login"), None),
+        ("student", "post", reverse("tracker:student_login"), {"student_id": student.student_id}),
+        ("student", "get", reverse("tracker:student_violation", args=[student.pk]), None),
+    ]
+
+
+def capture_template_contexts():
+    """Request the tracker pages and keep the first context each tracker template
+    was rendered with. template_rendered is only sent after setup_test_environment()."""
+    user = User.objects.filter(username="benchmark").first() or User.objects.create_superuser(
+        "benchmark", "benchmark@example.com", "benchmark"
+    )
+    clients = {"staff": Client(), "student": Client()}
+    clients["staff"].force_login(user)
+    student = Student.objects.filter(violation_count__gt=0).order_by("pk").first()
+    job = Job.objects.create(
+        name="import_roster",
+        status=Job.SUCCEEDED,
+        result={"rows": 3, "saved": 2, "error_count": 1, "errors": [[3, "Missing student ID."]]},
+    )
+    contexts = {}
+
+    def capture(sender, template, context, **kwargs):
+        if template.name and template.name.startswith("tracker/") and template.name not in contexts:
+            contexts[template.name] = context.flatten()
+
+    template_rendered.connect(capture)
+    try:
+        for client, method, url, data in _template_pages(student, job):
+            response = getattr(clients[client], method)(url, data)
+            if response.status_code >= 400:
+                raise RuntimeError(f"{url} returned HTTP {response.status_code}")
+    finally:
+        template_rendered.disconnect(capture)
+    return contexts
+
+
+def _student_rows(count):
+    """Unsaved students for rendering the student list rows without a database."""
+    rng = random.Random(0)
+    return [
+        Student(
+            pk=n,
+            student_id=f"2024-{n:05d}",
+            first_name=rng.choice(FIRST_NAMES),
+            last_name=rng.choice(LAST_NAMES),
+            violation_count=violation_count,
+            noted=violation_count >= NOTED_THRESHOLD,
+        )
+        for n, violation_count in enumerate((rng.choice((0, 0, 1, 2, 3, 4)) for _ in range(count)), start=1)
+    ]
+
+
+def _time_render(name, context, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        # looked up every time, so the template loaders are part of the cost
+        get_template(name).render(context)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {"p50_ms": round(percentile(timings, 50), 2), "p95_ms": round(percentile(timings, 95), 2)}
+
+
+def benchmark_templates(repeat=20, rows=STUDENT_ROWS_RENDERED):
+    """Time rendering each template in TEMPLATES_DIR with the context a page gave it,
+    plus the student list rows `rows` at a time; templates no page rendered map to None."""
+    contexts = capture_template_contexts()
+    results = {}
+    for path in sorted(TEMPLATES_DIR.glob("*.html")):
+        name = f"tracker/{path.name}"
+        results[name] = _time_render(name, contexts[name], repeat) if name in contexts else None
+    results[f"tracker/_student_rows.html ({rows} rows)"] = _time_render(
+        "tracker/_student_rows.html", student_rows_context(_student_rows(rows), "cursor"), repeat
+    )
+    return results
+
+
+def run_template_benchmark(size, repeat=20, rows=STUDENT_ROWS_RENDERED, seed=0):
+    students_per_college, violations_per_student = DATASET_SIZES[size]
+    clear_dataset()
+    generate_dataset(students_per_college, violations_per_student, seed=seed)
+    return benchmark_templates(repeat, rows)
@@ -0,0 +1,65 @@
+from collections import Counter
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from . import fragments, search
+from .analytics import apply_rollup_deltas, rollup_key
+from .history import record_violations_created
+from .models import Student, Violation
+from .retry import retry_on_locked
+from .rules import recompute
+
+
+MAX_BULK_VIOLATIONS = 5000
+BATCH_SIZE = 500
+
+
+def build_violations(entries):
+    """Validate violation entries ({"student_id", "offense", "level"} dicts keyed by
+    school ID) and return (unsaved Violation objects, {index: error message})."""
+    entries = list(entries)
+    school_ids = {str(entry.get("student_id", "")).strip() for entry in entries}
+    students = dict(Student.objects.filter(student_id__in=school_ids).values_list("student_id", "pk"))
+    violations, errors = [], {}
+    for index, entry in enumerate(entries):
+        school_id = str(entry.get("student_id", "")).strip()
+        if school_id not in students:
+            errors[index] = f"student_id: Student ID {school_id or '(blank)'} not found."
+            continue
+        violation = Violation(
+            student_id=students[school_id],
+            offense=str(entry.get("offense") or "").strip(),
+            level=entry.get("level"),
+        )
+        try:
+            violation.clean_fields(exclude={"student", "occurred_at"})
+        except ValidationError as exc:
+            messages = (f"{name}: {' '.join(problems)}" for name, problems in exc.message_dict.items())
+            errors[index] = "; ".join(messages)
+            continue
+        violations.append(violation)
+    return violations, errors
+
+
+@retry_on_locked
+def record_violations(violations):
+    """Insert validated violations in bulk, then refresh the affected students'
+    counters and the analytics rollups once for the whole batch."""
+    student_ids = {violation.student_id for violation in violations}
+    with transaction.atomic():
+        Violation.objects.bulk_create(violations, batch_size=BATCH_SIZE)
+        recompute(student_ids, violations_changed=True)
+        students = Student.objects.in_bulk(student_ids)
+        for violation in violations:
+            violation.student = students[violation.student_id]
+        apply_rollup_deltas(
+            Counter(
+                rollup_key(violation.student.college, violation.level, violation.occurred_at)
+                for violation in violations
+            )
+        )
+        record_violations_created(violations)
+        search.index_violations(violations)
+        fragments.invalidate_colleges({student.college for student in students.values()})
+    return violations
@@ -0,0 +1,57 @@
+"""Deleting a student together with their violations in bulk.
+
+A student's delete cascades to their live and archived violations, and each
+of those would otherwise look the student up again and write its own rollup
+updates, history event and search removal. Instead the student's pre_delete
+registers it with the transaction (see ``tracker.pending``), the
+violation receivers only collect the deleted rows, and the student's
+post_delete, still inside the delete's transaction, writes their effects at once.
+"""
+from . import pending
+
+
+class _PendingCascade(pending.Pending):
+    """Students being deleted in one transaction, with their college and the
+    violations deleted along with them. Nothing is left to do on commit."""
+
+    def __init__(self, using):
+        super().__init__(using)
+        self.colleges = {}
+        self.violations = {}
+
+
+def begin(student, using):
+    """Called before `student` is deleted: its violations are collected from now on."""
+    cascade = pending.current(_PendingCascade, using)
+    if cascade is not None:
+        cascade.colleges[student.pk] = student.college
+        cascade.violations[student.pk] = []
+
+
+def collect(violation, using):
+    """Keep a deleted (live or archived) violation of a student being deleted;
+    False if its student is not being deleted."""
+    cascade = pending.current(_PendingCascade, using, create=False)
+    if cascade is None or violation.student_id not in cascade.violations:
+        return False
+    cascade.violations[violation.student_id].append(violation)
+    return True
+
+
+def finish(student, using):
+    """Called after `student` is deleted: record its collected violations' deletion."""
+    from . import analytics, history, search
+    from .models import Violation
+
+    cascade = pending.current(_PendingCascade, using, create=False)
+    if cascade is None or student.pk not in cascade.violations:
+        return
+    college = cascade.colleges.pop(student.pk)
+    violations = cascade.violations.pop(student.pk)
+    if not violations:
+        return
+    analytics.record_violations_deleted(violations, college)
+    history.record_violations_deleted(violations, college)
+    search.remove_many(
+        search.VIOLATION, [violation.pk for violation in violations if isinstance(violation, Violation)], using
+    )
@@ -0,0 +1,108 @@
+import csv
+import json
+from datetime import datetime, time, timedelta
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Exists, OuterRef, Value
+from django.utils import timezone
+
+from .models import ArchivedViolation, Student, Violation
+
+
+EXPORT_CHUNK_SIZE = 2000
+
+# (output column, queryset field)
+STUDENT_COLUMNS = [
+    ("student_id", "student_id"),
+    ("first_name", "first_name"),
+    ("last_name", "last_name"),
+    ("course_year_section", "course_year_section"),
+    ("college", "college"),
+    ("violation_count", "violation_count"),
+    ("highest_level", "highest_level"),
+    ("noted", "noted"),
+]
+VIOLATION_COLUMNS = [
+    ("student_id", "student__student_id"),
+    ("last_name", "student__last_name"),
+    ("first_name", "student__first_name"),
+    ("college", "student__college"),
+    ("offense", "offense"),
+    ("level", "level"),
+    ("occurred_at", "occurred_at"),
+]
+# exports also include archived violations and say which ones they are
+VIOLATION_EXPORT_COLUMNS = VIOLATION_COLUMNS + [("archived", "archived")]
+
+
+class Echo:
+    """File-like object whose write() hands the line back to the csv writer's caller."""
+
+    def write(self, value):
+        return value
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _occurred_between(start, end):
+    filters = {}
+    if start:
+        filters["occurred_at__gte"] = _day_start(start)
+    if end:
+        filters["occurred_at__lt"] = _day_start(end + timedelta(days=1))
+    return filters
+
+
+def violations_matching(model, college=None, level=None, start=None, end=None):
+    """`model` (Violation or ArchivedViolation) rows matching the filters."""
+    violations = model.objects.filter(**_occurred_between(start, end))
+    if college:
+        violations = violations.filter(student__college=college)
+    if level:
+        violations = violations.filter(level=level)
+    return violations
+
+
+def filter_violations(college=None, level=None, start=None, end=None):
+    """Live and archived violations matching the filters, as a UNION of both
+    tables selecting the VIOLATION_EXPORT_COLUMNS, whose `archived` column tells
+    them apart. Both sides name their columns: the tables' own differ."""
+    filters = {"college": college, "level": level, "start": start, "end": end}
+    fields = [field for _, field in VIOLATION_EXPORT_COLUMNS]
+    live = violations_matching(Violation, **filters).annotate(archived=Value(False))
+    archived = violations_matching(ArchivedViolation, **filters).annotate(archived=Value(True))
+    return live.order_by().values_list(*fields).union(archived.order_by().values_list(*fields), all=True)
+
+
+def filter_students(college=None, level=None, start=None, end=None):
+    """Students of a college, by highest offense level, optionally only those with
+    a violation inside the date range."""
+    students = Student.objects.order_by("college", "last_name", "first_name")
+    if college:
+        students = students.filter(college=college)
+    if level:
+        students = students.filter(highest_level=level)
+    if start or end:
+        in_range = Violation.objects.filter(student=OuterRef("pk"), **_occurred_between(start, end))
+        archived_in_range = ArchivedViolation.objects.filter(student=OuterRef("pk"), **_occurred_between(start, end))
+        students = students.filter(Exists(in_range) | Exists(archived_in_range))
+    return students
+
+
+def _rows(queryset, columns):
+    return queryset.values_list(*(field for _, field in columns)).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def stream_csv(queryset, columns):
+    writer = csv.writer(Echo())
+    yield writer.writerow([name for name, _ in columns])
+    for row in _rows(queryset, columns):
+        yield writer.writerow(row)
+
+
+def stream_ndjson(queryset, columns):
+    names = [name for name, _ in columns]
+    for row in _rows(queryset, columns):
+        yield json.dumps(dict(zip(names, row)), cls=DjangoJSONEncoder) + "\n"
@@ -1,4 +1,8 @@
+import re
+
 from django import forms
+from .analytics import TREND_GRANULARITIES
+from .bulk import MAX_BULK_VIOLATIONS
 from .models import Violation, Student
 
 
@@ -34,3 +38,60 @@ class StudentForm(forms.ModelForm):
             "course_year_section": forms.TextInput(attrs={"class": "form-control", "placeholder": "e.g. BSIS 3A"}),
             "college": forms.Select(attrs={"class": "form-control"}),
         }
+
+
+class RosterUploadForm(forms.Form):
+    roster = forms.FileField(
+        help_text="CSV or XLSX with columns student_id, first_name, last_name, course_year_section, college.",
+        widget=forms.ClearableFileInput(attrs={"class": "form-control", "accept": ".csv,.xlsx"}),
+    )
+
+
+class BulkViolationForm(forms.Form):
+    """Records the same offense for many students at once, e.g. after an ID sweep."""
+
+    student_ids = forms.CharField(
+        label="Student IDs",
+        help_text="One student ID per line; commas or spaces also work.",
+        widget=forms.Textarea(attrs={"class": "form-control", "rows": 8}),
+    )
+    offense = forms.CharField(max_length=255, widget=forms.TextInput(attrs={"class": "form-control"}))
+    level = forms.TypedChoiceField(
+        choices=[("", "Select Offense Level")] + Violation.OFFENSE_LEVELS,
+        coerce=int,
+        widget=forms.Select(attrs={"class": "form-select"}),
+    )
+
+    def clean_student_ids(self):
+        student_ids = list(dict.fromkeys(re.split(r"[\s,]+", self.cleaned_data["student_ids"].strip())))
+        if len(student_ids) > MAX_BULK_VIOLATIONS:
+            raise forms.ValidationError(f"At most {MAX_BULK_VIOLATIONS} students can be recorded at once.")
+        return student_ids
+
+    def entries(self):
+        return [
+            {"student_id": student_id, "offense": self.cleaned_data["offense"], "level": self.cleaned_data["level"]}
+            for student_id in self.cleaned_data["student_ids"]
+        ]
+
+
+class ExportFilterForm(forms.Form):
+    college = forms.ChoiceField(choices=[("", "All colleges")] + Student.college.field.choices, required=False)
+    level = forms.TypedChoiceField(
+        choices=[("", "All levels")] + Violation.OFFENSE_LEVELS, coerce=int, empty_value=None, required=False
+    )
+    start = forms.DateField(required=False)
+    end = forms.DateField(required=False)
+
+
+class TrendFilterForm(ExportFilterForm):
+    granularity = forms.ChoiceField(
+        choices=[(value, value.title()) for value in TREND_GRANULARITIES], initial="week", required=False
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start, end = cleaned_data.get("start"), cleaned_data.get("end")
+        if start and end and start > end:
+            raise forms.ValidationError("The start date must not be after the end date.")
+        return cleaned_data
@@ -0,0 +1,41 @@
+"""Cached HTML fragments of the student list.
+
+Every college has a version number (kept by ``tracker.versions``) and fragment
+keys embed it, so invalidating a college is a single increment; stale fragments
+simply stop being looked up and expire. The versions live in the database, so
+an invalidation committed by any process (the job worker, a management
+command) reaches every web worker, whatever cache each of them uses. The
+ALL_COLLEGES version covers the name-sorted panel and the per-college header
+counts, which change with any college.
+"""
+from django.db import DEFAULT_DB_ALIAS
+
+from . import versions
+from .models import Student
+
+
+FRAGMENT_CACHE_TIMEOUT = 10 * 60
+ALL_COLLEGES = "*"
+
+
+def _version_name(college):
+    return f"fragments:{college or '-'}"
+
+
+def fragment_version(college):
+    return versions.current(_version_name(college))[0]
+
+
+def fragment_key(name, college, *parts):
+    version = fragment_version(college)
+    return ":".join(["tracker:fragments", name, college or "-", str(version), *map(str, parts)])
+
+
+def invalidate_colleges(colleges, using=DEFAULT_DB_ALIAS):
+    """Drop the cached fragments of the given colleges once the transaction commits."""
+    colleges = {college or "" for college in colleges} | {ALL_COLLEGES}
+    versions.bump([_version_name(college) for college in colleges], using)
+
+
+def invalidate_all(using=DEFAULT_DB_ALIAS):
+    invalidate_colleges([code for code, _ in Student.college.field.choices] + [""], using)
@@ -0,0 +1,280 @@
+"""Append-only violation history, snapshots and point-in-time replay.
+
+The Violation signal receivers (and the bulk paths that skip signals) append
+ViolationEvent rows: each change adds and/or removes a violation state. A
+periodic ``take_snapshot()`` copies the live violations plus the daily
+rollup counts (archived violations included); ``student_record()`` and
+``rollup_counts()`` then start from the latest snapshot taken before the
+requested time and replay only the events recorded after it. Snapshots are
+taken from the live tables rather than by folding events into the previous
+snapshot, so changes that bypassed the signals (queryset updates) do not carry
+over from one snapshot to the next.
+
+The copy is written in batches of SNAPSHOT_BATCH_SIZE, each its own short
+transaction, so writers are not locked out for the whole copy. Violations with
+events recorded meanwhile are copied again when the snapshot is completed, and
+only complete snapshots are replayed from.
+
+``prune()`` drops old snapshots together with the events before the oldest
+one kept; history before that snapshot is then gone.
+"""
+from collections import Counter
+from itertools import chain
+
+from django.db import transaction
+from django.db.models import F, Max, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from .analytics import archived_rollup_counts, previous_college, rollup_key
+from .models import ArchivedViolation, HistorySnapshot, SnapshotRollup, SnapshotViolation, Violation, ViolationEvent
+from .retry import retry_on_locked
+
+
+SNAPSHOT_BATCH_SIZE = 2000
+STATE_FIELDS = ("violation_id", "student_pk", "college", "offense", "level", "occurred_at")
+
+
+class HistoryUnavailable(ValueError):
+    pass
+
+
+def _event(kind, delta, violation_id, student_pk, college, offense, level, occurred_at, recorded_at):
+    return ViolationEvent(
+        kind=kind,
+        delta=delta,
+        violation_id=violation_id,
+        student_pk=student_pk,
+        college=college or "",
+        offense=offense,
+        level=level,
+        occurred_at=occurred_at,
+        recorded_at=recorded_at,
+    )
+
+
+def _state(violation, college):
+    return (
+        violation.pk,
+        violation.student_id,
+        college,
+        violation.offense,
+        violation.level,
+        violation.occurred_at,
+    )
+
+
+def record_violation_saved(violation, created):
+    now = timezone.now()
+    current = _state(violation, violation.student.college)
+    if created:
+        ViolationEvent.objects.bulk_create([_event(ViolationEvent.CREATED, 1, *current, now)])
+        return
+    previous = (
+        violation.pk,
+        violation.loaded_value("student_id", violation.student_id),
+        previous_college(violation),
+        violation.loaded_value("offense", violation.offense),
+        violation.loaded_value("level", violation.level),
+        violation.loaded_value("occurred_at", violation.occurred_at),
+    )
+    if previous != current:
+        ViolationEvent.objects.bulk_create([
+            _event(ViolationEvent.UPDATED, -1, *previous, now),
+            _event(ViolationEvent.UPDATED, 1, *current, now),
+        ])
+
+
+def record_violation_deleted(violation):
+    record_violations_deleted([violation], violation.student.college)
+
+
+def record_violations_deleted(violations, college):
+    """Log deleted violations of one student, who was in `college`."""
+    now = timezone.now()
+    ViolationEvent.objects.bulk_create(
+        (_event(ViolationEvent.DELETED, -1, *_state(violation, college), now) for violation in violations),
+        batch_size=SNAPSHOT_BATCH_SIZE,
+    )
+
+
+def record_violations_created(violations):
+    """Log violations inserted in bulk; each needs its student loaded."""
+    now = timezone.now()
+    ViolationEvent.objects.bulk_create(
+        (
+            _event(ViolationEvent.CREATED, 1, *_state(violation, violation.student.college), now)
+            for violation in violations
+        ),
+        batch_size=SNAPSHOT_BATCH_SIZE,
+    )
+
+
+def record_student_moved(student_pk, old_college, new_college):
+    """Log a student's violations, archived ones included, moving from one college
+    to another; the rollups count both."""
+    now = timezone.now()
+    events = []
+    violations = chain(
+        Violation.objects.filter(student_id=student_pk).order_by(),
+        ArchivedViolation.objects.filter(student_id=student_pk).order_by(),
+    )
+    for violation in violations:
+        events.append(_event(ViolationEvent.MOVED, -1, *_state(violation, old_college), now))
+        events.append(_event(ViolationEvent.MOVED, 1, *_state(violation, new_college), now))
+    ViolationEvent.objects.bulk_create(events, batch_size=SNAPSHOT_BATCH_SIZE)
+
+
+def _snapshot_rows(snapshot, violations, counts):
+    """SnapshotViolation rows of `violations`, counted into `counts` as they go."""
+    rows = violations.order_by().values_list("pk", "student_id", "student__college", "offense", "level", "occurred_at")
+    for violation_id, student_pk, college, offense, level, occurred_at in rows:
+        counts[rollup_key(college, level, occurred_at)] += 1
+        yield SnapshotViolation(
+            snapshot=snapshot,
+            violation_id=violation_id,
+            student_pk=student_pk,
+            college=college or "",
+            offense=offense,
+            level=level,
+            occurred_at=occurred_at,
+        )
+
+
+@retry_on_locked
+def _copy_batch(snapshot, after, counts):
+    """Copy the next SNAPSHOT_BATCH_SIZE live violations with ids above `after`;
+    returns the last id copied, or None when there are none left."""
+    batch_counts = Counter()
+    with transaction.atomic():
+        pks = list(
+            Violation.objects.filter(pk__gt=after).order_by("pk").values_list("pk", flat=True)[:SNAPSHOT_BATCH_SIZE]
+        )
+        if not pks:
+            return None
+        SnapshotViolation.objects.bulk_create(
+            _snapshot_rows(snapshot, Violation.objects.filter(pk__in=pks), batch_counts)
+        )
+    counts.update(batch_counts)
+    return pks[-1]
+
+
+@retry_on_locked
+def _complete(snapshot, counts):
+    """Bring the copied rows up to date with the events recorded while copying,
+    then store the rollup counts and mark the snapshot complete."""
+    counts = counts.copy()
+    with transaction.atomic():
+        # written first, so that no other writer gets in between this and the copy
+        HistorySnapshot.objects.filter(pk=snapshot.pk).update(taken_at=timezone.now())
+        last_event = ViolationEvent.objects.aggregate(last=Max("pk"))["last"] or 0
+        changed = set(
+            ViolationEvent.objects.filter(pk__gt=snapshot.last_event, pk__lte=last_event)
+            .values_list("violation_id", flat=True)
+        )
+        # archiving is not an event: violations archived meanwhile are counted with the archive
+        changed.update(
+            ArchivedViolation.objects.filter(archived_at__gte=snapshot.taken_at).values_list("pk", flat=True)
+        )
+        changed = list(changed)
+        for start in range(0, len(changed), SNAPSHOT_BATCH_SIZE):
+            ids = changed[start:start + SNAPSHOT_BATCH_SIZE]
+            stale = snapshot.violations.filter(violation_id__in=ids)
+            for college, level, occurred_at in stale.values_list("college", "level", "occurred_at"):
+                counts[rollup_key(college, level, occurred_at)] -= 1
+            stale.delete()
+            SnapshotViolation.objects.bulk_create(
+                _snapshot_rows(snapshot, Violation.objects.filter(pk__in=ids), counts)
+            )
+        counts.update(archived_rollup_counts())
+        SnapshotRollup.objects.bulk_create(
+            (
+                SnapshotRollup(snapshot=snapshot, college=college, level=level, day=day, count=count)
+                for (college, level, day), count in counts.items()
+                if count
+            ),
+            batch_size=SNAPSHOT_BATCH_SIZE,
+        )
+        HistorySnapshot.objects.filter(pk=snapshot.pk).update(last_event=last_event, complete=True)
+    snapshot.refresh_from_db()
+
+
+def take_snapshot():
+    """Copy the live violations and their daily rollup counts into a new snapshot."""
+    snapshot = HistorySnapshot.objects.create(
+        last_event=ViolationEvent.objects.aggregate(last=Max("pk"))["last"] or 0, complete=False
+    )
+    counts = Counter()
+    after = 0
+    while after is not None:
+        after = _copy_batch(snapshot, after, counts)
+    _complete(snapshot, counts)
+    return snapshot
+
+
+@retry_on_locked
+def prune(keep):
+    """Keep the `keep` newest snapshots and the events after the oldest of them;
+    returns (snapshots, events) deleted."""
+    kept = list(HistorySnapshot.objects.filter(complete=True).order_by("-taken_at", "-pk")[:max(keep, 1)])
+    with transaction.atomic():
+        snapshots = HistorySnapshot.objects.exclude(pk__in=[snapshot.pk for snapshot in kept]).delete()[1]
+        events = ViolationEvent.objects.filter(pk__lte=kept[-1].last_event).delete()[0] if kept else 0
+    return snapshots.get(HistorySnapshot._meta.label, 0), events
+
+
+def latest_snapshot(at=None):
+    """The newest snapshot taken at or before `at` (now by default)."""
+    at = at or timezone.now()
+    snapshot = HistorySnapshot.objects.filter(complete=True, taken_at__lte=at).order_by("-taken_at", "-pk").first()
+    if snapshot is None:
+        raise HistoryUnavailable(f"No violation history is kept from before {timezone.localtime(at):%Y-%m-%d %H:%M}.")
+    return snapshot
+
+
+def _events_since(snapshot, at):
+    return ViolationEvent.objects.filter(pk__gt=snapshot.last_event, recorded_at__lte=at)
+
+
+def student_record(student_pk, at=None):
+    """The violations a student had at `at`, newest first, as dicts of STATE_FIELDS."""
+    at = at or timezone.now()
+    snapshot = latest_snapshot(at)
+    violations = {
+        row["violation_id"]: row
+        for row in snapshot.violations.filter(student_pk=student_pk).values(*STATE_FIELDS)
+    }
+    events = _events_since(snapshot, at).filter(student_pk=student_pk).order_by("pk")
+    for event in events.values("delta", *STATE_FIELDS):
+        if event.pop("delta") > 0:
+            violations[event["violation_id"]] = event
+        else:
+            violations.pop(event["violation_id"], None)
+    # archiving is not an event, and archived violations are left out of later snapshots
+    archived = ArchivedViolation.objects.filter(student_id=student_pk, occurred_at__lte=at).values(
+        "offense", "level", "occurred_at",
+        violation_id=F("pk"), student_pk=F("student_id"), college=Coalesce("student__college", Value("")),
+    )
+    for row in archived:
+        violations.setdefault(row["violation_id"], row)
+    return sorted(violations.values(), key=lambda row: (row["occurred_at"], row["violation_id"]), reverse=True)
+
+
+def rollup_counts(at=None):
+    """{(college, level, day): count} daily rollup counts as they were at `at`."""
+    at = at or timezone.now()
+    snapshot = latest_snapshot(at)
+    counts = Counter({
+        (college, level, day): count
+        for college, level, day, count in snapshot.rollups.values_list("college", "level", "day", "count")
+    })
+    deltas = (
+        _events_since(snapshot, at)
+        .annotate(day=TruncDate("occurred_at"))
+        .values("college", "level", "day")
+        .annotate(change=Sum("delta"))
+        .order_by()
+    )
+    for row in deltas:
+        counts[(row["college"], row["level"], row["day"])] += row["change"]
+    return counts
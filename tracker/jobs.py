@@ -0,0 +1,128 @@
+"""A small job queue kept in the Job table, so it needs no broker and works on
+whatever database the tracker already uses.
+
+Views ``enqueue()`` jobs by task name; the runworker command ``claim()``s them
+with a conditional UPDATE (safe with several workers, no row locks needed) and
+``run()``s them on a thread pool. A failing job is queued again with an
+exponential delay until it has used max_attempts; tasks raise JobFailed for
+errors that retrying cannot fix. Running jobs whose worker stopped reporting
+progress for STALE_AFTER seconds are handed back by ``requeue_stale()``.
+
+Uploaded and produced files go through the tracker_jobs storage; a job only
+stores their names.
+"""
+import traceback
+from datetime import timedelta
+from importlib import import_module
+
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job, job_files
+from .retry import retry_on_locked
+
+
+RETRY_DELAY = 30
+STALE_AFTER = 10 * 60
+CLAIM_CANDIDATES = 5
+
+_tasks = {}
+
+
+class JobFailed(Exception):
+    """Raised by a task to fail its job without retrying."""
+
+
+def task(name):
+    """Register a task function, called as func(job, **job.payload)."""
+
+    def register(func):
+        _tasks[name] = func
+        return func
+
+    return register
+
+
+def get_task(name):
+    import_module("tracker.tasks")  # registers the built-in tasks
+    try:
+        return _tasks[name]
+    except KeyError:
+        raise ValueError(f"Unknown job {name!r}.") from None
+
+
+def enqueue(name, payload=None, upload=None, user=None, max_attempts=3):
+    """Queue the task `name`; `upload`, a File such as an UploadedFile, is
+    copied in chunks to the job storage for the task to open as job.input_file."""
+    get_task(name)
+    input_file = ""
+    if upload is not None:
+        files = job_files()
+        input_file = files.save(files.generate_filename(f"input/{upload.name}"), upload)
+    return _create(name=name, payload=payload or {}, input_file=input_file, created_by=user, max_attempts=max_attempts)
+
+
+@retry_on_locked
+def _create(**fields):
+    return Job.objects.create(**fields)
+
+
+@retry_on_locked
+def claim(worker):
+    """Mark the next due job as running for `worker` and return it, or None."""
+    now = timezone.now()
+    due = (
+        Job.objects.filter(status=Job.QUEUED, run_after__lte=now)
+        .order_by("run_after", "pk")
+        .values_list("pk", flat=True)[:CLAIM_CANDIDATES]
+    )
+    for pk in due:
+        # only one worker's UPDATE can still see the job queued
+        claimed = Job.objects.filter(pk=pk, status=Job.QUEUED).update(
+            status=Job.RUNNING, worker=worker, attempts=F("attempts") + 1, started_at=now, heartbeat_at=now,
+        )
+        if claimed:
+            return Job.objects.get(pk=pk)
+    return None
+
+
+@retry_on_locked
+def _finish(job, **fields):
+    Job.objects.filter(pk=job.pk).update(**fields)
+    for name, value in fields.items():
+        setattr(job, name, value)
+
+
+def run(job):
+    """Run a claimed job and record its outcome."""
+    try:
+        result = get_task(job.name)(job, **job.payload)
+    except JobFailed as exc:
+        _finish(job, status=Job.FAILED, error=str(exc), finished_at=timezone.now())
+    except Exception:
+        error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            delay = timedelta(seconds=RETRY_DELAY * 2 ** (job.attempts - 1))
+            _finish(job, status=Job.QUEUED, error=error, run_after=timezone.now() + delay)
+        else:
+            _finish(job, status=Job.FAILED, error=error, finished_at=timezone.now())
+    else:
+        _finish(job, status=Job.SUCCEEDED, result=result, error="", finished_at=timezone.now())
+    return job
+
+
+@retry_on_locked
+def heartbeat(worker):
+    """Show that `worker` is still alive for its running jobs, including ones
+    that do not report progress."""
+    return Job.objects.filter(status=Job.RUNNING, worker=worker).update(heartbeat_at=timezone.now())
+
+
+@retry_on_locked
+def requeue_stale(stale_after=STALE_AFTER):
+    """Queue again the running jobs whose worker went silent; returns how many."""
+    stale = Job.objects.filter(status=Job.RUNNING, heartbeat_at__lt=timezone.now() - timedelta(seconds=stale_after))
+    failed = stale.filter(attempts__gte=F("max_attempts")).update(
+        status=Job.FAILED, error="The worker running this job stopped.", finished_at=timezone.now()
+    )
+    return failed + stale.update(status=Job.QUEUED, run_after=timezone.now())
@@ -0,0 +1,129 @@
+"""Keeping the student login path off the database.
+
+Students log in with their school ID only, so the login form is also the
+easiest way to enumerate IDs. ``allow_login`` gives every client IP a token
+bucket (TRACKER_LOGIN_BURST attempts, refilled at TRACKER_LOGIN_RATE per
+second) and is checked before anything else; ``lookup_student_pk`` answers
+from an in-process LRU cache of school ID -> pk.
+
+Only IDs that were found are cached, so a student added by any process can
+log in at once; unknown IDs always go to the database, which the token bucket
+keeps in check. The cache is per process: saves and deletes in this process
+evict their IDs when they commit, an ID changed or deleted by another process
+can still lead to its old pk for TRACKER_STUDENT_ID_CACHE_TTL seconds.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Student
+
+
+_MISSING = object()
+
+
+class LRUCache:
+    """A thread-safe mapping keeping at most `maxsize` entries for `ttl` seconds each."""
+
+    def __init__(self, maxsize, ttl, clock=time.monotonic):
+        self.maxsize, self.ttl, self.clock = maxsize, ttl, clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING:
+                return default
+            value, expires = entry
+            if expires <= self.clock():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, self.clock() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def discard(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class TokenBucketLimiter:
+    """Per-key token buckets. Only the `max_keys` most recently seen keys are
+    tracked; a forgotten key starts again with a full bucket."""
+
+    def __init__(self, max_keys, clock=time.monotonic):
+        self.max_keys, self.clock = max_keys, clock
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def allow(self, key, rate, burst):
+        """Take a token from `key`'s bucket, refilled at `rate` tokens per second
+        up to `burst`; False when it is empty."""
+        now = self.clock()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            allowed = tokens >= 1
+            self._buckets[key] = (tokens - 1 if allowed else tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+student_ids = LRUCache(settings.TRACKER_STUDENT_ID_CACHE_SIZE, settings.TRACKER_STUDENT_ID_CACHE_TTL)
+login_attempts = TokenBucketLimiter(settings.TRACKER_LOGIN_TRACKED_CLIENTS)
+
+
+def client_ip(request):
+    header = settings.TRACKER_CLIENT_IP_HEADER
+    if header and request.META.get(header):
+        # proxies append, so only the addresses added by our own proxies can be
+        # trusted: the client's is the one the outermost of them appended
+        addresses = [address.strip() for address in request.META[header].split(",")]
+        if len(addresses) >= settings.TRACKER_TRUSTED_PROXY_COUNT:
+            return addresses[-settings.TRACKER_TRUSTED_PROXY_COUNT]
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def allow_login(request):
+    return login_attempts.allow(client_ip(request), settings.TRACKER_LOGIN_RATE, settings.TRACKER_LOGIN_BURST)
+
+
+async def lookup_student_pk(student_id):
+    """pk of the student with this school ID, or None if there is none."""
+    pk = student_ids.get(student_id)
+    if pk is None:
+        pk = await Student.objects.filter(student_id=student_id).values_list("pk", flat=True).afirst()
+        if pk is not None:
+            student_ids.set(student_id, pk)
+    return pk
+
+
+def forget_student_ids(ids, using=None):
+    """Evict school IDs from the cache once the current transaction commits."""
+    ids = set(ids) - {None}
+    if ids:
+        transaction.on_commit(lambda: student_ids.discard(*ids), using=using)
@@ -0,0 +1,37 @@
+from datetime import datetime, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from tracker.archive import ARCHIVE_BATCH_SIZE, ARCHIVE_PAUSE, archive_cutoff, archive_violations
+
+
+class Command(BaseCommand):
+    help = "Move old violations to the archive table in small batches (meant to run after each academic year)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than-days",
+            type=int,
+            help="Archive violations older than this many days (default settings.TRACKER_ARCHIVE_AFTER_DAYS).",
+        )
+        parser.add_argument("--before", help="Archive violations recorded before this date (YYYY-MM-DD).")
+        parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE)
+        parser.add_argument("--pause", type=float, default=ARCHIVE_PAUSE, help="Seconds to wait between batches.")
+
+    def handle(self, *args, **options):
+        if options["before"]:
+            day = parse_date(options["before"])
+            if day is None:
+                raise CommandError("--before must be a date (YYYY-MM-DD).")
+            cutoff = timezone.make_aware(datetime.combine(day, time.min))
+        else:
+            cutoff = archive_cutoff(options["older_than_days"])
+        moved = archive_violations(
+            cutoff,
+            batch_size=max(options["batch_size"], 1),
+            pause=options["pause"],
+            progress=lambda total: self.stdout.write(f"{total} violations archived"),
+        )
+        self.stdout.write(self.style.SUCCESS(f"Archived {moved} violations recorded before {cutoff:%Y-%m-%d}."))
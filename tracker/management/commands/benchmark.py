@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from tracker.benchmarks import (
+    DATASET_SIZES, compare_to_baselines, load_baselines, run_benchmarks, save_baselines,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the tracker views against synthetic datasets in a throwaway test database "
+        "and fail when they regress past the stored baselines."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="small,medium", help=f"Comma separated, from {', '.join(DATASET_SIZES)}.")
+        parser.add_argument("--repeat", type=int, default=20, help="Requests per view.")
+        parser.add_argument("--tolerance", type=float, default=2.0, help="Allowed p95 slowdown factor.")
+        parser.add_argument("--update-baselines", action="store_true", help="Store these results as the new baselines.")
+
+    def handle(self, *args, **options):
+        sizes = [size.strip() for size in options["sizes"].split(",") if size.strip()]
+        unknown = set(sizes) - set(DATASET_SIZES)
+        if unknown:
+            raise CommandError(f"Unknown dataset sizes: {', '.join(sorted(unknown))}")
+
+        setup_test_environment(debug=False)
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            results = run_benchmarks(sizes, repeat=options["repeat"])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        for size, views in results.items():
+            self.stdout.write(f"{size}:")
+            for name, stats in views.items():
+                self.stdout.write(
+                    f"  {name:<24} p50 {stats['p50_ms']:>8.2f} ms  p95 {stats['p95_ms']:>8.2f} ms  "
+                    f"{stats['queries']:>3} queries"
+                )
+
+        if options["update_baselines"]:
+            save_baselines(results)
+            self.stdout.write(self.style.SUCCESS("Baselines updated."))
+            return
+        regressions = compare_to_baselines(results, load_baselines(), options["tolerance"])
+        if regressions:
+            raise CommandError("Performance regressions:\n" + "\n".join(regressions))
+        self.stdout.write(self.style.SUCCESS("No regressions against the stored baselines."))
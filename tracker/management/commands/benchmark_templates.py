@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from tracker.benchmarks import DATASET_SIZES, STUDENT_ROWS_RENDERED, run_template_benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Time rendering each template in tracker/templates/tracker/ with the context its page "
+        "passes, plus a long student list, on a synthetic dataset in a throwaway test database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--size", default="small", help=f"One of {', '.join(DATASET_SIZES)}.")
+        parser.add_argument("--repeat", type=int, default=20, help="Renders per template.")
+        parser.add_argument(
+            "--rows", type=int, default=STUDENT_ROWS_RENDERED, help="Rows in the student list render."
+        )
+
+    def handle(self, *args, **options):
+        if options["size"] not in DATASET_SIZES:
+            raise CommandError(f"Unknown dataset size: {options['size']}")
+
+        setup_test_environment(debug=False)
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            results = run_template_benchmark(options["size"], options["repeat"], options["rows"])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        for name, stats in results.items():
+            if stats is None:
+                self.stdout.write(f"{name:<44} not rendered by any benchmarked page")
+            else:
+                self.stdout.write(f"{name:<44} p50 {stats['p50_ms']:>8.2f} ms  p95 {stats['p95_ms']:>8.2f} ms")
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tracker.benchmarks import clear_dataset, generate_dataset
+
+
+class Command(BaseCommand):
+    help = "Fill the database with synthetic students and violations for load and performance testing."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--students-per-college", type=int, default=100)
+        parser.add_argument("--violations-per-student", type=int, default=1, help="Average violations per student.")
+        parser.add_argument("--days", type=int, default=365, help="Spread violations over this many past days.")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--clear", action="store_true", help="Delete all students and violations first.")
+
+    def handle(self, *args, **options):
+        if options["students_per_college"] < 1 or options["violations_per_student"] < 0:
+            raise CommandError("Need at least one student per college and a non-negative violation count.")
+        if options["clear"]:
+            clear_dataset()
+        students, violations = generate_dataset(
+            options["students_per_college"],
+            options["violations_per_student"],
+            seed=options["seed"],
+            days=options["days"],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Created {students} students and {violations} violations."))
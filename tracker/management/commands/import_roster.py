@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tracker.roster import BATCH_SIZE, import_roster
+
+
+class Command(BaseCommand):
+    help = "Create or update students from a CSV or XLSX roster file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Roster file (.csv or .xlsx) with a header row.")
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        try:
+            with open(path, "rb") as roster:
+                result = import_roster(roster, path, batch_size=options["batch_size"])
+        except (OSError, ValueError, UnicodeDecodeError) as exc:
+            raise CommandError(str(exc)) from exc
+
+        for line, message in result.errors:
+            self.stderr.write(f"line {line}: {message}")
+        if result.error_count > len(result.errors):
+            self.stderr.write(f"... and {result.error_count - len(result.errors)} more rejected rows")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Read {result.rows} rows: saved {result.saved} students, rejected {result.error_count}."
+            )
+        )
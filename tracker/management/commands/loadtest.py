@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from tracker.benchmarks import DATASET_SIZES, run_load_test
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay concurrent student logins and violation lookups through the WSGI and ASGI "
+        "handlers on the same synthetic dataset and compare their throughput."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--size", default="medium", help=f"One of {', '.join(DATASET_SIZES)}.")
+        parser.add_argument("--visits", type=int, default=500, help="Student visits (login plus violations page).")
+        parser.add_argument("--concurrency", type=int, default=50, help="Threads (WSGI) or tasks (ASGI) in flight.")
+
+    def handle(self, *args, **options):
+        if options["size"] not in DATASET_SIZES:
+            raise CommandError(f"Unknown dataset size: {options['size']}")
+
+        setup_test_environment(debug=False)
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            results = run_load_test(options["size"], options["visits"], options["concurrency"])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        for handler, stats in results.items():
+            self.stdout.write(
+                f"{handler}: {stats['visits_per_s']:>8.1f} visits/s  "
+                f"p50 {stats['p50_ms']:>8.2f} ms  p95 {stats['p95_ms']:>8.2f} ms"
+            )
@@ -0,0 +1,47 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tracker.startup import StartupFailed, profile_startup
+
+
+class Command(BaseCommand):
+    help = (
+        "Start fresh interpreters with the given settings modules and report where startup time goes: "
+        "Django setup, system checks, each app's import, models and ready(), and the slowest imports."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "settings_modules", nargs="*", metavar="settings_module",
+            help="Settings modules to compare (default: the current one).",
+        )
+        parser.add_argument("--limit", type=int, default=15, help="Slowest imports to list.")
+        parser.add_argument("--sort", choices=("self", "cumulative"), default="self", help="Order of the import list.")
+        parser.add_argument("--repeat", type=int, default=3, help="Starts per settings module; the fastest is reported.")
+        parser.add_argument("--no-checks", action="store_true", help="Leave the system checks out.")
+
+    def handle(self, *args, **options):
+        modules = options["settings_modules"] or [os.environ["DJANGO_SETTINGS_MODULE"]]
+        column = 1 if options["sort"] == "self" else 2
+        for module in modules:
+            try:
+                runs = [profile_startup(module, check=not options["no_checks"]) for _ in range(max(options["repeat"], 1))]
+            except StartupFailed as exc:
+                raise CommandError(str(exc)) from exc
+            profile = min(runs, key=lambda run: run["total_ms"])
+
+            self.stdout.write(
+                f"{module}: {profile['total_ms']:.0f} ms, {len(profile['modules'])} modules loaded "
+                f"(import django {profile['import_ms']:.0f} ms, setup {profile['setup_ms']:.0f} ms, "
+                f"checks {profile['checks_ms']:.0f} ms)"
+            )
+            self.stdout.write(f"  {'app':<24} {'import':>8} {'models':>8} {'ready':>8}")
+            for label, timings in profile["apps"].items():
+                self.stdout.write(
+                    f"  {label:<24} {timings['import_ms']:>5.1f} ms {timings.get('models_ms', 0):>5.1f} ms "
+                    f"{timings.get('ready_ms', 0):>5.1f} ms"
+                )
+            self.stdout.write(f"  {'module':<56} {'self':>10} {'cumulative':>12}")
+            for name, own, cumulative in sorted(profile["imports"], key=lambda row: -row[column])[:options["limit"]]:
+                self.stdout.write(f"  {name:<56} {own:>7.1f} ms {cumulative:>9.1f} ms")
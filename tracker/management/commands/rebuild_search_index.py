@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tracker import search
+
+
+class Command(BaseCommand):
+    help = "Repopulate the full-text search index of students and violations."
+
+    def handle(self, *args, **options):
+        if not search.is_available():
+            raise CommandError("The search index needs SQLite with FTS5; run migrate first.")
+        rows = search.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {rows} students and violations."))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from tracker.rules import recompute
+
+
+class Command(BaseCommand):
+    help = "Recompute the stored violation counters and noted flag of every student."
+
+    def handle(self, *args, **options):
+        updated = recompute()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt violation counters; {updated} students changed."))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from tracker.analytics import rebuild_rollups
+from tracker.history import rollup_counts
+
+
+class Command(BaseCommand):
+    help = "Recompute the per-college/per-level daily, weekly and monthly violation rollups used by the analytics pages."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--from-history",
+            action="store_true",
+            help="Start from the latest history snapshot and replay the events since, instead of scanning every violation.",
+        )
+
+    def handle(self, *args, **options):
+        rows = rebuild_rollups(rollup_counts() if options["from_history"] else None)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} violation rollup rows."))
@@ -0,0 +1,61 @@
+import os
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from tracker.jobs import STALE_AFTER, claim, heartbeat, requeue_stale, run
+
+
+def _run_in_thread(job):
+    try:
+        return run(job)
+    finally:
+        # connections are per thread; don't leave the pool's open
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs (imports, exports, rebuilds) on a pool of threads."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=2, help="Jobs run at the same time.")
+        parser.add_argument("--poll-interval", type=float, default=1.0, help="Seconds between checks for new jobs.")
+        parser.add_argument("--once", action="store_true", help="Exit once the queue is empty.")
+        parser.add_argument("--name", help="Worker name recorded on claimed jobs (default host:pid).")
+
+    def handle(self, *args, **options):
+        worker = options["name"] or f"{socket.gethostname()}:{os.getpid()}"
+        threads = max(options["threads"], 1)
+        self.stdout.write(f"Worker {worker} running with {threads} threads.")
+        running = set()
+        last_check = 0.0
+        with ThreadPoolExecutor(threads, thread_name_prefix="tracker-job") as pool:
+            try:
+                while True:
+                    for future in [future for future in running if future.done()]:
+                        running.discard(future)
+                        job = future.result()
+                        self.stdout.write(f"{job} finished")
+                    if time.monotonic() - last_check > STALE_AFTER / 10:
+                        last_check = time.monotonic()
+                        heartbeat(worker)
+                        requeued = requeue_stale()
+                        if requeued:
+                            self.stderr.write(f"Requeued {requeued} jobs of stopped workers.")
+                    claimed = False
+                    while len(running) < threads:
+                        job = claim(worker)
+                        if job is None:
+                            break
+                        claimed = True
+                        self.stdout.write(f"{job} started (attempt {job.attempts})")
+                        running.add(pool.submit(_run_in_thread, job))
+                    if options["once"] and not running and not claimed:
+                        break
+                    if not claimed:
+                        time.sleep(options["poll_interval"])
+            except KeyboardInterrupt:
+                self.stdout.write("Stopping; waiting for running jobs to finish.")
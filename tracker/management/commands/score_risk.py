@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tracker.risk import score_students
+
+
+class Command(BaseCommand):
+    help = "Recompute the repeat-offender risk score of every student (meant to run nightly)."
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            scored = score_students()
+        except ImportError as exc:
+            raise CommandError(str(exc)) from exc
+        self.stdout.write(
+            self.style.SUCCESS(f"Scored {scored} students with violations in {time.perf_counter() - start:.1f} s.")
+        )
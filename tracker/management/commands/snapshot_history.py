@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from tracker.history import prune, take_snapshot
+
+
+class Command(BaseCommand):
+    help = "Snapshot the violation history so point-in-time queries replay only newer events (meant to run nightly)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--keep",
+            type=int,
+            default=settings.TRACKER_HISTORY_SNAPSHOTS_KEPT,
+            help=(
+                "Keep only this many snapshots, dropping older ones and the events before the oldest kept "
+                "(default: TRACKER_HISTORY_SNAPSHOTS_KEPT); 0 keeps them all."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        snapshot = take_snapshot()
+        self.stdout.write(self.style.SUCCESS(f"{snapshot} taken."))
+        if options["keep"]:
+            snapshots, events = prune(options["keep"])
+            self.stdout.write(f"Dropped {snapshots} old snapshots and {events} events.")
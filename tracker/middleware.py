@@ -0,0 +1,178 @@
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template.base import Template
+
+
+logger = logging.getLogger("tracker.performance")
+
+SAMPLES_PER_VIEW = 500
+PERCENTILES = (50, 90, 99)
+
+
+class RequestStats:
+    __slots__ = ("queries", "sql_time", "template_time", "template_depth")
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+
+
+_current_stats = ContextVar("tracker_request_stats", default=None)
+
+
+def _time_query(execute, sql, params, many, context):
+    stats = _current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.sql_time += time.perf_counter() - start
+
+
+def _install_query_timer(sender=None, connection=None, **kwargs):
+    if _time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_time_query)
+
+
+def _install_template_timer():
+    original_render = Template.render
+    if getattr(original_render, "tracker_timed", False):
+        return
+
+    def render(self, context):
+        stats = _current_stats.get()
+        # only the outermost template is timed; includes are part of it
+        if stats is None or stats.template_depth:
+            return original_render(self, context)
+        stats.template_depth += 1
+        start = time.perf_counter()
+        try:
+            return original_render(self, context)
+        finally:
+            stats.template_depth -= 1
+            stats.template_time += time.perf_counter() - start
+
+    render.tracker_timed = True
+    Template.render = render
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, round(pct / 100 * (len(sorted_values) - 1)))
+    return sorted_values[index]
+
+
+class TimingAggregator:
+    """Rolling window of request timings per URL name."""
+
+    def __init__(self, window=SAMPLES_PER_VIEW):
+        self._samples = defaultdict(lambda: deque(maxlen=window))
+        self._lock = threading.Lock()
+
+    def record(self, name, wall_ms, sql_ms, template_ms, queries):
+        with self._lock:
+            self._samples[name].append((wall_ms, sql_ms, template_ms, queries))
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+
+    def summary(self):
+        with self._lock:
+            snapshot = {name: list(samples) for name, samples in self._samples.items()}
+        rows = []
+        for name, samples in sorted(snapshot.items()):
+            wall = sorted(sample[0] for sample in samples)
+            rows.append({
+                "name": name,
+                "count": len(samples),
+                "percentiles": [percentile(wall, pct) for pct in PERCENTILES],
+                "sql_ms": sum(sample[1] for sample in samples) / len(samples),
+                "template_ms": sum(sample[2] for sample in samples) / len(samples),
+                "queries": sum(sample[3] for sample in samples) / len(samples),
+            })
+        return rows
+
+
+timings = TimingAggregator()
+
+
+class QueryTimingMiddleware:
+    """Opt-in per-request instrumentation, enabled by settings.TRACKER_PROFILING.
+
+    Adds a Server-Timing header (SQL, template and total time plus the query
+    count), logs requests slower than TRACKER_SLOW_REQUEST_MS and feeds the
+    per-view percentiles shown on the profiling page. When disabled the
+    middleware removes itself from the stack.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, "TRACKER_PROFILING", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.slow_request_ms = getattr(settings, "TRACKER_SLOW_REQUEST_MS", 500)
+        connection_created.connect(_install_query_timer, dispatch_uid="tracker_query_timer")
+        for connection in connections.all(initialized_only=True):
+            _install_query_timer(connection=connection)
+        _install_template_timer()
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = _current_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_stats.reset(token)
+        self.finish(request, response, stats, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = _current_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_stats.reset(token)
+        self.finish(request, response, stats, time.perf_counter() - start)
+        return response
+
+    def finish(self, request, response, stats, elapsed):
+        wall_ms = elapsed * 1000
+        sql_ms = stats.sql_time * 1000
+        template_ms = stats.template_time * 1000
+        response["Server-Timing"] = (
+            f'db;dur={sql_ms:.1f};desc="{stats.queries} queries", '
+            f"tpl;dur={template_ms:.1f}, total;dur={wall_ms:.1f}"
+        )
+        match = getattr(request, "resolver_match", None)
+        if match is not None and match.view_name:
+            timings.record(match.view_name, wall_ms, sql_ms, template_ms, stats.queries)
+        if wall_ms >= self.slow_request_ms:
+            logger.warning(
+                "Slow request %s %s: %.0f ms, %d queries (%.0f ms SQL, %.0f ms templates)",
+                request.method, request.path, wall_ms, stats.queries, sql_ms, template_ms,
+            )
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.6 on 2026-10-17 23:43
+
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.db.models.lookups import GreaterThanOrEqual
+
+
+def backfill_counters(apps, schema_editor):
+    Student = apps.get_model("tracker", "Student")
+    Violation = apps.get_model("tracker", "Violation")
+    violations = Violation.objects.filter(student=OuterRef("pk")).order_by().values("student")
+    count = Coalesce(Subquery(violations.annotate(n=Count("pk")).values("n")), 0)
+    highest = Coalesce(Subquery(violations.annotate(m=Max("level")).values("m")), 0)
+    Student.objects.update(
+        violation_count=count,
+        highest_level=highest,
+        noted=GreaterThanOrEqual(count, 3),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tracker", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="student",
+            name="highest_level",
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="student",
+            name="violation_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
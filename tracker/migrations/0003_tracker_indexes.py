@@ -0,0 +1,29 @@
+# Generated by Django 5.2.6 on 2026-10-17 23:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tracker", "0002_student_violation_counters"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="student",
+            index=models.Index(fields=["college", "last_name", "first_name"], name="student_college_name_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="student",
+            index=models.Index(fields=["last_name", "first_name"], name="student_name_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="violation",
+            index=models.Index(fields=["student", "occurred_at"], name="violation_student_time_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="violation",
+            index=models.Index(fields=["occurred_at"], name="violation_time_idx"),
+        ),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 5.2.6 on 2026-10-17 23:46
+
+from collections import Counter
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+
+def backfill_rollups(apps, schema_editor):
+    Violation = apps.get_model("tracker", "Violation")
+    ViolationRollup = apps.get_model("tracker", "ViolationRollup")
+    rows = (
+        Violation.objects.order_by()
+        .annotate(day=TruncDate("occurred_at"))
+        .values("student__college", "level", "day")
+        .annotate(count=Count("pk"))
+    )
+    counts = Counter()
+    for row in rows:
+        counts[(row["student__college"] or "", row["level"], row["day"])] += row["count"]
+    ViolationRollup.objects.bulk_create(
+        [
+            ViolationRollup(college=college, level=level, day=day, count=count)
+            for (college, level, day), count in counts.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tracker", "0003_tracker_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ViolationRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("college", models.CharField(blank=True, default="", max_length=100)),
+                (
+                    "level",
+                    models.PositiveSmallIntegerField(
+                        choices=[
+                            (1, "First Offense"),
+                            (2, "Second Offense"),
+                            (3, "Third Offense"),
+                        ]
+                    ),
+                ),
+                ("day", models.DateField()),
+                ("count", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("college", "level", "day"),
+                        name="unique_violation_rollup",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,61 @@
+from django.db import migrations
+from django.db.utils import OperationalError
+
+
+CHUNK_SIZE = 2000
+
+
+def create_search_table(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    try:
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE tracker_search USING fts5("
+            "kind UNINDEXED, object_id UNINDEXED, student, body, prefix='2 3')"
+        )
+    except OperationalError:
+        # SQLite built without FTS5; search falls back to LIKE queries
+        return
+
+    Student = apps.get_model("tracker", "Student")
+    Violation = apps.get_model("tracker", "Violation")
+
+    def student_text(student):
+        parts = [student.student_id, student.first_name, student.last_name, student.course_year_section, student.college]
+        return " ".join(filter(None, parts))
+
+    students = (
+        (s.pk * 2, "student", s.pk, student_text(s), "")
+        for s in Student.objects.iterator(chunk_size=CHUNK_SIZE)
+    )
+    violations = (
+        (v.pk * 2 + 1, "violation", v.pk, student_text(v.student), v.offense)
+        for v in Violation.objects.select_related("student").iterator(chunk_size=CHUNK_SIZE)
+    )
+    sql = "INSERT INTO tracker_search (rowid, kind, object_id, student, body) VALUES (%s, %s, %s, %s, %s)"
+    with schema_editor.connection.cursor() as cursor:
+        # in chunks, so the whole index is never held in memory
+        for rows in (students, violations):
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= CHUNK_SIZE:
+                    cursor.executemany(sql, batch)
+                    batch = []
+            cursor.executemany(sql, batch)
+
+
+def drop_search_table(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        schema_editor.execute("DROP TABLE IF EXISTS tracker_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tracker", "0004_violation_rollup"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_table, drop_search_table),
+    ]
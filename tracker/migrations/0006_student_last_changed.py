@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-17 23:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tracker", "0005_search_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="student",
+            name="last_changed",
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations
+from django.db.models import BooleanField, ExpressionWrapper, Q
+
+
+def renote_students(apps, schema_editor):
+    # noted now also covers any level 3 offense, not only NOTED_THRESHOLD violations
+    Student = apps.get_model("tracker", "Student")
+    Student.objects.update(
+        noted=ExpressionWrapper(Q(violation_count__gte=3) | Q(highest_level__gte=3), output_field=BooleanField())
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tracker", "0006_student_last_changed"),
+    ]
+
+    operations = [
+        migrations.RunPython(renote_students, migrations.RunPython.noop),
+    ]
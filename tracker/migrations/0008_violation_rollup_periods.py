@@ -0,0 +1,59 @@
+# Generated by Django 5.2.6 on 2026-10-18 00:12
+
+from django.db import migrations, models
+from django.db.models import Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+
+
+def backfill_periods(apps, schema_editor):
+    ViolationRollup = apps.get_model("tracker", "ViolationRollup")
+    days = ViolationRollup.objects.filter(period="day").order_by()
+    for period, trunc in (("week", TruncWeek), ("month", TruncMonth)):
+        rows = days.annotate(start=trunc("day")).values("start", "college", "level").annotate(total=Sum("count"))
+        ViolationRollup.objects.bulk_create(
+            [
+                ViolationRollup(
+                    period=period, college=row["college"], level=row["level"], day=row["start"], count=row["total"]
+                )
+                for row in rows
+            ],
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tracker", "0007_noted_by_level"),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name="violationrollup",
+            name="unique_violation_rollup",
+        ),
+        migrations.AddField(
+            model_name="violationrollup",
+            name="period",
+            field=models.CharField(
+                choices=[("day", "Day"), ("week", "Week"), ("month", "Month")],
+                default="day",
+                max_length=5,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="violationrollup",
+            index=models.Index(
+                fields=["period", "day", "college", "level", "count"],
+                name="violation_rollup_period_idx",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="violationrollup",
+            constraint=models.UniqueConstraint(
+                fields=("period", "college", "level", "day"),
+                name="unique_violation_rollup",
+            ),
+        ),
+        migrations.RunPython(backfill_periods, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.6 on 2026-10-18 00:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tracker", "0008_violation_rollup_periods"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="student",
+            name="escalation_velocity",
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="student",
+            name="risk_score",
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="student",
+            name="risk_scored_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="student",
+            index=models.Index(fields=["-risk_score"], name="student_risk_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="student",
+            index=models.Index(fields=["college", "-risk_score"], name="student_college_risk_idx"),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-18 00:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tracker", "0010_job"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="student",
+            index=models.Index(fields=["-violation_count"], name="student_violation_count_idx"),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-18 00:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tracker", "0011_student_violation_count_index"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="student",
+            index=models.Index(fields=["last_changed"], name="student_changed_idx"),
+        ),
+    ]
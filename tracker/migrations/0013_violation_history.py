@@ -0,0 +1,150 @@
+# Generated by Django 5.2.6 on 2026-10-18 00:21
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def take_first_snapshot(apps, schema_editor):
+    """History starts with a snapshot of the violations that already exist."""
+    HistorySnapshot = apps.get_model("tracker", "HistorySnapshot")
+    SnapshotRollup = apps.get_model("tracker", "SnapshotRollup")
+    SnapshotViolation = apps.get_model("tracker", "SnapshotViolation")
+    Violation = apps.get_model("tracker", "Violation")
+    ViolationRollup = apps.get_model("tracker", "ViolationRollup")
+
+    snapshot = HistorySnapshot.objects.create(last_event=0)
+    rows = Violation.objects.order_by().values_list(
+        "pk", "student_id", "student__college", "offense", "level", "occurred_at"
+    )
+    SnapshotViolation.objects.bulk_create(
+        (
+            SnapshotViolation(
+                snapshot=snapshot,
+                violation_id=violation_id,
+                student_pk=student_pk,
+                college=college or "",
+                offense=offense,
+                level=level,
+                occurred_at=occurred_at,
+            )
+            for violation_id, student_pk, college, offense, level, occurred_at in rows.iterator(chunk_size=2000)
+        ),
+        batch_size=2000,
+    )
+    SnapshotRollup.objects.bulk_create(
+        (
+            SnapshotRollup(snapshot=snapshot, college=college, level=level, day=day, count=count)
+            for college, level, day, count in ViolationRollup.objects.filter(period="day").values_list(
+                "college", "level", "day", "count"
+            )
+        ),
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tracker", "0012_student_changed_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="HistorySnapshot",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("taken_at", models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ("last_event", models.BigIntegerField(default=0)),
+            ],
+            options={
+                "ordering": ["-taken_at"],
+            },
+        ),
+        migrations.CreateModel(
+            name="SnapshotRollup",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("college", models.CharField(blank=True, default="", max_length=100)),
+                (
+                    "level",
+                    models.PositiveSmallIntegerField(
+                        choices=[(1, "First Offense"), (2, "Second Offense"), (3, "Third Offense")]
+                    ),
+                ),
+                ("day", models.DateField()),
+                ("count", models.PositiveIntegerField()),
+                (
+                    "snapshot",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="rollups",
+                        to="tracker.historysnapshot",
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="ViolationEvent",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("created", "Created"),
+                            ("updated", "Updated"),
+                            ("deleted", "Deleted"),
+                            ("moved", "Student changed college"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("delta", models.SmallIntegerField()),
+                ("violation_id", models.BigIntegerField()),
+                ("student_pk", models.BigIntegerField()),
+                ("college", models.CharField(blank=True, default="", max_length=100)),
+                ("offense", models.CharField(max_length=255)),
+                (
+                    "level",
+                    models.PositiveSmallIntegerField(
+                        choices=[(1, "First Offense"), (2, "Second Offense"), (3, "Third Offense")]
+                    ),
+                ),
+                ("occurred_at", models.DateTimeField()),
+                ("recorded_at", models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                "indexes": [models.Index(fields=["student_pk", "id"], name="violation_event_student_idx")],
+            },
+        ),
+        migrations.CreateModel(
+            name="SnapshotViolation",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("violation_id", models.BigIntegerField()),
+                ("student_pk", models.BigIntegerField()),
+                ("college", models.CharField(blank=True, default="", max_length=100)),
+                ("offense", models.CharField(max_length=255)),
+                (
+                    "level",
+                    models.PositiveSmallIntegerField(
+                        choices=[(1, "First Offense"), (2, "Second Offense"), (3, "Third Offense")]
+                    ),
+                ),
+                ("occurred_at", models.DateTimeField()),
+                (
+                    "snapshot",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="violations",
+                        to="tracker.historysnapshot",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [models.Index(fields=["snapshot", "student_pk"], name="snapshot_violation_student_idx")],
+            },
+        ),
+        migrations.RunPython(take_first_snapshot, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.6 on 2026-10-18 00:24
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tracker", "0013_violation_history"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedViolation",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                ("offense", models.CharField(max_length=255)),
+                (
+                    "level",
+                    models.PositiveSmallIntegerField(
+                        choices=[(1, "First Offense"), (2, "Second Offense"), (3, "Third Offense")]
+                    ),
+                ),
+                ("occurred_at", models.DateTimeField()),
+                ("archived_at", models.DateTimeField(default=django.utils.timezone.now)),
+                (
+                    "student",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="archived_violations",
+                        to="tracker.student",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-occurred_at"],
+                "indexes": [models.Index(fields=["student", "occurred_at"], name="archived_student_time_idx")],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.6 on 2026-10-18 00:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tracker", "0014_archived_violation"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DataVersion",
+            fields=[
+                ("name", models.CharField(max_length=100, primary_key=True, serialize=False)),
+                ("version", models.BigIntegerField()),
+                ("changed_at", models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 00:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tracker", "0015_data_version"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="historysnapshot",
+            name="complete",
+            field=models.BooleanField(default=True),
+        ),
+    ]
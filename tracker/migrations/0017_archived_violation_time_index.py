@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-18 00:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tracker", "0016_history_snapshot_complete"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="archivedviolation",
+            index=models.Index(fields=["occurred_at"], name="archived_time_idx"),
+        ),
+    ]
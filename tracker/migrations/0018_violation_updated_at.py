@@ -0,0 +1,34 @@
+from django.db import migrations, models
+from django.db.models import F
+from django.utils import timezone
+
+
+def start_at_occurred_at(apps, schema_editor):
+    # the sync feed used to go by occurred_at; existing violations keep that position
+    Violation = apps.get_model("tracker", "Violation")
+    Violation.objects.update(updated_at=F("occurred_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tracker", "0017_archived_violation_time_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="violation",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, default=timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(start_at_occurred_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="violation",
+            index=models.Index(fields=["updated_at"], name="violation_updated_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="violationevent",
+            index=models.Index(fields=["kind", "recorded_at"], name="violation_event_kind_idx"),
+        ),
+    ]
@@ -0,0 +1,46 @@
+from django.core.files.base import ContentFile
+from django.core.files.storage import storages
+from django.db import migrations, models
+
+
+def move_blobs_to_storage(apps, schema_editor):
+    # jobs used to carry their input and output in the row itself
+    Job = apps.get_model("tracker", "Job")
+    files = storages["tracker_jobs"]
+    for job in Job.objects.exclude(data=None, output=None).iterator():
+        if job.data is not None:
+            name = files.generate_filename(f"input/{job.payload.get('filename') or job.pk}")
+            job.input_file = files.save(name, ContentFile(bytes(job.data)))
+        if job.output is not None:
+            name = f"output/{job.pk}/{job.output_name or 'output.csv'}"
+            job.output_file = files.save(name, ContentFile(bytes(job.output)))
+        job.save(update_fields=["input_file", "output_file"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tracker", "0018_violation_updated_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="job",
+            name="input_file",
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name="job",
+            name="output_file",
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.RunPython(move_blobs_to_storage, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name="job",
+            name="data",
+        ),
+        migrations.RemoveField(
+            model_name="job",
+            name="output",
+        ),
+    ]
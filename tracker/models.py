@@ -1,10 +1,31 @@
-from django.db import models
-from django.db.models.signals import post_save, post_delete
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models.signals import post_save, post_delete, pre_delete
 from django.dispatch import receiver
+from django.core.files.storage import storages
 from django.core.validators import RegexValidator
+from django.utils import timezone
 
 
-class Student(models.Model):
+class LoadedValuesMixin:
+    """Remembers the column values an instance was loaded with, so that signal
+    receivers can tell what a save actually changed."""
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def loaded_value(self, attname, default=None):
+        value = getattr(self, "_loaded_values", {}).get(attname, default)
+        return default if value is models.DEFERRED else value
+
+    def remember_loaded_values(self):
+        self._loaded_values = {field.attname: getattr(self, field.attname) for field in self._meta.concrete_fields}
+
+
+class Student(LoadedValuesMixin, models.Model):
     student_id = models.CharField(
         max_length=8,
         unique=True,
@@ -30,14 +51,34 @@ class Student(models.Model):
 
     noted = models.BooleanField(default=False)
 
+    # Denormalized from Violation; maintained by the signals below and by
+    # the rebuild_violation_counters management command.
+    violation_count = models.PositiveIntegerField(default=0, editable=False)
+    highest_level = models.PositiveSmallIntegerField(default=0, editable=False)
+    # Bumped whenever the student or their violations change; drives the
+    # ETag/Last-Modified headers of the student pages.
+    last_changed = models.DateTimeField(auto_now=True)
+    # Written by tracker.risk (the score_risk management command).
+    risk_score = models.FloatField(default=0, editable=False)
+    escalation_velocity = models.FloatField(default=0, editable=False)
+    risk_scored_at = models.DateTimeField(null=True, blank=True, editable=False)
+
     class Meta:
         ordering = ["last_name", "first_name"]
+        indexes = [
+            models.Index(fields=["college", "last_name", "first_name"], name="student_college_name_idx"),
+            models.Index(fields=["last_name", "first_name"], name="student_name_idx"),
+            models.Index(fields=["-risk_score"], name="student_risk_idx"),
+            models.Index(fields=["college", "-risk_score"], name="student_college_risk_idx"),
+            models.Index(fields=["-violation_count"], name="student_violation_count_idx"),
+            models.Index(fields=["last_changed"], name="student_changed_idx"),
+        ]
 
     def __str__(self):
         return f"{self.student_id} - {self.last_name}, {self.first_name}"
 
 
-class Violation(models.Model):
+class Violation(LoadedValuesMixin, models.Model):
     OFFENSE_LEVELS = [
         (1, "First Offense"),
         (2, "Second Offense"),
@@ -52,30 +93,324 @@ class Violation(models.Model):
     )
     level = models.PositiveSmallIntegerField(choices=OFFENSE_LEVELS, default=1)
     occurred_at = models.DateTimeField(auto_now_add=True)
+    # for the API's incremental sync; queryset updates do not touch it
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["-occurred_at"]
+        indexes = [
+            models.Index(fields=["student", "occurred_at"], name="violation_student_time_idx"),
+            models.Index(fields=["occurred_at"], name="violation_time_idx"),
+            models.Index(fields=["updated_at"], name="violation_updated_idx"),
+        ]
 
     def __str__(self):
         return f"{self.student.student_id} - {self.offense} ({self.get_level_display()})"
 
 
-def _update_noted_status(student: Student):
-    """Helper: mark student.noted True if they have 3 or more violations, else False."""
-    count = student.violations.count()
-    should_be_noted = count >= 3
-    if student.noted != should_be_noted:
-        student.noted = should_be_noted
-        student.save(update_fields=["noted"])
+class ArchivedViolation(models.Model):
+    """A violation moved out of Violation by tracker.archive, under its original id.
+    Archived violations still count towards the student's counters and the
+    rollups; they are only kept out of the queries over recent violations."""
+
+    id = models.BigIntegerField(primary_key=True)
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name="archived_violations")
+    offense = models.CharField(max_length=255)
+    level = models.PositiveSmallIntegerField(choices=Violation.OFFENSE_LEVELS)
+    occurred_at = models.DateTimeField()
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["-occurred_at"]
+        indexes = [
+            models.Index(fields=["student", "occurred_at"], name="archived_student_time_idx"),
+            models.Index(fields=["occurred_at"], name="archived_time_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.student.student_id} - {self.offense} ({self.get_level_display()}, archived)"
+
+
+class ViolationRollup(models.Model):
+    """Number of violations per college, level and day, week or month, kept in
+    step with Violation by the signals below so analytics never scan Violation.
+    `day` is the first day of the period."""
+
+    PERIODS = [
+        ("day", "Day"),
+        ("week", "Week"),
+        ("month", "Month"),
+    ]
+
+    period = models.CharField(max_length=5, choices=PERIODS, default="day")
+    college = models.CharField(max_length=100, blank=True, default="")
+    level = models.PositiveSmallIntegerField(choices=Violation.OFFENSE_LEVELS)
+    day = models.DateField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["period", "college", "level", "day"], name="unique_violation_rollup"),
+        ]
+        indexes = [
+            # date range scans for the trends view, answered from the index alone
+            models.Index(fields=["period", "day", "college", "level", "count"], name="violation_rollup_period_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.college or 'Unspecified'} {self.period} of {self.day} level {self.level}: {self.count}"
+
+
+class DataVersion(models.Model):
+    """Version of a set of cached data, bumped when the data changes. Kept in the
+    database so every process sees the change (see tracker.versions)."""
+
+    name = models.CharField(max_length=100, primary_key=True)
+    version = models.BigIntegerField()
+    changed_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.name} v{self.version}"
+
+
+class ViolationEvent(models.Model):
+    """One entry of the append-only violation history (see tracker.history).
+
+    Every change is recorded as the violation states it adds (+1) or removes
+    (-1): an edit removes the old state and adds the new one, so summing
+    `delta` over any range of events gives the net change. Students and
+    violations are referenced by id only, as they may be deleted since."""
+
+    CREATED = "created"
+    UPDATED = "updated"
+    DELETED = "deleted"
+    MOVED = "moved"
+    KINDS = [
+        (CREATED, "Created"),
+        (UPDATED, "Updated"),
+        (DELETED, "Deleted"),
+        (MOVED, "Student changed college"),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KINDS)
+    delta = models.SmallIntegerField()
+    violation_id = models.BigIntegerField()
+    student_pk = models.BigIntegerField()
+    college = models.CharField(max_length=100, blank=True, default="")
+    offense = models.CharField(max_length=255)
+    level = models.PositiveSmallIntegerField(choices=Violation.OFFENSE_LEVELS)
+    occurred_at = models.DateTimeField()
+    recorded_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["student_pk", "id"], name="violation_event_student_idx"),
+            models.Index(fields=["kind", "recorded_at"], name="violation_event_kind_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} violation {self.violation_id} ({self.delta:+d})"
+
+
+class HistorySnapshot(models.Model):
+    """The live violations and their daily rollup counts as of `last_event`.
+    Incomplete while tracker.history is still copying them."""
+
+    taken_at = models.DateTimeField(default=timezone.now, db_index=True)
+    last_event = models.BigIntegerField(default=0)
+    complete = models.BooleanField(default=True)
+
+    class Meta:
+        ordering = ["-taken_at"]
+
+    def __str__(self):
+        return f"Snapshot {self.pk} at {self.taken_at:%Y-%m-%d %H:%M} (event {self.last_event})"
+
+
+class SnapshotViolation(models.Model):
+    snapshot = models.ForeignKey(HistorySnapshot, on_delete=models.CASCADE, related_name="violations")
+    violation_id = models.BigIntegerField()
+    student_pk = models.BigIntegerField()
+    college = models.CharField(max_length=100, blank=True, default="")
+    offense = models.CharField(max_length=255)
+    level = models.PositiveSmallIntegerField(choices=Violation.OFFENSE_LEVELS)
+    occurred_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["snapshot", "student_pk"], name="snapshot_violation_student_idx"),
+        ]
+
+
+class SnapshotRollup(models.Model):
+    snapshot = models.ForeignKey(HistorySnapshot, on_delete=models.CASCADE, related_name="rollups")
+    college = models.CharField(max_length=100, blank=True, default="")
+    level = models.PositiveSmallIntegerField(choices=Violation.OFFENSE_LEVELS)
+    day = models.DateField()
+    count = models.PositiveIntegerField()
+
+
+class Job(models.Model):
+    """A unit of background work, run by the runworker command (see tracker.jobs)."""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    STATUSES = [
+        (QUEUED, "Queued"),
+        (RUNNING, "Running"),
+        (SUCCEEDED, "Succeeded"),
+        (FAILED, "Failed"),
+    ]
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    # names in the tracker_jobs storage of an uploaded input file and of the
+    # file the job produced; output_name is what the download is called
+    input_file = models.CharField(max_length=255, blank=True, editable=False)
+    output_file = models.CharField(max_length=255, blank=True, editable=False)
+    output_name = models.CharField(max_length=200, blank=True)
+
+    status = models.CharField(max_length=10, choices=STATUSES, default=QUEUED)
+    progress = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(null=True, blank=True)
+    message = models.CharField(max_length=255, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL)
+    created_at = models.DateTimeField(auto_now_add=True)
+    run_after = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    worker = models.CharField(max_length=100, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["status", "run_after"], name="job_queue_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
+
+    @property
+    def finished(self):
+        return self.status in (self.SUCCEEDED, self.FAILED)
+
+    def report_progress(self, progress, total=None, message=""):
+        """Record how far a running job got; also serves as the worker's heartbeat."""
+        self.progress, self.total, self.message = progress, total, message[:255]
+        Job.objects.filter(pk=self.pk).update(
+            progress=self.progress, total=total, message=self.message, heartbeat_at=timezone.now()
+        )
+
+    def store_output(self, name, content):
+        """Save the File `content` (read in chunks) as the job's output, downloaded as `name`."""
+        self.output_name = name
+        self.output_file = job_files().save(f"output/{self.pk}/{name}", content)
+        Job.objects.filter(pk=self.pk).update(output_name=name, output_file=self.output_file)
+
+
+def job_files():
+    """The storage holding the files of background jobs."""
+    return storages["tracker_jobs"]
+
+
+@receiver(post_delete, sender=Job)
+def on_job_deleted(sender, instance: Job, **kwargs):
+    names = [name for name in (instance.input_file, instance.output_file) if name]
+
+    # only once the row is really gone
+    def delete_files():
+        for name in names:
+            job_files().delete(name)
+
+    if names:
+        transaction.on_commit(delete_files, using=kwargs["using"])
+
+
+SEARCHABLE_STUDENT_FIELDS = ("student_id", "first_name", "last_name", "course_year_section", "college")
+
+
+@receiver(post_save, sender=Student)
+def on_student_saved(sender, instance: Student, created, **kwargs):
+    from . import analytics, fragments, history, logins, search
+
+    logins.forget_student_ids({instance.loaded_value("student_id"), instance.student_id}, using=kwargs["using"])
+    previous_college = instance.loaded_value("college")
+    if not created and (previous_college or "") != (instance.college or ""):
+        analytics.move_student_rollups(instance.pk, previous_college, instance.college)
+        history.record_student_moved(instance.pk, previous_college, instance.college)
+    fragments.invalidate_colleges({previous_college, instance.college})
+    search.index_students([instance])
+    if not created and any(
+        instance.loaded_value(field) != getattr(instance, field) for field in SEARCHABLE_STUDENT_FIELDS
+    ):
+        search.index_violations(instance.violations.select_related("student"))
+    instance.remember_loaded_values()
+
+
+@receiver(pre_delete, sender=Student)
+def on_student_deleting(sender, instance: Student, **kwargs):
+    from . import cascades
+
+    # its violations are deleted first; their side effects are written in bulk below
+    cascades.begin(instance, kwargs["using"])
+
+
+@receiver(post_delete, sender=Student)
+def on_student_deleted(sender, instance: Student, **kwargs):
+    from . import cascades, fragments, logins, search
+
+    cascades.finish(instance, kwargs["using"])
+    logins.forget_student_ids({instance.student_id}, using=kwargs["using"])
+    fragments.invalidate_colleges({instance.college})
+    search.remove(search.STUDENT, instance.pk)
+
+
+@receiver(post_delete, sender=ArchivedViolation)
+def on_archived_violation_deleted(sender, instance: ArchivedViolation, **kwargs):
+    from . import analytics, cascades, history, rules
+
+    # archived violations still count, so their removal is a deletion like any other
+    rules.schedule({instance.student_id}, using=kwargs["using"])
+    if cascades.collect(instance, kwargs["using"]):
+        return
+    analytics.record_violation_deleted(instance)
+    history.record_violation_deleted(instance)
 
 
 @receiver(post_save, sender=Violation)
 def on_violation_saved(sender, instance: Violation, created, **kwargs):
-    # whenever a violation is created or updated, recalculate noted
-    _update_noted_status(instance.student)
+    from . import analytics, fragments, history, rules, search
+
+    # whenever a violation is created or updated, recalculate counters and noted
+    previous_student_id = instance.loaded_value("student_id")
+    rules.schedule({instance.student_id, previous_student_id}, using=kwargs["using"])
+    if previous_student_id not in (None, instance.student_id):
+        fragments.invalidate_all()
+    else:
+        fragments.invalidate_colleges({instance.student.college})
+    analytics.record_violation_saved(instance, created)
+    history.record_violation_saved(instance, created)
+    search.index_violations([instance])
+    instance.remember_loaded_values()
 
 
 @receiver(post_delete, sender=Violation)
 def on_violation_deleted(sender, instance: Violation, **kwargs):
-    # when a violation is removed, recalculate noted
-    _update_noted_status(instance.student)
+    from . import analytics, cascades, fragments, history, rules, search
+
+    # when a violation is removed, recalculate counters and noted
+    rules.schedule({instance.student_id}, using=kwargs["using"])
+    if cascades.collect(instance, kwargs["using"]):
+        return
+    analytics.record_violation_deleted(instance)
+    history.record_violation_deleted(instance)
+    fragments.invalidate_colleges({instance.student.college})
+    search.remove(search.VIOLATION, instance.pk)
@@ -0,0 +1,101 @@
+import base64
+import binascii
+import json
+from datetime import date, datetime
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+
+
+PAGE_SIZE = 50
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _json_default(value):
+    # full precision: DjangoJSONEncoder would cut datetimes to milliseconds
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def encode_cursor(values):
+    raw = json.dumps(list(values), separators=(",", ":"), default=_json_default).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        values = json.loads(raw)
+    except (binascii.Error, ValueError) as exc:
+        raise InvalidCursor("Malformed cursor.") from exc
+    if not isinstance(values, list):
+        raise InvalidCursor("Malformed cursor.")
+    return values
+
+
+def _field_name(field):
+    return field.lstrip("-")
+
+
+def _cursor_values(model, ordering, values):
+    """The cursor values converted to the ordering fields' types; a tampered
+    cursor fails here rather than in the query."""
+    if len(values) != len(ordering):
+        raise InvalidCursor("Cursor does not match the ordering.")
+    converted = []
+    for field, value in zip(ordering, values):
+        name = _field_name(field)
+        try:
+            model_field = model._meta.pk if name == "pk" else model._meta.get_field(name)
+        except FieldDoesNotExist:
+            raise InvalidCursor("Cursor does not match the ordering.") from None
+        try:
+            value = model_field.to_python(value)
+        except (TypeError, ValueError, ValidationError) as exc:
+            raise InvalidCursor("Malformed cursor.") from exc
+        if value is None:
+            raise InvalidCursor("Malformed cursor.")
+        converted.append(value)
+    return converted
+
+
+def keyset_filter(ordering, values):
+    """Q selecting rows strictly after `values` for an `ordering` tuple, where
+    fields prefixed with "-" are descending."""
+    if len(values) != len(ordering):
+        raise InvalidCursor("Cursor does not match the ordering.")
+    condition = Q()
+    for i, field in enumerate(ordering):
+        lookup = "lt" if field.startswith("-") else "gt"
+        branch = Q(**{f"{_field_name(field)}__{lookup}": values[i]})
+        for previous, value in zip(ordering[:i], values[:i]):
+            branch &= Q(**{_field_name(previous): value})
+        condition |= branch
+    return condition
+
+
+def keyset_page(queryset, ordering, cursor=None, page_size=PAGE_SIZE):
+    """Return (rows, next_cursor) for one page of `queryset` ordered by `ordering`.
+
+    `ordering` must be non-nullable and end with a unique field (usually "pk")
+    so that every row has a distinct position. The queryset may yield dicts
+    (from .values()) as long as they include the ordering fields.
+    """
+    values = decode_cursor(cursor)
+    if values is not None:
+        queryset = queryset.filter(keyset_filter(ordering, _cursor_values(queryset.model, ordering, values)))
+    rows = list(queryset.order_by(*ordering)[: page_size + 1])
+    if len(rows) <= page_size:
+        return rows, None
+    rows = rows[:page_size]
+    last = rows[-1]
+    names = [_field_name(field) for field in ordering]
+    if isinstance(last, dict):
+        return rows, encode_cursor(last[name] for name in names)
+    return rows, encode_cursor(getattr(last, name) for name in names)
@@ -0,0 +1,50 @@
+"""Work collected while a transaction runs and done once when it commits.
+
+Receivers that fire many times in one transaction (a cascade, a bulk delete)
+add to a single ``Pending`` object per class instead of queuing a callback
+each. ``current()`` keeps these objects in a registry per connection that
+holds them weakly: the only strong reference is the callback queued with
+``transaction.on_commit()``, which Django drops when the transaction commits
+or rolls back, or when the savepoint it was queued in rolls back. An entry
+therefore lives as long as its callback is queued (callers should not keep it
+beyond that), and the next transaction starts with a new one. A committed
+entry also takes itself out of the registry before doing its work.
+"""
+import weakref
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+
+# connection -> {Pending subclass: its instance for the current transaction}
+_registries = weakref.WeakKeyDictionary()
+
+
+class Pending:
+    """Per-transaction work; subclasses collect into attributes and override run()."""
+
+    def __init__(self, using):
+        self.using = using
+
+    def __call__(self):
+        registry = _registries.get(transaction.get_connection(self.using))
+        if registry is not None and registry.get(type(self)) is self:
+            del registry[type(self)]
+        self.run()
+
+    def run(self):
+        """Called once the transaction commits."""
+
+
+def current(cls, using=DEFAULT_DB_ALIAS, create=True):
+    """The `cls` instance of the current transaction on `using`, created and
+    queued to run on commit if there is none yet and `create` is true; None
+    outside a transaction."""
+    connection = transaction.get_connection(using)
+    if not connection.in_atomic_block:
+        return None
+    registry = _registries.setdefault(connection, weakref.WeakValueDictionary())
+    instance = registry.get(cls)
+    if instance is None and create:
+        instance = registry[cls] = cls(using)
+        transaction.on_commit(instance, using=using)
+    return instance
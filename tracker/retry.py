@@ -0,0 +1,47 @@
+"""Retrying SQLite writes that lose the race for the database lock.
+
+SQLite allows one writer at a time. A writer that cannot get the lock within
+the connection timeout fails with "database is locked"; ``retry_on_locked``
+runs the write again after an exponentially growing, jittered pause.
+"""
+import random
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, transaction
+
+
+MAX_RETRY_DELAY = 1.0
+
+
+def is_locked_error(exc):
+    message = str(exc).lower()
+    return "database is locked" in message or "database table is locked" in message
+
+
+def retry_on_locked(func=None, *, using=DEFAULT_DB_ALIAS, retries=None, delay=None):
+    """Decorator retrying `func` when it fails because the database is locked.
+
+    The wrapped function should do its writes in one transaction so a failed
+    attempt leaves nothing behind. Called inside an outer transaction it runs
+    only once: that transaction is already broken and has to be retried as a
+    whole by whoever opened it.
+    """
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            attempts = settings.TRACKER_WRITE_RETRIES if retries is None else retries
+            pause = settings.TRACKER_WRITE_RETRY_DELAY if delay is None else delay
+            for attempt in range(attempts + 1):
+                try:
+                    return func(*args, **kwargs)
+                except OperationalError as exc:
+                    if attempt == attempts or not is_locked_error(exc) or transaction.get_connection(using).in_atomic_block:
+                        raise
+                time.sleep(min(pause * 2**attempt, MAX_RETRY_DELAY) * random.uniform(0.5, 1.5))
+
+        return wrapper
+
+    return decorator if func is None else decorator(func)
@@ -0,0 +1,108 @@
+"""Repeat-offender risk scores, computed for every student at once with NumPy.
+
+A student's risk score is the sum of their violations weighted by level and
+decayed by age (halving every RISK_HALF_LIFE_DAYS), plus a bonus for escalating
+quickly: escalation velocity is the number of levels climbed per 30 days, from
+the level of the first violation to the first later one at a higher level than
+any before it. A student whose first violation was their worst has not escalated.
+
+NumPy is optional for the rest of the tracker; scoring raises ImportError
+without it.
+"""
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import ArchivedViolation, Student, Violation
+
+
+RISK_HALF_LIFE_DAYS = 90
+# indexed by offense level; level 0 does not exist
+LEVEL_WEIGHTS = (0.0, 1.0, 2.0, 4.0)
+ESCALATION_WEIGHT = 1.0
+# escalations faster than this count as taking this long, so a same-day
+# escalation does not dwarf everything else
+MIN_ESCALATION_DAYS = 7
+HISTORY_CHUNK_SIZE = 5000
+WRITE_BATCH_SIZE = 5000
+SECONDS_PER_DAY = 24 * 60 * 60
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError as exc:
+        raise ImportError("Risk scoring requires the numpy package.") from exc
+    return numpy
+
+
+def load_histories():
+    """(student ids, levels, occurrence timestamps) of every violation, archived
+    ones included, as arrays. Archived violations have decayed to almost nothing,
+    but a student's first violations, where escalation is measured from, are
+    often among them."""
+    np = _numpy()
+    student_ids, levels, timestamps = [], [], []
+    for model in (Violation, ArchivedViolation):
+        rows = model.objects.order_by().values_list("student_id", "level", "occurred_at")
+        for student_id, level, occurred_at in rows.iterator(chunk_size=HISTORY_CHUNK_SIZE):
+            student_ids.append(student_id)
+            levels.append(level)
+            timestamps.append(occurred_at.timestamp())
+    return (
+        np.array(student_ids, dtype=np.int64),
+        np.array(levels, dtype=np.int64),
+        np.array(timestamps, dtype=np.float64),
+    )
+
+
+def compute_scores(student_ids, levels, timestamps, now):
+    """Return (student ids, risk scores, escalation velocities) for every student
+    appearing in the histories."""
+    np = _numpy()
+    students, index = np.unique(student_ids, return_inverse=True)
+    if not len(students):
+        return students, np.zeros(0), np.zeros(0)
+
+    age_days = np.maximum(now.timestamp() - timestamps, 0) / SECONDS_PER_DAY
+    weighted = np.asarray(LEVEL_WEIGHTS)[levels] * 0.5 ** (age_days / RISK_HALF_LIFE_DAYS)
+    recency = np.bincount(index, weights=weighted, minlength=len(students))
+
+    # first time each student reached each level, inf where never
+    first_seen = np.full((len(students), len(LEVEL_WEIGHTS)), np.inf)
+    np.minimum.at(first_seen, (index, levels), timestamps)
+    reached = np.isfinite(first_seen)
+    top_level = len(LEVEL_WEIGHTS) - 1 - np.argmax(reached[:, ::-1], axis=1)
+    started = first_seen.min(axis=1)
+    # the highest level among the first violations: lower levels reached later
+    # are not a climb, whatever the lowest level ever reached
+    at_start = first_seen == started[:, np.newaxis]
+    start_level = len(LEVEL_WEIGHTS) - 1 - np.argmax(at_start[:, ::-1], axis=1)
+    climbed_days = np.maximum(
+        (first_seen[np.arange(len(students)), top_level] - started) / SECONDS_PER_DAY, MIN_ESCALATION_DAYS
+    )
+    velocity = np.where(top_level > start_level, (top_level - start_level) / climbed_days * 30, 0.0)
+
+    return students, recency + ESCALATION_WEIGHT * velocity, velocity
+
+
+def write_scores(student_ids, scores, velocities, scored_at):
+    """Store the scores in bulk; students without violations are reset to zero."""
+    sql = (
+        f"UPDATE {Student._meta.db_table} SET risk_score = %s, escalation_velocity = %s "
+        f"WHERE {Student._meta.pk.column} = %s"
+    )
+    rows = list(zip(scores.tolist(), velocities.tolist(), student_ids.tolist()))
+    with transaction.atomic():
+        Student.objects.update(risk_score=0, escalation_velocity=0, risk_scored_at=scored_at)
+        with connection.cursor() as cursor:
+            for start in range(0, len(rows), WRITE_BATCH_SIZE):
+                cursor.executemany(sql, rows[start:start + WRITE_BATCH_SIZE])
+
+
+def score_students(now=None):
+    """Recompute and store the risk score of every student; returns the number
+    of students with violations."""
+    now = now or timezone.now()
+    student_ids, scores, velocities = compute_scores(*load_histories(), now)
+    write_scores(student_ids, scores, velocities, now)
+    return len(student_ids)
@@ -0,0 +1,173 @@
+import csv
+import io
+import os
+import zipfile
+from dataclasses import dataclass, field
+from itertools import chain, repeat
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from . import fragments, search
+from .analytics import move_student_rollups
+from .forms import StudentForm
+from .history import record_student_moved
+from .logins import forget_student_ids
+from .models import SEARCHABLE_STUDENT_FIELDS, Student, Violation
+from .retry import retry_on_locked
+
+
+BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 500
+# updated on students already in the database, when the file has the column
+UPDATE_FIELDS = ["first_name", "last_name", "course_year_section", "college"]
+# model fields that are not part of StudentForm and need no validation here
+_UNVALIDATED_FIELDS = {f.name for f in Student._meta.fields} - set(StudentForm.base_fields)
+
+
+@dataclass
+class RosterImportResult:
+    rows: int = 0
+    saved: int = 0
+    error_count: int = 0
+    errors: list = field(default_factory=list)
+
+    def add_error(self, line, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+
+
+def _normalize_header(name):
+    return str(name or "").strip().lower().replace(" ", "_")
+
+
+def _cell_text(value):
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def _read_csv(fileobj):
+    if not isinstance(fileobj, io.TextIOBase):
+        fileobj = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    reader = csv.reader(fileobj)
+    header = [_normalize_header(name) for name in next(reader, [])]
+    for row in reader:
+        # short rows leave their last columns empty
+        yield reader.line_num, dict(zip(header, chain((value.strip() for value in row), repeat(""))))
+
+
+def _read_xlsx(fileobj):
+    try:
+        from openpyxl import load_workbook
+        from openpyxl.utils.exceptions import InvalidFileException
+    except ImportError as exc:
+        raise ValueError("Reading .xlsx rosters requires the openpyxl package.") from exc
+    try:
+        workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    except (InvalidFileException, zipfile.BadZipFile, KeyError) as exc:
+        raise ValueError("The roster is not a valid .xlsx workbook.") from exc
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [_normalize_header(name) for name in next(rows, ())]
+        for line, row in enumerate(rows, start=2):
+            yield line, dict(zip(header, (_cell_text(value) for value in row)))
+    finally:
+        workbook.close()
+
+
+def read_roster(fileobj, filename):
+    """Yield (line number, {column: text}) for each data row of a CSV or XLSX roster."""
+    if os.path.splitext(filename)[1].lower() == ".xlsx":
+        return _read_xlsx(fileobj)
+    return _read_csv(fileobj)
+
+
+def clean_roster_row(row):
+    """Validate a roster row with StudentForm's field and model rules, minus the
+    per-row uniqueness query (rows are upserted on student_id instead)."""
+    cleaned, errors = {}, {}
+    for name, form_field in StudentForm.base_fields.items():
+        try:
+            cleaned[name] = form_field.clean(row.get(name, ""))
+        except ValidationError as exc:
+            errors[name] = exc.messages
+    student = Student(**cleaned)
+    try:
+        student.clean_fields(exclude=_UNVALIDATED_FIELDS | set(errors))
+    except ValidationError as exc:
+        errors.update(exc.message_dict)
+    if errors:
+        raise ValidationError(errors)
+    return student
+
+
+@retry_on_locked
+def _save_batch(batch, update_fields=UPDATE_FIELDS):
+    students = list(batch.values())
+    with transaction.atomic():
+        previous = {
+            values[0]: dict(zip(SEARCHABLE_STUDENT_FIELDS, values))
+            for values in Student.objects.filter(student_id__in=batch).values_list(*SEARCHABLE_STUDENT_FIELDS)
+        }
+        Student.objects.bulk_create(
+            students,
+            update_conflicts=True,
+            unique_fields=["student_id"],
+            update_fields=[*update_fields, "last_changed"],
+        )
+        saved = Student.objects.filter(student_id__in=batch).in_bulk(field_name="student_id")
+
+        # bulk_create skips the signals, so do their work for the whole batch here
+        changed = [
+            saved[student_id]
+            for student_id, values in previous.items()
+            if any(values[field] != getattr(batch[student_id], field) for field in update_fields)
+        ]
+        for student in changed:
+            old_college = previous[student.student_id]["college"]
+            if (old_college or "") != (student.college or ""):
+                move_student_rollups(student.pk, old_college, student.college)
+                record_student_moved(student.pk, old_college, student.college)
+        search.index_students(saved.values())
+        forget_student_ids(batch)
+        fragments.invalidate_colleges(
+            {student.college for student in saved.values()} | {values["college"] for values in previous.values()}
+        )
+        if changed:
+            search.index_violations(Violation.objects.filter(student__in=changed).select_related("student"))
+    return len(students)
+
+
+def import_roster(fileobj, filename, batch_size=BATCH_SIZE, progress=None):
+    """Upsert the students of a roster file in batches, collecting per-row errors.
+    `progress`, if given, is called with the result after every batch."""
+    result = RosterImportResult()
+    batch = {}
+    update_fields = None
+    for line, row in read_roster(fileobj, filename):
+        if update_fields is None:
+            # columns the file does not have keep their stored values
+            update_fields = [name for name in UPDATE_FIELDS if name in row]
+        if not any(row.values()):
+            continue
+        result.rows += 1
+        try:
+            student = clean_roster_row(row)
+        except ValidationError as exc:
+            messages = (f"{name}: {' '.join(errors)}" for name, errors in exc.message_dict.items())
+            result.add_error(line, "; ".join(messages))
+            continue
+        # a later row for the same student wins
+        batch[student.student_id] = student
+        if len(batch) >= batch_size:
+            result.saved += _save_batch(batch, update_fields)
+            batch = {}
+            if progress:
+                progress(result)
+    if batch:
+        result.saved += _save_batch(batch, update_fields)
+    return result
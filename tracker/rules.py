@@ -0,0 +1,98 @@
+"""The rules behind a student's stored violation counters and ``noted`` flag.
+
+Everything is recomputed set-based: one UPDATE over the affected students with
+aggregate subqueries over their violations. Signal receivers call
+``schedule()``, which collects student ids for the current transaction and
+recomputes them once when it commits, so deleting a student's many violations
+(an admin cascade, a bulk delete) costs a single recompute.
+"""
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import BooleanField, Count, ExpressionWrapper, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from django.db.models.lookups import GreaterThanOrEqual
+from django.utils import timezone
+
+from . import pending
+from .models import ArchivedViolation, Student, Violation
+from .retry import retry_on_locked
+
+
+# A student is noted after this many violations, or after any offense of NOTED_LEVEL.
+NOTED_THRESHOLD = 3
+NOTED_LEVEL = 3
+
+
+def _count_and_highest(model):
+    violations = model.objects.filter(student=OuterRef("pk")).order_by().values("student")
+    count = Coalesce(Subquery(violations.annotate(n=Count("pk")).values("n")), 0)
+    highest = Coalesce(Subquery(violations.annotate(m=Max("level")).values("m")), 0)
+    return count, highest
+
+
+def counter_values():
+    """Expressions recomputing the stored Student counters from the Violation and
+    ArchivedViolation tables."""
+    live_count, live_highest = _count_and_highest(Violation)
+    archived_count, archived_highest = _count_and_highest(ArchivedViolation)
+    count = live_count + archived_count
+    highest = Greatest(live_highest, archived_highest)
+    noted = GreaterThanOrEqual(count, NOTED_THRESHOLD) | GreaterThanOrEqual(highest, NOTED_LEVEL)
+    return {
+        "violation_count": count,
+        "highest_level": highest,
+        "noted": ExpressionWrapper(noted, output_field=BooleanField()),
+    }
+
+
+@retry_on_locked
+def recompute(student_ids=None, using=DEFAULT_DB_ALIAS, violations_changed=False):
+    """Recompute counters and noted for the given students (all students if None)
+    right away; returns the number of students updated.
+
+    Only students whose counters change are updated and marked as changed, so a
+    rebuild leaves last_changed (and the ETags and sync feed built on it) alone
+    for everyone else. With `violations_changed`, the students' violations were
+    edited, so all of them are marked as changed even if their counters stay.
+    """
+    from . import fragments
+
+    students = Student.objects.using(using)
+    if student_ids is None:
+        fragments.invalidate_all()
+    else:
+        students = students.filter(pk__in=student_ids)
+    counters = counter_values()
+    if not violations_changed:
+        students = students.exclude(**counters)
+    with transaction.atomic(using=using):
+        # a Python datetime rather than Now(): SQLite's clock function stores
+        # milliseconds only, which would not compare equal to bound datetimes
+        return students.update(**counters, last_changed=timezone.now())
+
+
+class _PendingRecompute(pending.Pending):
+    """Every student scheduled in one transaction, recomputed when it commits."""
+
+    def __init__(self, using):
+        super().__init__(using)
+        self.student_ids = set()
+
+    def run(self):
+        from . import fragments
+
+        recompute(self.student_ids, using=self.using, violations_changed=True)
+        colleges = Student.objects.using(self.using).filter(pk__in=self.student_ids).values_list("college", flat=True)
+        fragments.invalidate_colleges(set(colleges))
+
+
+def schedule(student_ids, using=DEFAULT_DB_ALIAS):
+    """Recompute the given students when the current transaction commits, or now
+    outside of one. Ids scheduled in the same transaction are recomputed together."""
+    student_ids = set(student_ids) - {None}
+    if not student_ids:
+        return
+    scheduled = pending.current(_PendingRecompute, using)
+    if scheduled is None:
+        recompute(student_ids, using=using, violations_changed=True)
+        return
+    scheduled.student_ids.update(student_ids)
@@ -0,0 +1,135 @@
+"""Full-text search over students and violations backed by an SQLite FTS5 table.
+
+Each indexed object is one row of ``tracker_search``; its rowid is derived from
+the object's pk (even for students, odd for violations) so that updates and
+deletes hit the rowid directly. On other databases, or SQLite builds without
+FTS5, ``is_available()`` is False and callers fall back to LIKE searches.
+"""
+import re
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models.expressions import RawSQL
+from django.db.models.signals import post_migrate
+from django.dispatch import receiver
+
+from .models import Student, Violation
+
+
+SEARCH_TABLE = "tracker_search"
+STUDENT = "student"
+VIOLATION = "violation"
+INDEX_CHUNK_SIZE = 2000
+
+_available = {}
+
+
+@receiver(post_migrate)
+def _forget_availability(sender, **kwargs):
+    _available.clear()
+
+
+def is_available(using=DEFAULT_DB_ALIAS):
+    if using not in _available:
+        connection = connections[using]
+        _available[using] = (
+            connection.vendor == "sqlite" and SEARCH_TABLE in connection.introspection.table_names()
+        )
+    return _available[using]
+
+
+def _rowid(kind, pk):
+    return pk * 2 + (1 if kind == VIOLATION else 0)
+
+
+def _student_text(student):
+    parts = [student.student_id, student.first_name, student.last_name, student.course_year_section, student.college]
+    return " ".join(filter(None, parts))
+
+
+def _write(rows, using=DEFAULT_DB_ALIAS):
+    rows = list(rows)
+    if not rows or not is_available(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.executemany(
+            f"INSERT OR REPLACE INTO {SEARCH_TABLE} (rowid, kind, object_id, student, body) VALUES (%s, %s, %s, %s, %s)",
+            rows,
+        )
+
+
+def index_students(students, using=DEFAULT_DB_ALIAS):
+    _write(((_rowid(STUDENT, s.pk), STUDENT, s.pk, _student_text(s), "") for s in students), using)
+
+
+def index_violations(violations, using=DEFAULT_DB_ALIAS):
+    """Index violations; each one's student should be loaded (select_related)."""
+    _write(
+        (
+            (_rowid(VIOLATION, v.pk), VIOLATION, v.pk, _student_text(v.student), v.offense)
+            for v in violations
+        ),
+        using,
+    )
+
+
+def remove(kind, pk, using=DEFAULT_DB_ALIAS):
+    remove_many(kind, [pk], using)
+
+
+def remove_many(kind, pks, using=DEFAULT_DB_ALIAS):
+    if not is_available(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.executemany(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [[_rowid(kind, pk)] for pk in pks])
+
+
+def rebuild(using=DEFAULT_DB_ALIAS):
+    """Repopulate the index from scratch; returns the number of indexed rows."""
+    if not is_available(using):
+        return 0
+    students = Student.objects.using(using).order_by("pk")
+    violations = Violation.objects.using(using).select_related("student").order_by("pk")
+    total = 0
+    with transaction.atomic(using=using):
+        with connections[using].cursor() as cursor:
+            cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+        for indexer, queryset in ((index_students, students), (index_violations, violations)):
+            batch = []
+            for obj in queryset.iterator(chunk_size=INDEX_CHUNK_SIZE):
+                batch.append(obj)
+                if len(batch) >= INDEX_CHUNK_SIZE:
+                    indexer(batch, using)
+                    total += len(batch)
+                    batch = []
+            indexer(batch, using)
+            total += len(batch)
+    return total
+
+
+def match_expression(text):
+    """Turn free text into an FTS5 query where every word must match as a prefix."""
+    words = re.findall(r"\w+", text)
+    return " AND ".join(f'"{word}"*' for word in words)
+
+
+def matching_ids(text, kind):
+    """A subquery of the pks of `kind` objects matching `text`, for use with pk__in."""
+    return RawSQL(
+        f"SELECT object_id FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s AND kind = %s",
+        [match_expression(text), kind],
+    )
+
+
+def search(text, limit=20, using=DEFAULT_DB_ALIAS):
+    """Return [(kind, pk)] for the best matches of `text`, ranked by bm25."""
+    expression = match_expression(text)
+    if not expression:
+        return []
+    with connections[using].cursor() as cursor:
+        # FTS5 keeps only the best `limit` matches while ranking, so every match
+        # is considered without sorting them all
+        cursor.execute(
+            f"SELECT kind, object_id FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s ORDER BY rank LIMIT %s",
+            [expression, limit],
+        )
+        return cursor.fetchall()
@@ -0,0 +1,100 @@
+"""Where a fresh process spends its time before a command can start working.
+
+``profile_startup`` starts a new interpreter under ``python -X importtime`` with
+the given settings module, sets Django up and runs the system checks, the way
+``manage.py`` does before every command. It reports the time spent in each
+phase, in each app's import, ``import_models()`` and ``ready()``, and in every
+module imported on the way. ``-X importtime`` only sees import statements, so
+modules loaded with ``importlib.import_module()`` (settings, apps and their
+models) are covered by the app timings instead; ``modules`` lists everything
+that ended up loaded.
+"""
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+
+
+# Run in the child interpreter: times each AppConfig's phases by wrapping the
+# configs as the registry creates them, then prints the timings as JSON.
+STARTUP_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+import django
+from django.apps.config import AppConfig
+from django.core.management import call_command
+
+apps = {}
+create = AppConfig.create.__func__
+
+def timed(timings, name, method):
+    def wrapper(*args, **kwargs):
+        phase_started = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            timings[name] = (time.perf_counter() - phase_started) * 1000
+    return wrapper
+
+def timed_create(cls, entry):
+    created = time.perf_counter()
+    config = create(cls, entry)
+    timings = apps[config.label] = {"import_ms": (time.perf_counter() - created) * 1000}
+    config.import_models = timed(timings, "models_ms", config.import_models)
+    config.ready = timed(timings, "ready_ms", config.ready)
+    return config
+
+AppConfig.create = classmethod(timed_create)
+imported = time.perf_counter()
+django.setup()
+set_up = time.perf_counter()
+if CHECK:
+    call_command("check", verbosity=0)
+checked = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "setup_ms": (set_up - imported) * 1000,
+    "checks_ms": (checked - set_up) * 1000,
+    "total_ms": (checked - started) * 1000,
+    "apps": apps,
+    "modules": sorted(sys.modules),
+}))
+"""
+
+
+class StartupFailed(RuntimeError):
+    pass
+
+
+def parse_importtime(output):
+    """[(module, self ms, cumulative ms)] from ``-X importtime`` output, in import order."""
+    imports = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        own, cumulative, module = line[len("import time:"):].split("|")
+        if not own.strip().isdigit():
+            continue  # the header line
+        imports.append((module.strip(), int(own) / 1000, int(cumulative) / 1000))
+    return imports
+
+
+def profile_startup(settings_module, check=True):
+    """Start a new interpreter with `settings_module` and return its phase, app and
+    import timings, the imports as (module, self ms, cumulative ms), and the
+    names of all the modules loaded."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"CHECK = {bool(check)}\n{STARTUP_SCRIPT}"],
+        cwd=settings.BASE_DIR,
+        env={**os.environ, "DJANGO_SETTINGS_MODULE": settings_module},
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode:
+        errors = [line for line in completed.stderr.splitlines() if not line.startswith("import time:")]
+        raise StartupFailed(f"Starting with {settings_module} failed:\n" + "\n".join(errors[-20:]))
+    profile = json.loads(completed.stdout.splitlines()[-1])
+    profile["imports"] = parse_importtime(completed.stderr)
+    return profile
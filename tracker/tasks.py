@@ -0,0 +1,108 @@
+"""The background jobs views can enqueue; see tracker.jobs."""
+import dataclasses
+import tempfile
+from datetime import date
+
+from django.conf import settings
+from django.core.files import File
+
+from . import history, search
+from .analytics import rebuild_rollups
+from .archive import archive_cutoff, archive_violations
+from .exports import STUDENT_COLUMNS, VIOLATION_EXPORT_COLUMNS, filter_students, filter_violations, stream_csv
+from .jobs import JobFailed, task
+from .models import job_files
+from .risk import score_students
+from .roster import import_roster
+from .rules import recompute
+
+
+EXPORT_PROGRESS_EVERY = 5000
+
+
+@task("import_roster")
+def import_roster_job(job, filename):
+    def progress(result):
+        job.report_progress(result.rows, message=f"{result.rows} rows read, {result.saved} students saved")
+
+    try:
+        with job_files().open(job.input_file, "rb") as roster:
+            result = import_roster(roster, filename, progress=progress)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise JobFailed(str(exc)) from exc
+    return dataclasses.asdict(result)
+
+
+def _export(job, filter_queryset, columns, filename, filters):
+    if filters.get("start"):
+        filters["start"] = date.fromisoformat(filters["start"])
+    if filters.get("end"):
+        filters["end"] = date.fromisoformat(filters["end"])
+    queryset = filter_queryset(**filters)
+    total = queryset.count()
+    # written to a local temporary file first, so only a row at a time is held
+    # in memory and the storage receives the finished file
+    with tempfile.TemporaryFile() as output:
+        # the first line is the header
+        for count, line in enumerate(stream_csv(queryset, columns)):
+            output.write(line.encode())
+            if count % EXPORT_PROGRESS_EVERY == 0:
+                job.report_progress(count, total, f"{count} of {total} rows written")
+        output.seek(0)
+        job.store_output(filename, File(output))
+    return {"rows": total}
+
+
+@task("export_students")
+def export_students_job(job, **filters):
+    return _export(job, filter_students, STUDENT_COLUMNS, "students.csv", filters)
+
+
+@task("export_violations")
+def export_violations_job(job, **filters):
+    return _export(job, filter_violations, VIOLATION_EXPORT_COLUMNS, "violations.csv", filters)
+
+
+@task("rebuild_rollups")
+def rebuild_rollups_job(job):
+    return {"rows": rebuild_rollups()}
+
+
+@task("recompute_counters")
+def recompute_counters_job(job):
+    return {"students": recompute()}
+
+
+@task("rebuild_search_index")
+def rebuild_search_index_job(job):
+    return {"rows": search.rebuild()}
+
+
+@task("snapshot_history")
+def snapshot_history_job(job):
+    snapshot = history.take_snapshot()
+    snapshots = events = 0
+    if settings.TRACKER_HISTORY_SNAPSHOTS_KEPT:
+        snapshots, events = history.prune(settings.TRACKER_HISTORY_SNAPSHOTS_KEPT)
+    return {
+        "snapshot": snapshot.pk,
+        "violations": snapshot.violations.count(),
+        "dropped_snapshots": snapshots,
+        "dropped_events": events,
+    }
+
+
+@task("archive_violations")
+def archive_violations_job(job):
+    def progress(total):
+        job.report_progress(total, message=f"{total} violations archived")
+
+    return {"archived": archive_violations(archive_cutoff(), progress=progress)}
+
+
+@task("score_risk")
+def score_risk_job(job):
+    try:
+        return {"students": score_students()}
+    except ImportError as exc:
+        raise JobFailed(str(exc)) from exc
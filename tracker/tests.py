@@ -1,3 +1,1149 @@
-from django.test import TestCase
+import csv
+import importlib.util
+import io
+import json
+import re
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from datetime import timedelta
+from pathlib import Path
+from urllib.parse import urlencode
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.db.models import F
+from django.test import Client, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import history, jobs, logins, pending, search
+from .analytics import rebuild_rollups
+from .archive import archive_cutoff, archive_violations
+from .benchmarks import DATASET_SIZES, benchmark_views, compare_to_baselines, generate_dataset, load_baselines
+from .fragments import fragment_version
+from .middleware import timings
+from .models import Job, Student, Violation, ViolationEvent, ViolationRollup
+from .pagination import encode_cursor
+from .retry import retry_on_locked
+from .risk import compute_scores, load_histories, score_students
+from .roster import import_roster
+from .rules import _PendingRecompute, recompute
+from .startup import profile_startup
+from .views import TREND_MAX_BUCKETS
+
+
+def use_temporary_job_files(test_case):
+    """Keep the files of the test's jobs in a directory removed afterwards."""
+    directory = tempfile.TemporaryDirectory()
+    test_case.addCleanup(directory.cleanup)
+    job_storage = {"BACKEND": "django.core.files.storage.FileSystemStorage", "OPTIONS": {"location": directory.name}}
+    override = override_settings(STORAGES={**settings.STORAGES, "tracker_jobs": job_storage})
+    override.enable()
+    test_case.addCleanup(override.disable)
+    return Path(directory.name)
+
+
+def full_table_scans(sql):
+    """Return the EXPLAIN QUERY PLAN steps of `sql` that scan a table without an index."""
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+        steps = [row[-1] for row in cursor.fetchall()]
+    return [step for step in steps if step.startswith("SCAN") and "INDEX" not in step]
+
+
+class QueryPlanTests(TestCase):
+    """The queries behind the main views must be served by indexes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        colleges = ["CAS", "CIT", "COE", "CBMA", "CCS", "COED", None]
+        Student.objects.bulk_create(
+            Student(student_id=str(i), first_name=f"First{i}", last_name=f"Last{i % 40}", college=colleges[i % 7])
+            for i in range(200)
+        )
+        cls.student = Student.objects.order_by("pk").first()
+        for level in (1, 2, 3):
+            Violation.objects.create(student=cls.student, offense="No ID", level=level)
+        cls.superuser = User.objects.create_superuser("osa", "osa@example.com", "password")
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def setUp(self):
+        cache.clear()
+
+    def assertViewUsesIndexes(self, url):
+        if connection.vendor != "sqlite":
+            self.skipTest("EXPLAIN QUERY PLAN is SQLite specific.")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        for query in queries:
+            sql = query["sql"]
+            if not sql.startswith("SELECT") or "tracker_" not in sql:
+                continue
+            with self.subTest(sql=sql):
+                self.assertEqual(full_table_scans(sql), [])
+
+    def test_student_list(self):
+        self.client.force_login(self.superuser)
+        self.assertViewUsesIndexes(reverse("tracker:student_list"))
+        self.assertViewUsesIndexes(reverse("tracker:student_list") + "?sort=name")
+        self.assertViewUsesIndexes(reverse("tracker:student_panel") + "?college=CCS")
+
+    def test_student_detail(self):
+        self.client.force_login(self.superuser)
+        self.assertViewUsesIndexes(reverse("tracker:student_detail", args=[self.student.pk]))
+
+    def test_student_violation_view(self):
+        self.assertViewUsesIndexes(reverse("tracker:student_violation", args=[self.student.pk]))
+
+    def test_college_analytics(self):
+        self.client.force_login(self.superuser)
+        self.assertViewUsesIndexes(reverse("tracker:college_analytics"))
+
+    def test_violation_trends(self):
+        self.client.force_login(self.superuser)
+        self.assertViewUsesIndexes(reverse("tracker:violation_trends") + "?granularity=month&start=2020-01-01")
+        today = timezone.localdate().isoformat()
+        drill_down = reverse("tracker:trend_violations") + f"?start={today}&end={today}&college=CAS&level=1"
+        with self.assertNumQueries(4):  # session, user, violations, archived violations
+            self.client.get(drill_down)
+        self.assertViewUsesIndexes(drill_down)
+
+    def test_api(self):
+        self.client.force_login(self.superuser)
+        ids = ",".join(str(i) for i in range(0, 200, 3))
+        self.assertViewUsesIndexes(reverse("tracker:api_students") + f"?ids={ids}&fields=student_id,noted")
+        self.assertViewUsesIndexes(reverse("tracker:api_students") + "?updated_since=2020-01-01T00:00:00")
+        self.assertViewUsesIndexes(reverse("tracker:api_violations") + "?updated_since=2020-01-01T00:00:00")
+        # deletions are only kept since the oldest snapshot
+        since = urlencode({"updated_since": timezone.now().isoformat()})
+        self.assertViewUsesIndexes(reverse("tracker:api_deleted_violations") + f"?{since}")
+
+    def test_admin_changelists(self):
+        self.client.force_login(self.superuser)
+        self.assertViewUsesIndexes(reverse("admin:tracker_student_changelist") + "?o=-5")
+        year = timezone.localdate().year
+        self.assertViewUsesIndexes(reverse("admin:tracker_violation_changelist") + f"?occurred_at__year={year}")
+
+
+class SearchIndexTests(TestCase):
+    """The FTS index follows saves and deletes of students and violations."""
+
+    def setUp(self):
+        if not search.is_available():
+            self.skipTest("SQLite without FTS5")
+        self.student = Student.objects.create(student_id="1", first_name="Ana", last_name="Cruz", college="CAS")
+        self.violation = Violation.objects.create(student=self.student, offense="Vandalism of chairs", level=2)
+
+    def test_match(self):
+        self.assertEqual(search.search("vandal"), [(search.VIOLATION, self.violation.pk)])
+        self.assertEqual(
+            set(search.search("ana cru")), {(search.STUDENT, self.student.pk), (search.VIOLATION, self.violation.pk)}
+        )
+        self.assertEqual(search.search("ana cas vandalism"), [(search.VIOLATION, self.violation.pk)])
+        self.assertEqual(search.search("?!"), [])
+        self.client.force_login(User.objects.create_superuser("osa", "osa@example.com", "password"))
+        results = self.client.get(reverse("tracker:search"), {"q": "chairs"}).json()["results"]
+        self.assertEqual([(hit["type"], hit["id"]) for hit in results], [(search.VIOLATION, self.violation.pk)])
+
+    def test_sync_on_save(self):
+        self.student.last_name = "Reyes"
+        self.student.save()
+        self.violation.offense = "Littering"
+        self.violation.save()
+        self.assertEqual(search.search("cruz"), [])
+        self.assertEqual(search.search("vandalism"), [])
+        self.assertEqual(search.search("reyes littering"), [(search.VIOLATION, self.violation.pk)])
+
+    def test_sync_on_delete(self):
+        other = Violation.objects.create(student=self.student, offense="Vandalism of walls", level=2)
+        self.violation.delete()
+        self.assertEqual(search.search("vandalism"), [(search.VIOLATION, other.pk)])
+        self.student.delete()
+        self.assertEqual(search.search("ana"), [])
+
+
+@override_settings(TRACKER_PROFILING=True, TRACKER_SLOW_REQUEST_MS=60 * 1000)
+class QueryTimingMiddlewareTests(TestCase):
+    """With profiling on, every request reports its queries and feeds the per-view timings."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.superuser = User.objects.create_superuser("osa", "osa@example.com", "password")
+        Student.objects.create(student_id="1", first_name="Ana", last_name="Cruz", college="CAS")
+
+    def setUp(self):
+        timings.clear()
+        self.addCleanup(timings.clear)
+        self.client.force_login(self.superuser)
+
+    def server_timing(self, response):
+        return dict(re.findall(r'(\w+);dur=[\d.]+(?:;desc="(\d+) queries")?', response["Server-Timing"]))
+
+    def test_counts_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("tracker:student_list"))
+        first = len(queries)
+        self.assertEqual(self.server_timing(response), {"db": str(first), "tpl": "", "total": ""})
+        # later requests may find fragments cached, so each reports its own count
+        second = int(self.server_timing(self.client.get(reverse("tracker:student_list")))["db"])
+        (row,) = timings.summary()
+        self.assertEqual((row["name"], row["count"], row["queries"]), ("tracker:student_list", 2, (first + second) / 2))
+
+    def test_async_view(self):
+        response = self.client.get(reverse("tracker:student_login"))
+        self.assertIn("db", self.server_timing(response))
+        self.assertEqual([row["name"] for row in timings.summary()], ["tracker:student_login"])
+
+    def test_slow_request_is_logged(self):
+        with self.settings(TRACKER_SLOW_REQUEST_MS=0), self.assertLogs("tracker.performance", "WARNING") as logs:
+            Client().get(reverse("tracker:log"))
+        self.assertIn("Slow request GET /", logs.output[0])
+
+    @override_settings(TRACKER_PROFILING=False)
+    def test_disabled(self):
+        response = Client().get(reverse("tracker:log"))
+        self.assertNotIn("Server-Timing", response)
+        self.assertEqual(timings.summary(), [])
+
+
+class AdminChangelistTests(TestCase):
+    """A changelist page costs the same number of queries however many rows it shows."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.superuser = User.objects.create_superuser("osa", "osa@example.com", "password")
+
+    def setUp(self):
+        self.client.force_login(self.superuser)
+
+    def add_students(self, count):
+        start = Student.objects.count()
+        for i in range(start, start + count):
+            student = Student.objects.create(student_id=str(i), first_name=f"First{i}", last_name=f"Last{i}")
+            Violation.objects.create(student=student, offense="No ID", level=1 + i % 3)
+
+    def changelist_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def assertConstantQueries(self, url):
+        self.add_students(2)
+        few = self.changelist_queries(url)
+        self.add_students(30)
+        self.assertEqual(self.changelist_queries(url), few)
+
+    def test_student_changelist(self):
+        # sorted by violation count
+        self.assertConstantQueries(reverse("admin:tracker_student_changelist") + "?o=-5")
+
+    def test_violation_changelist(self):
+        self.assertConstantQueries(reverse("admin:tracker_violation_changelist"))
+
+    def test_violation_date_hierarchy(self):
+        today = timezone.localdate()
+        url = reverse("admin:tracker_violation_changelist")
+        self.assertConstantQueries(f"{url}?occurred_at__year={today.year}&occurred_at__month={today.month}")
+
+
+class TamperedCursorTests(TestCase):
+    """A cursor with values of the wrong type is a bad request, not a server error."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.superuser = User.objects.create_superuser("osa", "osa@example.com", "password")
+        cls.student = Student.objects.create(student_id="1", first_name="Ana", last_name="Cruz")
+
+    def setUp(self):
+        self.client.force_login(self.superuser)
+
+    def test_tampered_cursors(self):
+        cursor = encode_cursor(["a", "b", "notint"])
+        urls = [
+            f"{reverse('tracker:student_panel')}?sort=name&cursor={cursor}",
+            f"{reverse('tracker:student_detail', args=[self.student.pk])}?archived=1&cursor={encode_cursor(['x', 1])}",
+            f"{reverse('tracker:api_students')}?cursor={encode_cursor(['notint'])}",
+            f"{reverse('tracker:api_students')}?updated_since=2024-01-01T00:00:00Z&cursor={encode_cursor(['x', 1])}",
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 400)
+
+
+def rollup_rows():
+    return {
+        (row.period, row.college, row.level, row.day): row.count
+        for row in ViolationRollup.objects.filter(count__gt=0)
+    }
+
+
+class RollupDeltaTests(TestCase):
+    """The rollups kept up to date by the signal receivers must match a rebuild."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.cas = Student.objects.create(student_id="1", first_name="Ana", last_name="Cruz", college="CAS")
+        cls.cit = Student.objects.create(student_id="2", first_name="Jose", last_name="Reyes", college="CIT")
+
+    def assertRollupsMatchRebuild(self):
+        live = rollup_rows()
+        rebuild_rollups()
+        self.assertEqual(live, rollup_rows())
+
+    def add_violations(self, student, count):
+        return [
+            Violation.objects.create(
+                student=student, offense="No ID", level=1 + i % 3, occurred_at=timezone.now() - timedelta(days=i * 9)
+            )
+            for i in range(count)
+        ]
+
+    def test_edit(self):
+        violation = self.add_violations(self.cas, 3)[0]
+        violation.level = 3
+        violation.occurred_at -= timedelta(days=40)
+        violation.save()
+        self.assertRollupsMatchRebuild()
+
+    def test_reassign(self):
+        violation = self.add_violations(self.cas, 3)[1]
+        violation.student = self.cit
+        violation.save()
+        self.assertRollupsMatchRebuild()
+
+    def test_college_move(self):
+        self.add_violations(self.cas, 3)
+        self.cas.college = "COE"
+        self.cas.save()
+        self.assertRollupsMatchRebuild()
+
+    def test_delete(self):
+        self.add_violations(self.cas, 3)[2].delete()
+        self.assertRollupsMatchRebuild()
+
+    def test_student_cascade(self):
+        self.add_violations(self.cas, 4)
+        self.add_violations(self.cit, 2)
+        Student.objects.get(pk=self.cas.pk).delete()
+        self.assertRollupsMatchRebuild()
+        self.assertFalse(any(college == "CAS" for _, college, _, _ in rollup_rows()))
+
+    def test_student_cascade_queries(self):
+        def delete_queries(violations):
+            student = Student.objects.create(student_id=f"s{violations}", first_name="A", last_name="B", college="CAS")
+            for _ in range(violations):
+                # all on one day and level, so the rollup rows touched stay the same
+                Violation.objects.create(student=student, offense="No ID", level=1)
+            with CaptureQueriesContext(connection) as queries:
+                Student.objects.get(pk=student.pk).delete()
+            return len(queries)
+
+        self.assertEqual(delete_queries(2), delete_queries(10))
+
+
+class BulkViolationTests(TestCase):
+    """Bulk recording writes the same counters, rollups and history as saving one
+    violation at a time, and a later cascade undoes them."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.superuser = User.objects.create_superuser("osa", "osa@example.com", "password")
+        cls.cas = Student.objects.create(student_id="1", first_name="Ana", last_name="Cruz", college="CAS")
+        cls.cit = Student.objects.create(student_id="2", first_name="Jose", last_name="Reyes", college="CIT")
+
+    def setUp(self):
+        self.client.force_login(self.superuser)
+
+    def post(self, entries):
+        return self.client.post(
+            reverse("tracker:bulk_add_violations_json"), {"violations": entries}, content_type="application/json"
+        )
+
+    def counters(self):
+        return list(Student.objects.order_by("student_id").values_list("violation_count", "highest_level", "noted"))
+
+    def test_record_and_cascade(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.post([
+                {"student_id": "1", "offense": "No ID", "level": 1},
+                {"student_id": "1", "offense": "Late", "level": 1},
+                {"student_id": "2", "offense": "Vandalism", "level": 3},
+            ])
+        self.assertEqual((response.status_code, response.json()), (201, {"created": 3}))
+        self.assertEqual(self.counters(), [(2, 1, False), (1, 3, True)])
+        self.assertEqual(sum(row.count for row in ViolationRollup.objects.filter(period="day")), 3)
+        live = rollup_rows()
+        rebuild_rollups()
+        self.assertEqual(rollup_rows(), live)
+        self.assertEqual(ViolationEvent.objects.filter(kind=ViolationEvent.CREATED).count(), 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Student.objects.get(pk=self.cas.pk).delete()
+        self.assertEqual(Violation.objects.count(), 1)
+        self.assertEqual(self.counters(), [(1, 3, True)])
+        self.assertEqual({college for _, college, _, _ in rollup_rows()}, {"CIT"})
+        self.assertEqual(ViolationEvent.objects.filter(kind=ViolationEvent.DELETED).count(), 2)
+
+    def test_errors_record_nothing(self):
+        response = self.post([
+            {"student_id": "1", "offense": "No ID", "level": 1},
+            {"student_id": "9", "offense": "No ID", "level": 1},
+            {"student_id": "2", "offense": "", "level": 5},
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.json()["errors"]), {"1", "2"})
+        self.assertFalse(Violation.objects.exists())
+        self.assertEqual(self.counters(), [(0, 0, False), (0, 0, False)])
+
+
+@mock.patch("tracker.history.SNAPSHOT_BATCH_SIZE", 2)
+class HistoryReplayTests(TestCase):
+    """Replaying a snapshot and the events after it gives back the live data."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.cas = Student.objects.create(student_id="1", first_name="Ana", last_name="Cruz", college="CAS")
+        cls.cit = Student.objects.create(student_id="2", first_name="Jose", last_name="Reyes", college="CIT")
+        cls.violations = [
+            Violation.objects.create(
+                student=student, offense="No ID", level=1 + i % 3, occurred_at=timezone.now() - timedelta(days=i * 9)
+            )
+            for i in range(5)
+            for student in (cls.cas, cls.cit)
+        ]
+
+    def assertReplayMatchesLive(self):
+        for student in (self.cas, self.cit):
+            live = (
+                student.violations.order_by("-occurred_at", "-pk")
+                .values("offense", "level", "occurred_at", violation_id=F("pk"), student_pk=F("student_id"))
+            )
+            live = [{**row, "college": student.college} for row in live]
+            self.assertEqual(history.student_record(student.pk), live)
+        days = {key[1:]: count for key, count in rollup_rows().items() if key[0] == "day"}
+        self.assertEqual({key: count for key, count in history.rollup_counts().items() if count}, days)
+
+    def test_replay(self):
+        history.take_snapshot()
+        edited, deleted = self.violations[:2]
+        edited.level = 3
+        edited.save()
+        deleted.delete()
+        Violation.objects.create(student=self.cas, offense="Late", level=2)
+        self.cit.college = "CAS"
+        self.cit.save()
+        self.assertReplayMatchesLive()
+
+    def test_changes_while_copying(self):
+        copy_batch = history._copy_batch
+
+        def copy_then_change(snapshot, after, counts):
+            copied = copy_batch(snapshot, after, counts)
+            if not after:
+                # both already copied
+                Violation.objects.filter(pk=self.violations[0].pk).get().delete()
+                moved = Violation.objects.get(pk=self.violations[1].pk)
+                moved.level = 3
+                moved.save()
+            return copied
+
+        with mock.patch("tracker.history._copy_batch", copy_then_change):
+            snapshot = history.take_snapshot()
+        self.assertEqual(
+            set(snapshot.violations.values_list("violation_id", "level")),
+            set(Violation.objects.values_list("pk", "level")),
+        )
+        self.assertReplayMatchesLive()
+
+
+class ArchiveTests(TestCase):
+    """Archived violations keep counting: counters, rollups, history and exports."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.superuser = User.objects.create_superuser("osa", "osa@example.com", "password")
+        cls.student = Student.objects.create(student_id="1", first_name="Ana", last_name="Cruz", college="CAS")
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for level, days_ago in ((1, 1200), (3, 1000), (1, 10), (2, 5)):
+                violation = Violation.objects.create(student=self.student, offense="No ID", level=level)
+                # occurred_at is only set automatically on creation
+                violation.occurred_at -= timedelta(days=days_ago)
+                violation.save()
+        self.counters = Student.objects.values("violation_count", "highest_level", "noted").get(pk=self.student.pk)
+        self.rollups = rollup_rows()
+        self.assertEqual(archive_violations(archive_cutoff(days=365), pause=0), 2)
+
+    def test_counters_and_rollups_kept(self):
+        self.assertEqual(Violation.objects.count(), 2)
+        student = Student.objects.values("violation_count", "highest_level", "noted")
+        self.assertEqual(student.get(pk=self.student.pk), self.counters)
+        self.assertEqual(rollup_rows(), self.rollups)
+        recompute([self.student.pk])
+        rebuild_rollups()
+        self.assertEqual(student.get(pk=self.student.pk), self.counters)
+        self.assertEqual(rollup_rows(), self.rollups)
+
+    def test_move(self):
+        history.take_snapshot()
+        self.student.college = "CIT"
+        self.student.save()
+        moved = ViolationEvent.objects.filter(kind=ViolationEvent.MOVED, delta=1, college="CIT")
+        self.assertEqual(moved.count(), 4)
+        days = {key[1:]: count for key, count in rollup_rows().items() if key[0] == "day"}
+        self.assertEqual({key: count for key, count in history.rollup_counts().items() if count}, days)
+        self.assertEqual({college for college, _, _ in days}, {"CIT"})
+
+    def test_exports_and_drill_down(self):
+        use_temporary_job_files(self)
+        start = (timezone.now() - timedelta(days=1300)).date()
+        job = jobs.enqueue("export_violations", {"start": start.isoformat()})
+        jobs.run(jobs.claim("test"))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.result), (Job.SUCCEEDED, {"rows": 4}))
+        self.client.force_login(self.superuser)
+        response = self.client.get(reverse("tracker:job_output", args=[job.pk]))
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="violations.csv"')
+        rows = list(csv.DictReader(io.StringIO(b"".join(response.streaming_content).decode())))
+        self.assertEqual(
+            sorted((row["level"], row["archived"]) for row in rows),
+            [("1", "False"), ("1", "True"), ("2", "False"), ("3", "True")],
+        )
+        response = self.client.get(reverse("tracker:export_violations_ndjson") + f"?start={start}")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(sorted(json.loads(line)["archived"] for line in lines), [False, False, True, True])
+        response = self.client.get(reverse("tracker:trend_violations") + f"?start={start}&end={timezone.localdate()}")
+        self.assertEqual(len(response.context["violations"]), 4)
+        self.assertContains(response, "Archived", count=2)
+
+    @unittest.skipUnless(importlib.util.find_spec("numpy"), "risk scoring requires numpy")
+    def test_risk_scores(self):
+        _, levels, _ = load_histories()
+        self.assertEqual(sorted(levels.tolist()), [1, 1, 2, 3])
+        self.assertEqual(score_students(), 1)
+        self.student.refresh_from_db()
+        # escalated from level 1 to 3 over the 200 days between the archived violations
+        self.assertAlmostEqual(self.student.escalation_velocity, 2 / 200 * 30)
+
+
+def roster_file(text):
+    return io.BytesIO(text.encode())
+
+
+class RosterImportTests(TestCase):
+    """Roster rows are upserted on student_id; bad rows are reported by line."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = Student.objects.create(
+            student_id="1", first_name="Ana", last_name="Cruz", course_year_section="BSIT 2A", college="CAS"
+        )
+        Violation.objects.create(student=cls.student, offense="No ID", level=1)
+
+    def test_upsert(self):
+        result = import_roster(
+            roster_file(
+                "Student ID,First Name,Last Name,Course Year Section,College\n"
+                "1,Ana,Reyes,BSIT 3A,CIT\n"
+                "2,Ben,Santos,BSED 1B,COE\n"
+                "2,Benjamin,Santos,BSED 1B,COE\n"
+            ),
+            "roster.csv",
+            batch_size=2,
+        )
+        self.assertEqual((result.rows, result.saved, result.errors), (3, 3, []))
+        self.assertEqual(
+            list(Student.objects.order_by("pk").values_list("student_id", "first_name", "last_name", "college")),
+            [("1", "Ana", "Reyes", "CIT"), ("2", "Benjamin", "Santos", "COE")],
+        )
+        self.assertTrue(ViolationEvent.objects.filter(kind=ViolationEvent.MOVED, college="CIT").exists())
+
+    def test_errors_have_line_numbers(self):
+        result = import_roster(
+            roster_file("student_id,first_name,last_name\n3,Carla,Lim\nabc,Dan,Uy\n\n4,,Tan\n"), "roster.csv"
+        )
+        self.assertEqual((result.rows, result.saved, result.error_count), (3, 1, 2))
+        self.assertEqual(
+            result.errors,
+            [(3, "student_id: ID must be numeric and up to 8 digits."), (5, "first_name: This field is required.")],
+        )
+        self.assertFalse(Student.objects.filter(student_id__in=["abc", "4"]).exists())
+
+    def test_missing_column_keeps_stored_values(self):
+        result = import_roster(roster_file("student_id,first_name,last_name\n1,Ana,Reyes\n5,Eva\n"), "roster.csv")
+        self.assertEqual((result.saved, result.errors), (1, [(3, "last_name: This field is required.")]))
+        self.student.refresh_from_db()
+        self.assertEqual(
+            (self.student.last_name, self.student.course_year_section, self.student.college),
+            ("Reyes", "BSIT 2A", "CAS"),
+        )
+        self.assertFalse(ViolationEvent.objects.filter(kind=ViolationEvent.MOVED).exists())
+
+
+class AnalyticsValidatorTests(TestCase):
+    """The analytics ETag follows the data in the database, not this process's cache."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.superuser = User.objects.create_superuser("osa", "osa@example.com", "password")
+        # bulk_create skips the receivers: a version bump queued here would never
+        # commit, and the bumps made by the tests would join it instead of running
+        [cls.student] = Student.objects.bulk_create(
+            [Student(student_id="1", first_name="Ana", last_name="Cruz", college="CAS")]
+        )
+
+    def setUp(self):
+        self.client.force_login(self.superuser)
+
+    def test_etag(self):
+        url = reverse("tracker:college_analytics")
+        etag = self.client.get(url)["ETag"]
+        # a process with a cache of its own reads the same version
+        cache.clear()
+        self.assertEqual(self.client.get(url, headers={"If-None-Match": etag}).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            Violation.objects.create(student=self.student, offense="No ID", level=1)
+        self.assertEqual(self.client.get(url, headers={"If-None-Match": etag}).status_code, 200)
+
+    def test_trend_etag_follows_today(self):
+        url = reverse("tracker:violation_trends") + "?granularity=day"
+        today = timezone.localdate()
+        with mock.patch("django.utils.timezone.localdate", return_value=today):
+            etag = self.client.get(url)["ETag"]
+            self.assertEqual(self.client.get(url, headers={"If-None-Match": etag}).status_code, 304)
+        # the default range ends today, so tomorrow's page is a different one
+        with mock.patch("django.utils.timezone.localdate", return_value=today + timedelta(days=1)):
+            self.assertEqual(self.client.get(url, headers={"If-None-Match": etag}).status_code, 200)
+
+    def test_trend_buckets_capped(self):
+        response = self.client.get(reverse("tracker:violation_trends") + "?granularity=day&start=0001-01-01")
+        self.assertEqual(len(response.context["labels"]), TREND_MAX_BUCKETS)
+        response = self.client.get(reverse("tracker:violation_trends") + "?granularity=month&start=1900-01-01")
+        self.assertEqual(len(response.context["labels"]), TREND_MAX_BUCKETS)
+
+
+class FragmentVersionTests(TestCase):
+    """Student list fragments are invalidated through the database, for every process."""
+
+    def test_invalidation_outlives_cache(self):
+        version = fragment_version("CAS")
+        # a process with a cache of its own reads the same version
+        cache.clear()
+        self.assertEqual(fragment_version("CAS"), version)
+        with self.captureOnCommitCallbacks(execute=True):
+            Student.objects.create(student_id="1", first_name="Ana", last_name="Cruz", college="CAS")
+        cache.clear()
+        self.assertNotEqual(fragment_version("CAS"), version)
+
+
+@override_settings(TRACKER_CLIENT_IP_HEADER="HTTP_X_FORWARDED_FOR", TRACKER_TRUSTED_PROXY_COUNT=1, TRACKER_LOGIN_BURST=2)
+class LoginRateLimitTests(TestCase):
+    """Only the address appended by the trusted proxy picks the login bucket."""
+
+    def setUp(self):
+        logins.login_attempts.clear()
+        self.addCleanup(logins.login_attempts.clear)
+
+    def login(self, forwarded_for):
+        return self.client.post(
+            reverse("tracker:student_login"), {"student_id": ""}, headers={"X-Forwarded-For": forwarded_for}
+        )
+
+    def test_spoofed_header_keeps_bucket(self):
+        for n in range(2):
+            self.assertEqual(self.login(f"10.0.0.{n}, 192.0.2.1").status_code, 200)
+        # a new forged address in front does not get a fresh bucket
+        self.assertEqual(self.login("10.0.0.99, 192.0.2.1").status_code, 429)
+        self.assertEqual(self.login("192.0.2.2").status_code, 200)
+
+
+@override_settings(TRACKER_LOGIN_BURST=2, TRACKER_LOGIN_RATE=0.5)
+class StudentLoginTests(TestCase):
+    """The async student login: a bucket of attempts per client, refilled over time."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = Student.objects.create(student_id="1", first_name="Ana", last_name="Cruz", college="CAS")
+
+    def setUp(self):
+        self.now = 1000.0
+        clock = mock.patch.object(logins.login_attempts, "clock", lambda: self.now)
+        clock.start()
+        self.addCleanup(clock.stop)
+        for state in (logins.login_attempts, logins.student_ids):
+            state.clear()
+            self.addCleanup(state.clear)
+
+    def login(self, student_id="1"):
+        return self.client.post(reverse("tracker:student_login"), {"student_id": student_id})
+
+    def test_accept_deny_refill(self):
+        self.assertRedirects(
+            self.login(), reverse("tracker:student_violation", args=[self.student.pk]), fetch_redirect_response=False
+        )
+        self.assertContains(self.login("2"), "Student ID not found.")
+        self.assertEqual(self.login().status_code, 429)
+        self.now += 1
+        self.assertEqual(self.login().status_code, 429)
+        # one attempt back every 2 seconds
+        self.now += 1
+        self.assertEqual(self.login().status_code, 302)
+        self.assertEqual(self.login().status_code, 429)
+        self.now += 60
+        self.assertEqual([self.login().status_code for _ in range(3)], [302, 302, 429])
+
+
+class StudentLookupTests(TestCase):
+    """School ID lookups cache the students found, never the IDs that were not."""
+
+    def setUp(self):
+        logins.student_ids.clear()
+        self.addCleanup(logins.student_ids.clear)
+
+    def test_miss_is_not_cached(self):
+        lookup = async_to_sync(logins.lookup_student_pk)
+        self.assertIsNone(lookup("1"))
+        # added without this process's commit hooks, as by another process
+        student = Student.objects.create(student_id="1", first_name="Ana", last_name="Cruz", college="CAS")
+        self.assertEqual(lookup("1"), student.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(lookup("1"), student.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            student.delete()
+        self.assertIsNone(lookup("1"))
+
+
+class APIAccessTests(TestCase):
+    """The API takes a token or a staff session, not just any logged in user."""
+
+    def test_session_must_be_staff(self):
+        url = reverse("tracker:api_students")
+        self.assertEqual(self.client.get(url).status_code, 401)
+        user = User.objects.create_user("clerk", "clerk@example.com", "password")
+        self.client.force_login(user)
+        self.assertEqual(self.client.get(url).status_code, 403)
+        user.is_staff = True
+        user.save()
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+
+class APISyncTests(TestCase):
+    """updated_since follows edits and deletions, not when a violation occurred."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.superuser = User.objects.create_superuser("osa", "osa@example.com", "password")
+        cls.student = Student.objects.create(student_id="1", first_name="Ana", last_name="Cruz", college="CAS")
+
+    def setUp(self):
+        self.client.force_login(self.superuser)
+
+    def get(self, name, since):
+        response = self.client.get(reverse(name), {"updated_since": since.isoformat()})
+        self.assertEqual(response.status_code, 200)
+        return response.json()["results"]
+
+    def test_edit_and_delete_old_violations(self):
+        edited, deleted = (
+            Violation.objects.create(student=self.student, offense="No ID", level=1) for _ in range(2)
+        )
+        Violation.objects.filter(pk__in=[edited.pk, deleted.pk]).update(
+            occurred_at=timezone.now() - timedelta(days=400), updated_at=timezone.now() - timedelta(days=400)
+        )
+        since = timezone.now()
+        self.assertEqual(self.get("tracker:api_violations", since), [])
+        edited.refresh_from_db()
+        edited.level = 2
+        edited.save()
+        deleted_pk = deleted.pk
+        deleted.delete()
+        self.assertEqual(
+            [(row["id"], row["level"]) for row in self.get("tracker:api_violations", since)], [(edited.pk, 2)]
+        )
+        self.assertEqual([row["id"] for row in self.get("tracker:api_deleted_violations", since)], [deleted_pk])
+
+    def test_deletions_before_kept_history(self):
+        since = timezone.now()
+        history.take_snapshot()
+        history.prune(1)
+        response = self.client.get(reverse("tracker:api_deleted_violations"), {"updated_since": since.isoformat()})
+        self.assertEqual(response.status_code, 400)
+
+
+class Recorder(pending.Pending):
+    runs = []
+
+    def __init__(self, using):
+        super().__init__(using)
+        self.items = set()
+
+    def run(self):
+        self.runs.append(self.items)
+
+
+class PendingTests(TransactionTestCase):
+    """One Pending per class and transaction, dropped with a rollback."""
+
+    def setUp(self):
+        Recorder.runs = []
+
+    def add(self, item):
+        pending.current(Recorder).items.add(item)
+
+    def test_outside_transaction(self):
+        self.assertIsNone(pending.current(Recorder))
+
+    def test_commit(self):
+        with transaction.atomic():
+            self.add(1)
+            self.add(2)
+            self.assertEqual(Recorder.runs, [])
+        self.assertEqual(Recorder.runs, [{1, 2}])
+        with transaction.atomic():
+            self.add(3)
+        self.assertEqual(Recorder.runs, [{1, 2}, {3}])
+
+    def test_rollback(self):
+        with self.assertRaises(ZeroDivisionError), transaction.atomic():
+            self.add(1)
+            1 / 0
+        with transaction.atomic():
+            self.add(2)
+        self.assertEqual(Recorder.runs, [{2}])
+
+    def test_savepoint_rollback(self):
+        with transaction.atomic():
+            with self.assertRaises(ZeroDivisionError), transaction.atomic():
+                self.add(1)
+                1 / 0
+            # the savepoint took the queued callback with it
+            self.add(2)
+        self.assertEqual(Recorder.runs, [{2}])
+
+    def test_savepoint_release(self):
+        with transaction.atomic():
+            with transaction.atomic():
+                self.add(1)
+            self.add(2)
+        self.assertEqual(Recorder.runs, [{1, 2}])
+
+
+@jobs.task("test_flaky")
+def flaky_task(job, fail_with=None):
+    if fail_with == "retry":
+        raise RuntimeError("Try again.")
+    if fail_with == "fail":
+        raise jobs.JobFailed("Cannot be done.")
+    return {"attempts": job.attempts}
+
+
+class JobQueueTests(TestCase):
+    """Claiming, retrying and requeueing jobs, and the files they hand over."""
+
+    def setUp(self):
+        self.files = use_temporary_job_files(self)
+
+    def test_claim_takes_each_job_once(self):
+        first, second = jobs.enqueue("test_flaky"), jobs.enqueue("test_flaky")
+        self.assertEqual(jobs.claim("a").pk, first.pk)
+        self.assertEqual(jobs.claim("b").pk, second.pk)
+        self.assertIsNone(jobs.claim("c"))
+        first.refresh_from_db()
+        self.assertEqual((first.status, first.worker, first.attempts), (Job.RUNNING, "a", 1))
+
+    def test_claim_race(self):
+        first, second = jobs.enqueue("test_flaky"), jobs.enqueue("test_flaky")
+        race = [first.pk]
+
+        # another worker claims the first job between this worker's candidate
+        # query and its UPDATE
+        def other_worker_first(execute, sql, params, many, context):
+            if sql.startswith("UPDATE") and race:
+                Job.objects.filter(pk=race.pop()).update(status=Job.RUNNING, worker="other")
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(other_worker_first):
+            claimed = jobs.claim("this")
+        self.assertEqual(claimed.pk, second.pk)
+        first.refresh_from_db()
+        self.assertEqual((first.worker, first.attempts), ("other", 0))
+
+    def test_claim_waits_for_run_after(self):
+        job = jobs.enqueue("test_flaky")
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now() + timedelta(seconds=60))
+        self.assertIsNone(jobs.claim("test"))
+
+    def test_retry_backoff(self):
+        job = jobs.enqueue("test_flaky", {"fail_with": "retry"}, max_attempts=3)
+        for delay in (jobs.RETRY_DELAY, 2 * jobs.RETRY_DELAY):
+            before = timezone.now()
+            job = jobs.run(jobs.claim("test"))
+            self.assertEqual(job.status, Job.QUEUED)
+            self.assertIn("Try again.", job.error)
+            self.assertGreaterEqual(job.run_after, before + timedelta(seconds=delay))
+            self.assertLessEqual(job.run_after, timezone.now() + timedelta(seconds=delay))
+            self.assertIsNone(jobs.claim("test"))
+            Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        job = jobs.run(jobs.claim("test"))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 3))
+        self.assertIsNotNone(job.finished_at)
+
+    def test_job_failed_is_not_retried(self):
+        job = jobs.enqueue("test_flaky", {"fail_with": "fail"})
+        jobs.run(jobs.claim("test"))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.error), (Job.FAILED, 1, "Cannot be done."))
+
+    def test_requeue_stale(self):
+        silent = timezone.now() - timedelta(seconds=jobs.STALE_AFTER + 1)
+        stale, exhausted, alive = (jobs.enqueue("test_flaky", max_attempts=2) for _ in range(3))
+        for job, attempts, heartbeat_at in ((stale, 1, silent), (exhausted, 2, silent), (alive, 1, timezone.now())):
+            Job.objects.filter(pk=job.pk).update(status=Job.RUNNING, attempts=attempts, heartbeat_at=heartbeat_at)
+        self.assertEqual(jobs.requeue_stale(), 2)
+        statuses = dict(Job.objects.values_list("pk", "status"))
+        self.assertEqual(
+            [statuses[job.pk] for job in (stale, exhausted, alive)], [Job.QUEUED, Job.FAILED, Job.RUNNING]
+        )
+        self.assertEqual(jobs.claim("test").pk, stale.pk)
+
+    def test_roster_upload_is_passed_as_a_file(self):
+        self.client.force_login(User.objects.create_superuser("osa", "osa@example.com", "password"))
+        roster = SimpleUploadedFile(
+            "roster.csv", b"student_id,first_name,last_name,college\n20240001,Ana,Cruz,CAS\n", content_type="text/csv"
+        )
+        response = self.client.post(reverse("tracker:import_roster"), {"roster": roster})
+        job = Job.objects.get()
+        self.assertRedirects(response, reverse("tracker:job_detail", args=[job.pk]))
+        self.assertTrue((self.files / job.input_file).is_file())
+        jobs.run(jobs.claim("test"))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.result["saved"], job.result["errors"]), (Job.SUCCEEDED, 1, []))
+        self.assertTrue(Student.objects.filter(student_id="20240001", college="CAS").exists())
+        with self.captureOnCommitCallbacks(execute=True):
+            job.delete()
+        self.assertFalse((self.files / job.input_file).exists())
+
+
+class RunWorkerTests(TransactionTestCase):
+    """runworker's threads use their own connections, so the jobs must be committed."""
+
+    def setUp(self):
+        use_temporary_job_files(self)
+
+    def test_once(self):
+        succeeding, retried = jobs.enqueue("test_flaky"), jobs.enqueue("test_flaky", {"fail_with": "retry"})
+        out = io.StringIO()
+        call_command("runworker", "--once", "--threads=2", "--name=test", stdout=out)
+        succeeding.refresh_from_db()
+        retried.refresh_from_db()
+        self.assertEqual(
+            (succeeding.status, succeeding.worker, succeeding.result), (Job.SUCCEEDED, "test", {"attempts": 1})
+        )
+        # queued again for later, which --once does not wait for
+        self.assertEqual((retried.status, retried.attempts), (Job.QUEUED, 1))
+        self.assertIn(f"{succeeding} finished", out.getvalue())
+
+
+class RecomputeScheduleTests(TestCase):
+    """rules.schedule() recomputes the students touched by a transaction once, when
+    it commits; TestCase never commits, so the callbacks are run by hand."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.superuser = User.objects.create_superuser("osa", "osa@example.com", "password")
+        cls.student = Student.objects.create(student_id="1", first_name="Ana", last_name="Cruz", college="CAS")
+        cls.other = Student.objects.create(student_id="2", first_name="Jose", last_name="Reyes", college="CAS")
+
+    def pending(self, callbacks):
+        return [callback for callback in callbacks if isinstance(callback, _PendingRecompute)]
+
+    def test_one_recompute_per_transaction(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            for level in (1, 2):
+                Violation.objects.create(student=self.student, offense="No ID", level=level)
+            Violation.objects.create(student=self.other, offense="No ID", level=1)
+        pending = self.pending(callbacks)
+        self.assertEqual(len(pending), 1)
+        self.assertEqual(pending[0].student_ids, {self.student.pk, self.other.pk})
+        self.student.refresh_from_db()
+        self.assertEqual((self.student.violation_count, self.student.highest_level), (2, 2))
+        self.assertFalse(self.student.noted)
+
+    def test_rebuild_marks_only_changed_students(self):
+        Student.objects.filter(pk=self.other.pk).update(violation_count=5)
+        before = dict(Student.objects.values_list("pk", "last_changed"))
+        self.assertEqual(recompute(), 1)
+        after = dict(Student.objects.values_list("pk", "last_changed"))
+        self.assertEqual(after[self.student.pk], before[self.student.pk])
+        self.assertGreater(after[self.other.pk], before[self.other.pk])
+        self.assertEqual(Student.objects.get(pk=self.other.pk).violation_count, 0)
+
+    def test_rollback(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            with self.assertRaises(RuntimeError):
+                with transaction.atomic():
+                    Violation.objects.create(student=self.student, offense="No ID", level=3)
+                    raise RuntimeError
+        self.assertEqual(self.pending(callbacks), [])
+        self.student.refresh_from_db()
+        self.assertEqual(self.student.violation_count, 0)
+
+    def test_cascade_single_update(self):
+        # bulk_create skips the receivers, so no recompute is pending beforehand
+        Violation.objects.bulk_create(
+            Violation(student=self.student, offense="No ID", level=level) for level in (1, 2, 3, 1, 2)
+        )
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.student.violations.all().delete()
+        with CaptureQueriesContext(connection) as queries:
+            for callback in callbacks:
+                callback()
+        updates = [query for query in queries if query["sql"].startswith('UPDATE "tracker_student"')]
+        self.assertEqual(len(updates), 1)
+        self.student.refresh_from_db()
+        self.assertEqual((self.student.violation_count, self.student.noted), (0, False))
+
+    def test_noted_badge(self):
+        # one offense at NOTED_LEVEL notes a student regardless of the count
+        with self.captureOnCommitCallbacks(execute=True):
+            Violation.objects.create(student=self.student, offense="Vandalism", level=3)
+        self.client.force_login(self.superuser)
+        response = self.client.get(reverse("tracker:student_panel"), {"college": "CAS"})
+        row = response.content.decode().split("Cruz, Ana")[1].split("</tr>")[0]
+        self.assertIn("Noted", row)
+
+
+@unittest.skipUnless(importlib.util.find_spec("numpy"), "risk scoring requires numpy")
+class EscalationVelocityTests(unittest.TestCase):
+    """Escalation only counts levels reached after, and above, the first violation."""
+
+    def velocities(self, *histories):
+        import numpy as np
+
+        now = timezone.now()
+        rows = [
+            (student_id, level, (now - timedelta(days=days_ago)).timestamp())
+            for student_id, history in enumerate(histories, 1)
+            for level, days_ago in history
+        ]
+        student_ids, levels, timestamps = (np.array(column) for column in zip(*rows))
+        return compute_scores(student_ids, levels, timestamps, now)[2].tolist()
+
+    def test_velocity(self):
+        escalated, deescalated, dipped = self.velocities(
+            [(1, 60), (3, 0)],
+            [(3, 60), (1, 0)],
+            [(2, 60), (1, 30), (3, 0)],
+        )
+        self.assertAlmostEqual(escalated, 2 / 60 * 30)
+        self.assertEqual(deescalated, 0)
+        # climbed from level 2, not from the level 1 reached in between
+        self.assertAlmostEqual(dipped, 1 / 60 * 30)
+
+
+class BenchmarkBaselineTests(TransactionTestCase):
+    """Query counts of the benchmarked views must not exceed the stored baselines.
+
+    The requests commit, as under the benchmark command, so the work deferred to
+    on_commit (rollups, versions, counters) is counted too."""
+
+    def setUp(self):
+        cache.clear()
+        generate_dataset(*DATASET_SIZES["small"])
+
+    def test_query_counts_within_baselines(self):
+        results = {"small": benchmark_views(repeat=2)}
+        # latency depends on the machine; the benchmark command checks it
+        self.assertEqual(compare_to_baselines(results, load_baselines(), tolerance=float("inf")), [])
+
+
+class SQLiteProductionProfileTests(unittest.TestCase):
+    """Parallel writers on a file database using settings.SQLITE_PRODUCTION, outside
+    the test database Django manages (hence a plain unittest TestCase)."""
+
+    alias = "tracker_concurrency"
+    writers = 8
+    writes_per_writer = 25
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        directory = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(directory.cleanup)
+        database = {
+            **settings.SQLITE_PRODUCTION,
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": str(Path(directory.name) / "db.sqlite3"),
+        }
+        connections.settings[cls.alias] = connections.configure_settings({"default": database})["default"]
+        cls.addClassCleanup(connections.settings.pop, cls.alias)
+        cls.addClassCleanup(lambda: connections[cls.alias].close())
+        with connections[cls.alias].cursor() as cursor:
+            cursor.execute("CREATE TABLE counter (total integer NOT NULL)")
+            cursor.execute("INSERT INTO counter (total) VALUES (0)")
+
+    def test_pragmas(self):
+        with connections[self.alias].cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode")
+            self.assertEqual(cursor.fetchone()[0], "wal")
+            cursor.execute("PRAGMA synchronous")
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+
+    def test_parallel_writers(self):
+        @retry_on_locked(using=self.alias)
+        def increment():
+            # read then write: the pattern that fails outright with deferred transactions
+            with transaction.atomic(using=self.alias):
+                with connections[self.alias].cursor() as cursor:
+                    cursor.execute("SELECT total FROM counter")
+                    total = cursor.fetchone()[0]
+                    cursor.execute("UPDATE counter SET total = %s", [total + 1])
+
+        errors = []
+
+        def writer():
+            try:
+                for _ in range(self.writes_per_writer):
+                    increment()
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connections[self.alias].close()
+
+        threads = [threading.Thread(target=writer) for _ in range(self.writers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        with connections[self.alias].cursor() as cursor:
+            cursor.execute("SELECT total FROM counter")
+            self.assertEqual(cursor.fetchone()[0], self.writers * self.writes_per_writer)
+
+
+class StartupProfileTests(unittest.TestCase):
+    """profile_startup times a fresh process, and setting Django up does not load
+    the request-serving modules."""
+
+    def test_profile(self):
+        profile = profile_startup("OSA_VMS.settings", check=False)
+        self.assertEqual(set(profile["apps"]["tracker"]), {"import_ms", "models_ms", "ready_ms"})
+        self.assertIn("tracker.models", profile["modules"])
+        for module in ("tracker.views", "tracker.api", "tracker.tasks"):
+            self.assertNotIn(module, profile["modules"])
+        self.assertIn("django", [module for module, _, _ in profile["imports"]])
+        self.assertLessEqual(profile["setup_ms"], profile["total_ms"])
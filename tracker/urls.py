@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import api, views
 
 app_name = "tracker"
 
@@ -8,11 +8,33 @@ urlpatterns = [
     path("logout/", views.logout_view, name="logout"),
     path("signup/", views.signup_view, name="signup"),
     path("", views.student_list, name="student_list"),
+    path("students/panel/", views.student_panel, name="student_panel"),
     path("students/add/", views.add_student, name="add_student"),
+    path("students/import/", views.import_roster_view, name="import_roster"),
     path("students/<int:pk>/", views.student_detail, name="student_detail"),
+    path("students/<int:pk>/history/", views.student_history, name="student_history"),
+    path("students/at-risk/", views.at_risk_students, name="at_risk_students"),
     path("violations/add/", views.add_violation, name="add_violation"),
+    path("violations/bulk/", views.bulk_add_violations, name="bulk_add_violations"),
+    path("violations/bulk.json", views.bulk_add_violations_json, name="bulk_add_violations_json"),
+    path("search/", views.search_view, name="search"),
     path("analytics/", views.college_analytics, name="college_analytics"),
+    path("analytics/trends/", views.violation_trends, name="violation_trends"),
+    path("analytics/trends/violations/", views.trend_violations, name="trend_violations"),
+    path("export/students.csv", views.export_students, {"fmt": "csv"}, name="export_students_csv"),
+    path("export/students.ndjson", views.export_students, {"fmt": "ndjson"}, name="export_students_ndjson"),
+    path("export/violations.csv", views.export_violations, {"fmt": "csv"}, name="export_violations_csv"),
+    path("export/violations.ndjson", views.export_violations, {"fmt": "ndjson"}, name="export_violations_ndjson"),
+    path("api/students/", api.students, name="api_students"),
+    path("api/violations/", api.violations, name="api_violations"),
+    path("api/violations/deleted/", api.deleted_violations, name="api_deleted_violations"),
+    path("jobs/", views.job_list, name="job_list"),
+    path("jobs/<int:pk>/", views.job_detail, name="job_detail"),
+    path("jobs/<int:pk>/status/", views.job_status, name="job_status"),
+    path("jobs/<int:pk>/output/", views.job_output, name="job_output"),
+    path("jobs/enqueue/<slug:name>/", views.enqueue_job, name="enqueue_job"),
     path("about/", views.about_view, name="about"),
+    path("profiling/", views.profiling_view, name="profiling"),
     
     
     
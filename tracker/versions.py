@@ -0,0 +1,69 @@
+"""Version numbers of cached data, kept in the DataVersion table.
+
+Cached fragments and chart data embed the version of the data they were built
+from in their keys, and HTTP validators are derived from it. Keeping the
+versions in the database rather than in the cache means a change committed by
+any process (another web worker, a management command, the job worker) is
+seen by every other process, whatever cache backend each of them uses.
+
+``bump()`` is deferred to the end of the transaction and applied once for all
+the names bumped in it; a version that does not exist yet starts from the
+clock, so a version lost with a rolled back transaction is never reused.
+"""
+import time
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import pending
+from .models import DataVersion
+from .retry import retry_on_locked
+
+
+@retry_on_locked
+def _create(names):
+    now = timezone.now()
+    DataVersion.objects.bulk_create(
+        [DataVersion(name=name, version=time.time_ns(), changed_at=now) for name in names], ignore_conflicts=True
+    )
+
+
+def current(name):
+    """(version, changed_at) of `name`."""
+    row = DataVersion.objects.filter(name=name).values_list("version", "changed_at").first()
+    if row is None:
+        _create([name])
+        row = DataVersion.objects.filter(name=name).values_list("version", "changed_at").get()
+    return row
+
+
+@retry_on_locked
+def _bump(names):
+    with transaction.atomic():
+        _create(names)
+        DataVersion.objects.filter(name__in=names).update(version=F("version") + 1, changed_at=timezone.now())
+
+
+class _PendingBump(pending.Pending):
+    """Every name bumped in one transaction, bumped once when it commits."""
+
+    def __init__(self, using):
+        super().__init__(using)
+        self.names = set()
+
+    def run(self):
+        _bump(self.names)
+
+
+def bump(names, using=DEFAULT_DB_ALIAS):
+    """Bump the given versions when the current transaction commits, or now
+    outside of one."""
+    names = set(names)
+    if not names:
+        return
+    bumped = pending.current(_PendingBump, using)
+    if bumped is None:
+        _bump(names)
+        return
+    bumped.names.update(names)
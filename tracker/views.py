@@ -1,11 +1,80 @@
+import json
+from datetime import datetime, time, timedelta
+from functools import wraps
+from itertools import chain
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib import messages
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth.forms import AuthenticationForm, UserCreationForm
-from django.db.models import Count
-from .models import Student, Violation
-from .forms import ViolationForm, StudentForm
+from django.db import transaction
+from django.db.models import Count, Q
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_POST
+from . import history, search
+from .jobs import enqueue
+from .logins import allow_login, lookup_student_pk
+from .models import ArchivedViolation, Job, Student, Violation, job_files
+from .analytics import analytics_version, bucket_range, college_chart_data, limit_buckets, trend_chart_data
+from .bulk import MAX_BULK_VIOLATIONS, build_violations, record_violations
+from .exports import (
+    STUDENT_COLUMNS, VIOLATION_EXPORT_COLUMNS, filter_students, filter_violations, stream_csv, stream_ndjson,
+    violations_matching,
+)
+from .middleware import PERCENTILES, timings
+from .forms import BulkViolationForm, ExportFilterForm, RosterUploadForm, TrendFilterForm, ViolationForm, StudentForm
+from .fragments import ALL_COLLEGES, FRAGMENT_CACHE_TIMEOUT, fragment_key
+from .pagination import InvalidCursor, decode_cursor, keyset_page
+from .retry import retry_on_locked
+from .rules import NOTED_THRESHOLD
+
+
+STUDENT_LIST_ORDERING = ("last_name", "first_name", "pk")
+STUDENT_LIST_FIELDS = ("student_id", "first_name", "last_name", "college", "violation_count", "noted")
+TREND_DEFAULT_DAYS = 90
+TREND_MAX_BUCKETS = 400
+AT_RISK_LIMIT = 100
+JOB_LIST_LIMIT = 50
+EXPORT_JOBS = {"export_students": "Export students", "export_violations": "Export violations"}
+MAINTENANCE_JOBS = {
+    "rebuild_rollups": "Rebuild analytics",
+    "recompute_counters": "Recompute counters",
+    "rebuild_search_index": "Rebuild search index",
+    "score_risk": "Score risk",
+    "snapshot_history": "Snapshot violation history",
+    "archive_violations": "Archive old violations",
+}
+TREND_DRILL_DOWN_LIMIT = 500
+ARCHIVED_ORDERING = ("-occurred_at", "-pk")
+URL_PK_PLACEHOLDER = 2 ** 31 - 1
+# accordion header classes, styled in static/css/styles.css
+COLLEGE_CSS_CLASSES = {
+    "CAS": "college-cas",
+    "CBMA": "college-cbma",
+    "CCS": "college-ccs",
+    "CIT": "college-cit",
+    "COE": "college-coe",
+    "COED": "college-coed",
+}
+# name class of a student list row by violation count, capped at NOTED_THRESHOLD
+STUDENT_NAME_CLASSES = {
+    0: "",
+    1: "text-secondary fw-bold",
+    2: "text-warning fw-bold",
+    3: "text-danger fw-bold",
+}
+# (badge class, badge) by the stored noted flag, which high-level offenses also set
+STUDENT_BADGES = {True: ("bg-danger", "Noted"), False: ("bg-secondary", "OK")}
 
 
 def log_view(request):
@@ -18,26 +87,97 @@ def log_view(request):
     return render(request, "tracker/log.html")
 
 
-def student_login_view(request):
+async def _arender(request, template_name, context=None):
+    # listing messages may load the session, which is a synchronous query
+    return await sync_to_async(render)(request, template_name, context)
+
+
+async def student_login_view(request):
     if request.method == "POST":
+        if not allow_login(request):
+            # no message: storing one could touch the session table
+            response = await _arender(request, "tracker/login-2.html", {"error": "Too many attempts. Please wait a minute."})
+            response.status_code = 429
+            return response
+
         student_id = request.POST.get("student_id")
         if not student_id:
             messages.error(request, "Please enter a student ID.")
-            return render(request, "tracker/login-2.html")
+            return await _arender(request, "tracker/login-2.html")
+
+        pk = await lookup_student_pk(student_id)
+        if pk is None:
+            messages.error(request, "Student ID not found.")
+            return await _arender(request, "tracker/login-2.html")
+        return redirect("tracker:student_violation", pk=pk)
+
+    return await _arender(request, "tracker/login-2.html")
+
+
+def _requested_student(request, pk):
+    # condition() asks for the ETag and Last-Modified separately and the view
+    # needs the row afterwards; fetch it once per request
+    if not hasattr(request, "_student"):
+        request._student = Student.objects.filter(pk=pk).first()
+    return request._student
+
+
+def _student_last_changed(request, pk):
+    student = _requested_student(request, pk)
+    return student and student.last_changed
+
+
+def _student_etag(request, pk):
+    last_changed = _student_last_changed(request, pk)
+    return last_changed and f"student-{pk}-{last_changed.timestamp()}"
+
 
+def _staff_student_etag(request, pk):
+    # staff pages also show who is logged in
+    etag = _student_etag(request, pk)
+    return etag and f"{etag}-{request.user.pk}"
+
+
+def _analytics_version(request):
+    # read once per request: the ETag, Last-Modified and cached chart data all use it
+    if not hasattr(request, "_analytics_version"):
+        request._analytics_version = analytics_version()
+    return request._analytics_version
+
+
+def _analytics_etag(request):
+    return f"analytics-{_analytics_version(request)[0]}-{request.user.pk}"
+
+
+def _analytics_last_modified(request):
+    return _analytics_version(request)[1]
+
+
+def _with_requested_student(view):
+    """Fetch the student asynchronously before condition() looks at it, since
+    the ETag and Last-Modified callbacks are synchronous."""
+
+    @wraps(view)
+    async def wrapper(request, pk):
         try:
-            student = Student.objects.get(student_id=student_id)
-            return redirect("tracker:student_violation", pk=student.pk)
+            request._student = await Student.objects.aget(pk=pk)
         except Student.DoesNotExist:
-            messages.error(request, "Student ID not found.")
-            return render(request, "tracker/login-2.html")
+            request._student = None
+        return await view(request, pk)
 
-    return render(request, "tracker/login-2.html")
+    return wrapper
 
 
-def student_violation_view(request, pk):
-    student = get_object_or_404(Student, pk=pk)
-    return render(request, "tracker/student_violations.html", {"student": student})
+@_with_requested_student
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_student_etag, last_modified_func=_student_last_changed)
+async def student_violation_view(request, pk):
+    student = request._student
+    if student is None:
+        raise Http404("No Student matches the given query.")
+    violations = [violation async for violation in student.violations.all()]
+    # the template needs no further queries, so it renders on the event loop
+    return render(request, "tracker/student_violations.html", {"student": student, "violations": violations})
 
 
 
@@ -78,21 +218,157 @@ def about_view(request):
     return render(request, "tracker/about.html")
 
 
+def _student_panel_queryset(college, sort):
+    students = Student.objects.only(*STUDENT_LIST_FIELDS)
+    if sort == "name":
+        return students
+    if college:
+        return students.filter(college=college)
+    return students.filter(Q(college__isnull=True) | Q(college=""))
+
+
+def _student_list_groups(sort):
+    key = fragment_key("student_groups", ALL_COLLEGES, sort)
+    groups = cache.get(key)
+    if groups is not None:
+        return groups
+    if sort == "name":
+        groups = [{
+            "college": "",
+            "label": "All Students",
+            "count": Student.objects.count(),
+            "css_class": "college-unspecified",
+        }]
+    else:
+        counts = {}
+        for row in Student.objects.order_by().values("college").annotate(count=Count("pk")):
+            college = row["college"] or ""
+            counts[college] = counts.get(college, 0) + row["count"]
+        groups = [
+            {
+                "college": college,
+                "label": college or "Unspecified College",
+                "count": counts[college],
+                "css_class": COLLEGE_CSS_CLASSES.get(college.upper(), "college-unspecified"),
+            }
+            for college in sorted(counts)
+        ]
+    cache.set(key, groups, FRAGMENT_CACHE_TIMEOUT)
+    return groups
+
+
+def student_rows_context(students, next_cursor=None, first_page=True):
+    """Context of _student_rows.html, with each row's classes, badge and link
+    worked out here instead of by the template once per row."""
+    # reversing once: a reverse() per row cost more than rendering the row
+    detail_url = reverse("tracker:student_detail", args=[URL_PK_PLACEHOLDER]).replace(str(URL_PK_PLACEHOLDER), "{}")
+    rows = [
+        (
+            student.student_id,
+            f"{student.last_name}, {student.first_name}",
+            student.violation_count,
+            detail_url.format(student.pk),
+            STUDENT_NAME_CLASSES[min(student.violation_count, NOTED_THRESHOLD)],
+        )
+        + STUDENT_BADGES[student.noted]
+        for student in students
+    ]
+    return {"rows": rows, "next_cursor": next_cursor, "first_page": first_page}
+
+
+def _student_rows_html(college, sort, cursor=None):
+    """One page of a student list panel, rendered once per data version."""
+    decode_cursor(cursor)
+    key = fragment_key("student_rows", ALL_COLLEGES if sort == "name" else college, sort, cursor or "")
+    html = cache.get(key)
+    if html is None:
+        students, next_cursor = keyset_page(_student_panel_queryset(college, sort), STUDENT_LIST_ORDERING, cursor)
+        html = render_to_string("tracker/_student_rows.html", student_rows_context(students, next_cursor, not cursor))
+        cache.set(key, html, FRAGMENT_CACHE_TIMEOUT)
+    return html
+
+
 @login_required(login_url='tracker:log')
 def student_list(request):
     # allow optional ?sort=name or ?sort=college
-    sort = request.GET.get("sort", "college")
-    if sort == "name":
-        students = Student.objects.all().order_by("last_name", "first_name")
-    else:
-        students = Student.objects.all().order_by("college", "last_name", "first_name")
-    return render(request, "tracker/student_list.html", {"students": students})
+    sort = "name" if request.GET.get("sort") == "name" else "college"
+    groups = _student_list_groups(sort)
+    # only the panel that starts expanded is rendered inline; the others are
+    # fetched from student_panel when opened
+    first_rows = _student_rows_html(groups[0]["college"], sort) if groups else ""
+    return render(request, "tracker/student_list.html", {"groups": groups, "sort": sort, "first_rows": first_rows})
 
 
 @login_required(login_url='tracker:log')
+def student_panel(request):
+    sort = "name" if request.GET.get("sort") == "name" else "college"
+    try:
+        html = _student_rows_html(request.GET.get("college", ""), sort, request.GET.get("cursor"))
+    except InvalidCursor as exc:
+        return HttpResponseBadRequest(str(exc))
+    return HttpResponse(html)
+
+
+@login_required(login_url='tracker:log')
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_staff_student_etag, last_modified_func=_student_last_changed)
 def student_detail(request, pk):
+    student = _requested_student(request, pk)
+    if student is None:
+        raise Http404("No Student matches the given query.")
+    context = {"student": student}
+    # archived violations are only read when asked for, a page at a time
+    if request.GET.get("archived"):
+        try:
+            archived, next_cursor = keyset_page(
+                student.archived_violations.all(), ARCHIVED_ORDERING, request.GET.get("cursor")
+            )
+        except InvalidCursor as exc:
+            return HttpResponseBadRequest(str(exc))
+        context.update(show_archived=True, archived=archived, next_cursor=next_cursor)
+    return render(request, "tracker/student_detail.html", context)
+
+
+@login_required(login_url='tracker:log')
+def student_history(request, pk):
     student = get_object_or_404(Student, pk=pk)
-    return render(request, "tracker/student_detail.html", {"student": student})
+    on = parse_date(request.GET.get("on") or "") or timezone.localdate()
+    at = timezone.make_aware(datetime.combine(on, time.max))
+    try:
+        violations = history.student_record(student.pk, at)
+    except history.HistoryUnavailable as exc:
+        violations, error = [], str(exc)
+    else:
+        error = None
+    levels = dict(Violation.OFFENSE_LEVELS)
+    for violation in violations:
+        violation["level_display"] = levels.get(violation["level"], violation["level"])
+    context = {"student": student, "on": on, "violations": violations, "error": error}
+    return render(request, "tracker/student_history.html", context)
+
+
+@retry_on_locked
+def _save_form(form):
+    # the signal receivers write too; keep it all in one retryable transaction
+    with transaction.atomic():
+        return form.save()
+
+
+@login_required(login_url='tracker:log')
+def at_risk_students(request):
+    college = request.GET.get("college") or None
+    students = Student.objects.filter(risk_score__gt=0).order_by("-risk_score")
+    if college:
+        students = students.filter(college=college)
+    students = list(students[:AT_RISK_LIMIT])
+    context = {
+        "students": students,
+        "college": college,
+        "colleges": Student.college.field.choices,
+        # every student is scored in the same run
+        "scored_at": students[0].risk_scored_at if students else None,
+    }
+    return render(request, "tracker/at_risk.html", context)
 
 
 @login_required(login_url='tracker:log')
@@ -100,7 +376,7 @@ def add_student(request):
     if request.method == "POST":
         form = StudentForm(request.POST)
         if form.is_valid():
-            form.save()
+            _save_form(form)
             messages.success(request, "Student added")
             return redirect("tracker:student_list")
     else:
@@ -108,6 +384,20 @@ def add_student(request):
     return render(request, "tracker/violation_form.html", {"form": form})
 
 
+@login_required(login_url='tracker:log')
+def import_roster_view(request):
+    if request.method == "POST":
+        form = RosterUploadForm(request.POST, request.FILES)
+        if form.is_valid():
+            roster = form.cleaned_data["roster"]
+            job = enqueue("import_roster", {"filename": roster.name}, upload=roster, user=request.user)
+            messages.success(request, "Roster queued for import.")
+            return redirect("tracker:job_detail", pk=job.pk)
+    else:
+        form = RosterUploadForm()
+    return render(request, "tracker/roster_import.html", {"form": form})
+
+
 @login_required(login_url='tracker:log')
 def add_violation(request):
     initial = {}
@@ -121,11 +411,7 @@ def add_violation(request):
     if request.method == "POST":
         form = ViolationForm(request.POST)
         if form.is_valid():
-            violation = form.save() 
-            student = violation.student
-            student.noted = violation.level == 3
-            student.save(update_fields=["noted"])
-
+            _save_form(form)
             messages.success(request, "Violation recorded")
             return redirect("tracker:student_list")
     else:
@@ -134,44 +420,237 @@ def add_violation(request):
     return render(request, "tracker/violation_form.html", {"form": form})
 
 
+@login_required(login_url='tracker:log')
+def bulk_add_violations(request):
+    if request.method == "POST":
+        form = BulkViolationForm(request.POST)
+        if form.is_valid():
+            violations, errors = build_violations(form.entries())
+            for message in errors.values():
+                form.add_error("student_ids", message)
+            if not errors:
+                record_violations(violations)
+                messages.success(request, f"{len(violations)} violations recorded")
+                return redirect("tracker:student_list")
+    else:
+        form = BulkViolationForm()
+    return render(request, "tracker/violation_form.html", {"form": form})
+
+
+@login_required(login_url='tracker:log')
+@require_POST
+def bulk_add_violations_json(request):
+    # accepts {"violations": [{"student_id": ..., "offense": ..., "level": ...}, ...]} or the bare list
+    try:
+        payload = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({"error": "Request body must be JSON."}, status=400)
+    entries = payload.get("violations") if isinstance(payload, dict) else payload
+    if not isinstance(entries, list) or not all(isinstance(entry, dict) for entry in entries):
+        return JsonResponse({"error": "Expected a list of violations."}, status=400)
+    if len(entries) > MAX_BULK_VIOLATIONS:
+        return JsonResponse({"error": f"At most {MAX_BULK_VIOLATIONS} violations per request."}, status=400)
+
+    violations, errors = build_violations(entries)
+    if errors:
+        return JsonResponse({"errors": {str(index): message for index, message in errors.items()}}, status=400)
+    record_violations(violations)
+    return JsonResponse({"created": len(violations)}, status=201)
+
+
+EXPORT_FORMATS = {
+    "csv": (stream_csv, "text/csv"),
+    "ndjson": (stream_ndjson, "application/x-ndjson"),
+}
+
+
+def _export(request, name, filter_queryset, columns, fmt):
+    form = ExportFilterForm(request.GET)
+    if not form.is_valid():
+        return JsonResponse({"errors": form.errors}, status=400)
+    stream, content_type = EXPORT_FORMATS[fmt]
+    response = StreamingHttpResponse(stream(filter_queryset(**form.cleaned_data), columns), content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="{name}.{fmt}"'
+    return response
+
+
+@login_required(login_url='tracker:log')
+def export_students(request, fmt):
+    return _export(request, "students", filter_students, STUDENT_COLUMNS, fmt)
+
+
+@login_required(login_url='tracker:log')
+def export_violations(request, fmt):
+    return _export(request, "violations", filter_violations, VIOLATION_EXPORT_COLUMNS, fmt)
+
+
+def _search_result(obj):
+    if isinstance(obj, Violation):
+        return {
+            "type": search.VIOLATION,
+            "id": obj.pk,
+            "offense": obj.offense,
+            "level": obj.level,
+            "student_id": obj.student.student_id,
+            "url": reverse("tracker:student_detail", args=[obj.student_id]),
+        }
+    return {
+        "type": search.STUDENT,
+        "id": obj.pk,
+        "student_id": obj.student_id,
+        "name": f"{obj.last_name}, {obj.first_name}",
+        "url": reverse("tracker:student_detail", args=[obj.pk]),
+    }
+
+
+@login_required(login_url='tracker:log')
+def search_view(request):
+    query = request.GET.get("q", "").strip()
+    limit = 20
+    if not query:
+        results = []
+    elif search.is_available():
+        hits = search.search(query, limit=limit)
+        students = Student.objects.in_bulk([pk for kind, pk in hits if kind == search.STUDENT])
+        violations = Violation.objects.select_related("student").in_bulk(
+            [pk for kind, pk in hits if kind == search.VIOLATION]
+        )
+        found = {search.STUDENT: students, search.VIOLATION: violations}
+        results = [found[kind][pk] for kind, pk in hits if pk in found[kind]]
+    else:
+        name_match = (
+            Q(student_id__icontains=query) | Q(first_name__icontains=query) | Q(last_name__icontains=query)
+        )
+        results = list(Student.objects.filter(name_match)[:limit])
+        results += Violation.objects.select_related("student").filter(offense__icontains=query)[: limit - len(results)]
+    return JsonResponse({"query": query, "results": [_search_result(obj) for obj in results]})
+
+
 def is_superuser(user):
     return user.is_superuser
 
 
+@login_required(login_url='tracker:log')
+def job_list(request):
+    context = {
+        "jobs": Job.objects.select_related("created_by")[:JOB_LIST_LIMIT],
+        "export_form": ExportFilterForm(),
+        "export_jobs": EXPORT_JOBS,
+        "maintenance_jobs": MAINTENANCE_JOBS,
+    }
+    return render(request, "tracker/job_list.html", context)
+
+
+@login_required(login_url='tracker:log')
+@require_POST
+def enqueue_job(request, name):
+    if name not in EXPORT_JOBS and name not in MAINTENANCE_JOBS:
+        raise Http404("No such job.")
+    if name in MAINTENANCE_JOBS and not request.user.is_superuser:
+        raise PermissionDenied
+    payload = {}
+    if name in EXPORT_JOBS:
+        form = ExportFilterForm(request.POST)
+        if not form.is_valid():
+            return HttpResponseBadRequest("Invalid export filters.")
+        payload = {key: value for key, value in form.cleaned_data.items() if value}
+        for key in ("start", "end"):
+            if key in payload:
+                payload[key] = payload[key].isoformat()
+    job = enqueue(name, payload, user=request.user)
+    messages.success(request, f"{EXPORT_JOBS.get(name) or MAINTENANCE_JOBS[name]} queued.")
+    return redirect("tracker:job_detail", pk=job.pk)
+
+
+@login_required(login_url='tracker:log')
+def job_detail(request, pk):
+    job = get_object_or_404(Job, pk=pk)
+    return render(request, "tracker/job_detail.html", {"job": job})
+
+
+@login_required(login_url='tracker:log')
+def job_status(request, pk):
+    status = Job.objects.filter(pk=pk).values("status", "progress", "total", "message").first()
+    if status is None:
+        raise Http404("No such job.")
+    status["finished"] = status["status"] in (Job.SUCCEEDED, Job.FAILED)
+    return JsonResponse(status)
+
+
+@login_required(login_url='tracker:log')
+def job_output(request, pk):
+    job = get_object_or_404(Job.objects.only("output_file", "output_name"), pk=pk, status=Job.SUCCEEDED)
+    if not job.output_file:
+        raise Http404("This job produced no file.")
+    return FileResponse(
+        job_files().open(job.output_file, "rb"), as_attachment=True, filename=job.output_name, content_type="text/csv"
+    )
+
+
 @user_passes_test(is_superuser)
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_analytics_etag, last_modified_func=_analytics_last_modified)
 def college_analytics(request):
-    college_choices = dict(Student.college.field.choices)
-    violation_counts_query = (
-        Violation.objects.values("student__college")
-        .annotate(count=Count("id"))
-        .order_by("student__college")
-    )
+    return render(request, "tracker/college_analytics.html", college_chart_data(_analytics_version(request)))
+
+
+def _trend_filters(form):
+    filters = dict(form.cleaned_data) if form.is_valid() else {}
+    granularity = filters.get("granularity") or "week"
+    end = filters.get("end") or timezone.localdate()
+    start, end = bucket_range(filters.get("start") or end - timedelta(days=TREND_DEFAULT_DAYS), end, granularity)
+    start, end = limit_buckets(start, end, granularity, TREND_MAX_BUCKETS)
+    return {
+        "granularity": granularity,
+        "start": start,
+        "end": end,
+        "college": filters.get("college") or None,
+        "level": filters.get("level"),
+    }
 
-    violation_counts = {item["student__college"]: item["count"] for item in violation_counts_query}
 
-    
-    college_labels = list(college_choices.values())
-    violation_data = [violation_counts.get(abbr, 0) for abbr, name in Student.college.field.choices]
+def _trend_etag(request):
+    # the range defaults to end today, so the resolved filters are part of the ETag
+    filters = _trend_filters(TrendFilterForm(request.GET))
+    return "-".join(map(str, [_analytics_etag(request), *filters.values()]))
 
-    
-    college_colors = {
-        "CAS": "rgba(0, 128, 0, 0.6)",   
-        "CIT": "rgba(255, 0, 0, 0.6)",  
-        "COE": "rgba(255, 165, 0, 0.6)", 
-        "CBMA": "rgba(255, 255, 0, 0.6)",
-        "CCS": "rgba(128, 128, 128, 0.6)",
-        "COED": "rgba(0, 0, 255, 0.6)",
-    }
 
-    background_colors = [college_colors.get(abbr, "rgba(0,0,0,0.6)") for abbr, _ in Student.college.field.choices]
-    border_colors = [color.replace("0.6", "1") for color in background_colors]  
+@user_passes_test(is_superuser)
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_trend_etag, last_modified_func=_analytics_last_modified)
+def violation_trends(request):
+    form = TrendFilterForm(request.GET)
+    filters = _trend_filters(form)
+    data = trend_chart_data(**filters, version=_analytics_version(request))
+    return render(request, "tracker/violation_trends.html", {"form": form, **filters, **data})
 
-    context = {
-        "college_labels": college_labels,
-        "violation_data": violation_data,
-        "background_colors": background_colors,
-        "border_colors": border_colors,
-    }
-    return render(request, "tracker/college_analytics.html", context)
+
+@user_passes_test(is_superuser)
+def trend_violations(request):
+    """The violations behind one trends bucket, archived ones included since the
+    rollups count them: one query per table on its occurred_at index."""
+    form = ExportFilterForm(request.GET)
+    if not form.is_valid() or not (form.cleaned_data["start"] and form.cleaned_data["end"]):
+        return HttpResponseBadRequest("A valid start and end date are required.")
+    violations = sorted(
+        chain.from_iterable(
+            violations_matching(model, **form.cleaned_data)
+            .select_related("student")
+            .order_by("-occurred_at", "-pk")[:TREND_DRILL_DOWN_LIMIT]
+            for model in (Violation, ArchivedViolation)
+        ),
+        key=lambda violation: (violation.occurred_at, violation.pk),
+        reverse=True,
+    )[:TREND_DRILL_DOWN_LIMIT]
+    context = {**form.cleaned_data, "violations": violations, "limit": TREND_DRILL_DOWN_LIMIT}
+    return render(request, "tracker/trend_violations.html", context)
 
 
+@user_passes_test(is_superuser)
+def profiling_view(request):
+    context = {
+        "enabled": settings.TRACKER_PROFILING,
+        "percentiles": PERCENTILES,
+        "views": timings.summary(),
+    }
+    return render(request, "tracker/profiling.html", context)